@@ -1,12 +1,24 @@
 import unittest
+from test.experiment.real.four_area.helper.MetaPathHelperTest import MetaPathHelperTest
+from test.experiment.real.four_area.helper.PathSimHelperTest import PathSimHelperTest
+from test.experiment.real.four_area.helper.SparseTensorTest import SparseTensorTest
 from test.importers.ArnetMinerDataImporterTest import ArnetMinerDataImporterTest
 from test.importers.CoMoToDataImporterTest import CoMoToDataImporterTest
 from test.importers.DBISDataImporterTest import DBISDataImporterTest
 from test.importers.FourAreaDataImporterTest import FourAreaDataImporterTest
 from test.model.GraphObjectFactoryTest import GraphObjectFactoryTest
+from test.similarity.heterogeneous.ApproximatePathSimStrategyTest import ApproximatePathSimStrategyTest
+from test.similarity.heterogeneous.NeighborSimStrategyTest import NeighborSimStrategyTest
 from test.similarity.heterogeneous.PathSimStrategyTest import PathSimStrategyTest
+from test.similarity.heterogeneous.SimRankStrategyTest import SimRankStrategyTest
+from test.similarity.heterogeneous.path_shape_count.PathShapeStrategyTest import PathShapeStrategyTest
 from test.similarity.homogeneous.PageRankStrategyTest import PageRankStrategyTest
 from test.util.EdgeBasedMetaPathUtilityTest import EdgeBasedMetaPathUtilityTest
+from test.util.MetaPathCompilerTest import MetaPathCompilerTest
+from test.util.MetaPathCostEstimatorTest import MetaPathCostEstimatorTest
+from test.util.MetaPathMatrixCacheTest import MetaPathMatrixCacheTest
+from test.util.MetaPathMatrixUtilityTest import MetaPathMatrixUtilityTest
+from test.util.OnDiskSparseMatrixTest import OnDiskSparseMatrixTest
 from test.util.SampleGraphUtilityTest import SampleGraphUtilityTest
 
 __author__ = 'jontedesco'
@@ -27,9 +39,24 @@ if __name__ == '__main__':
     # Strategy tests
     strategyTestSuite = unittest.TestLoader().loadTestsFromTestCase(PageRankStrategyTest)
     strategyTestSuite.addTests(unittest.TestLoader().loadTestsFromTestCase(PathSimStrategyTest))
+    strategyTestSuite.addTests(unittest.TestLoader().loadTestsFromTestCase(ApproximatePathSimStrategyTest))
+    strategyTestSuite.addTests(unittest.TestLoader().loadTestsFromTestCase(NeighborSimStrategyTest))
+    strategyTestSuite.addTests(unittest.TestLoader().loadTestsFromTestCase(SimRankStrategyTest))
+    strategyTestSuite.addTests(unittest.TestLoader().loadTestsFromTestCase(PathShapeStrategyTest))
     unittest.TextTestRunner().run(strategyTestSuite)
 
     # Utility tests
     utilityTestSuite = unittest.TestLoader().loadTestsFromTestCase(EdgeBasedMetaPathUtilityTest)
+    utilityTestSuite.addTests(unittest.TestLoader().loadTestsFromTestCase(MetaPathCompilerTest))
+    utilityTestSuite.addTests(unittest.TestLoader().loadTestsFromTestCase(MetaPathCostEstimatorTest))
+    utilityTestSuite.addTests(unittest.TestLoader().loadTestsFromTestCase(MetaPathMatrixCacheTest))
+    utilityTestSuite.addTests(unittest.TestLoader().loadTestsFromTestCase(MetaPathMatrixUtilityTest))
+    utilityTestSuite.addTests(unittest.TestLoader().loadTestsFromTestCase(OnDiskSparseMatrixTest))
     utilityTestSuite.addTests(unittest.TestLoader().loadTestsFromTestCase(SampleGraphUtilityTest))
     unittest.TextTestRunner().run(utilityTestSuite)
+
+    # Experiment helper tests
+    experimentTestSuite = unittest.TestLoader().loadTestsFromTestCase(MetaPathHelperTest)
+    experimentTestSuite.addTests(unittest.TestLoader().loadTestsFromTestCase(PathSimHelperTest))
+    experimentTestSuite.addTests(unittest.TestLoader().loadTestsFromTestCase(SparseTensorTest))
+    unittest.TextTestRunner().run(experimentTestSuite)
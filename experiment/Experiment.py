@@ -2,6 +2,7 @@ import logging
 import os
 import threading
 import cPickle
+from src.graph.Graph import Graph
 from src.logger.ColoredLogger import ColoredLogger
 
 __author__ = 'jontedesco'
@@ -18,10 +19,13 @@ class Experiment(threading.Thread):
         """
         super(Experiment, self).__init__()
 
-        # Load the graph from the file
+        # Load the graph from the file, identifying it by its content fingerprint (stored with graphs when pickled)
+        self.graphFingerprint = None
         if inputGraphPath is not None:
             self.graph = cPickle.load(open(inputGraphPath))
             self.graph.inputPath = inputGraphPath
+            if isinstance(self.graph, Graph):
+                self.graphFingerprint = self.graph.fingerprint()
 
         # Remove output path if it already exists
         self.outputFilePath = outputFilePath
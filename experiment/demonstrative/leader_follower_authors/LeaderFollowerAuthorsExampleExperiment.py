@@ -21,9 +21,10 @@ class LeaderFollowerAuthorsExampleExperiment(Experiment):
 
     def outputSimilarityScores(self, authorMap, authors, strategy, strategyName, nodeName = 'Mike'):
         self.output('\n%s Scores (compared to %s):' % (strategyName, nodeName))
+        scores = strategy.findSimilarityScoresMatrix([authorMap[nodeName]], authors)[0]
         rows = [
             [author.name for author in authors],
-            ['%1.2f' % strategy.findSimilarityScore(authorMap[nodeName], author) for author in authors]
+            ['%1.2f' % score for score in scores]
         ]
         pathSimTable = texttable.Texttable()
         pathSimTable.add_rows(rows)
@@ -23,9 +23,10 @@ class MultiDisciplinaryAuthorsExampleExperiment(Experiment):
             authorRow = ['%s (%d)' % (author.name, citationCounts[author.name]) for author in authors]
         else:
             authorRow = [author.name for author in authors]
+        scores = strategy.findSimilarityScoresMatrix([authorMap['D']], authors)[0]
         rows = [
             authorRow,
-            ['%1.2f' % strategy.findSimilarityScore(authorMap['D'], author) for author in authors]
+            ['%1.2f' % score for score in scores]
         ]
         pathSimTable = texttable.Texttable()
         pathSimTable.add_rows(rows)
@@ -21,9 +21,10 @@ class MultiDisciplinaryAuthorsExampleExperiment(Experiment):
 
     def outputSimilarityScores(self, authorMap, authors, strategy, strategyName):
         self.output('\n%s Scores (compared to D):' % strategyName)
+        scores = strategy.findSimilarityScoresMatrix([authorMap['D']], authors)[0]
         rows = [
             [author.name for author in authors],
-            ['%1.2f' % strategy.findSimilarityScore(authorMap['D'], author) for author in authors]
+            ['%1.2f' % score for score in scores]
         ]
         pathSimTable = texttable.Texttable()
         pathSimTable.add_rows(rows)
@@ -19,9 +19,10 @@ class PathSimPaperExamplesExperiment(Experiment):
 
     def outputSimilarityScores(self, authorMap, authors, strategy, strategyName):
         self.output('\n\n%s Scores (compared to Mike):' % strategyName)
+        scores = strategy.findSimilarityScoresMatrix([authorMap['Mike']], authors)[0]
         rows = [
             [author.name for author in authors],
-            ['%1.2f' % strategy.findSimilarityScore(authorMap['Mike'], author) for author in authors]
+            ['%1.2f' % score for score in scores]
         ]
         pathSimTable = texttable.Texttable()
         pathSimTable.add_rows(rows)
@@ -21,9 +21,10 @@ class SkewedCitationPublicationWeightedExampleExperiment(Experiment):
 
     def outputSimilarityScores(self, authorMap, authors, strategy, strategyName):
         self.output('\n\n%s Scores (compared to Alice):' % strategyName)
+        scores = strategy.findSimilarityScoresMatrix([authorMap['Alice']], authors)[0]
         rows = [
             [author.name for author in authors],
-            ['%1.2f' % strategy.findSimilarityScore(authorMap['Alice'], author) for author in authors]
+            ['%1.2f' % score for score in scores]
         ]
         pathSimTable = texttable.Texttable()
         pathSimTable.add_rows(rows)
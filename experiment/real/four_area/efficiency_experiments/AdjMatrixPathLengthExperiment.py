@@ -1,12 +1,16 @@
 import cPickle
+import multiprocessing
 import os
-import sys
+import shutil
+import tempfile
 import timeit
 from collections import defaultdict
 
 import texttable
 
-from experiment.real.four_area.helper.MetaPathHelper import findMostSimilarNodes, getMetaPathAdjacencyData
+from experiment.real.four_area.helper.FourAreaMetaPathMatrixUtility import FourAreaMetaPathMatrixUtility
+from experiment.real.four_area.helper.MetaPathHelper import findMostSimilarNodes, getMetaPathAdjacencyData, \
+    getMetaPathMatrixData
 from experiment.real.four_area.helper.PathSimHelper import getNeighborSimScore
 
 
@@ -54,7 +58,8 @@ def run():
             [a, p, a, p, a],
         ],
         7: [
-            [a, p, p, a, p, p, a]
+            [a, p, p, a, p, p, a],
+            [a, p, p, c, p, p, a]
         ],
     }
 
@@ -70,6 +75,14 @@ def run():
             # Time getting adjacency matrix directly
             fullTime = timeit.timeit(lambda: getMetaPathAdjacencyData(graph, nodeIndex, metaPath), number=10)
 
+            # Time getting adjacency matrix as a chain of relation matrices, multiplied in least estimated cost order
+            chainTime = timeit.timeit(lambda: getMetaPathMatrixData(graph, nodeIndex, metaPath), number=10)
+
+            # Time the same chain, built in row blocks across all cores
+            parallelTime = timeit.timeit(lambda: getMetaPathMatrixData(
+                graph, nodeIndex, metaPath, processes=multiprocessing.cpu_count()
+            ), number=10)
+
             # Split meta path
             if pathLength in {3, 5}:
                 metaPathPart = [p, a, p] if metaPath[0] == p else [a, p, a]
@@ -83,18 +96,33 @@ def run():
             adjMatrices, adjMatrix = getPartialMetaPath(graph, metaPathPart, nodeIndex, repetitions)
             partialTime = timeit.timeit(lambda: getPartialMetaPath(graph, metaPathPart, nodeIndex, repetitions), number=10)
 
-            # Get the number of bytes to store partial adj matrices
-            bytesForMatrices = sys.getsizeof(adjMatrix)
+            # Get the number of bytes to store partial adj matrices (the arrays of the sparse matrix)
+            bytesForMatrices = adjMatrix.data.nbytes + adjMatrix.indices.nbytes + adjMatrix.indptr.nbytes
+
+            # Time spilling the full adj matrix to disk in row panels, and get the number of bytes it uses on disk
+            directory = tempfile.mkdtemp()
+            try:
+                matrixUtility = FourAreaMetaPathMatrixUtility(graph, nodeIndex)
+                outOfCoreTime = timeit.timeit(
+                    lambda: matrixUtility.getOutOfCoreMetaPathMatrix(metaPath, directory), number=10
+                )
+                bytesOnDisk = matrixUtility.getOutOfCoreMetaPathMatrix(metaPath, directory).getStorageBytes()
+            finally:
+                shutil.rmtree(directory)
 
             # Multiply for full adj matrix
             multiplyTime = timeit.timeit(lambda: multiplyFullAdjMatrix(adjMatrices, repetitions), number=10)
 
             # Output results
             metaPathLengthExperimentResults[pathLength].append((
-                fullTime, partialTime, multiplyTime, bytesForMatrices
+                fullTime, partialTime, multiplyTime, bytesForMatrices, chainTime, parallelTime, outOfCoreTime,
+                bytesOnDisk
             ))
-            print "Full Path: %.3f seconds, Partial Paths: %.3f seconds, Multiplication Only: %.3f, Bytes: %d  [%s]" % (
-                fullTime, partialTime, multiplyTime, bytesForMatrices, ', '.join(metaPath)
+            print "Full Path: %.3f seconds, Partial Paths: %.3f seconds, Multiplication Only: %.3f, Bytes: %d, " \
+                  "Relation Matrix Chain: %.3f seconds, Parallel Chain (%d processes): %.3f seconds, " \
+                  "Out-of-Core: %.3f seconds, Bytes on Disk: %d  [%s]" % (
+                fullTime, partialTime, multiplyTime, bytesForMatrices, chainTime, multiprocessing.cpu_count(),
+                parallelTime, outOfCoreTime, bytesOnDisk, ', '.join(metaPath)
             )
 
     cPickle.dump(metaPathLengthExperimentResults, open('results', 'w'))
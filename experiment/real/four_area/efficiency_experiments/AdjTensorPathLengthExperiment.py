@@ -4,8 +4,10 @@ import os
 from collections import defaultdict
 import timeit
 
+from experiment.real.four_area.helper.FourAreaMetaPathMatrixUtility import FourAreaMetaPathMatrixUtility
 from experiment.real.four_area.helper.MetaPathHelper import getMetaPathAdjacencyTensorData
-from experiment.real.four_area.helper.SparseArray import SparseArray
+from experiment.real.four_area.helper.SparseTensor import SparseTensor
+from src.util.MetaPathCostEstimator import MetaPathCostEstimator
 
 
 __author__ = 'jontedesco'
@@ -32,28 +34,7 @@ def multiplyAdjTensors(tensor1, tensor2):
     assert tensor1.shape[1] == tensor2.shape[0]
 
     # For (a x b x c) and (d x e x f), should be new size of (a x d x (c + f))
-    newTensor = SparseArray((tensor1.shape[0], tensor2.shape[1], (tensor1.shape[2] + tensor2.shape[2])))
-
-    for newRow in xrange(tensor1.shape[0]):
-        for newCol in xrange(tensor2.shape[1]):
-            for i in xrange(tensor1.shape[1]):
-
-                # Skip if this entry is not a shared neighbor along the path
-                isSharedNeighbor = (tensor1[newRow, i, 0] > 0) and (tensor2[i, newCol, 0] > 0)
-                if not isSharedNeighbor:
-                    continue
-
-                # Otherwise, add up the vectors for both
-                for j in xrange(tensor1.shape[2]):
-                    nextEntry = tensor1[newRow, i, j]
-                    if nextEntry > 0:
-                        newTensor[newRow, newCol, j] += nextEntry
-                for j in xrange(tensor2.shape[2]):
-                    nextEntry = tensor2[i, newCol, j]
-                    if nextEntry > 0:
-                        newTensor[newRow, newCol, (j + tensor1.shape[2])] += nextEntry
-
-    return newTensor
+    return tensor1.compose(tensor2)
 
 
 def run():
@@ -67,14 +48,17 @@ def run():
         5: [
            [c, p, c, p, c],
         ],
-        # 7: [
-        #    [c, p, c, p, c, p, c],
-        # ],
-        # 9: [
-        #    [c, p, c, p, c, p, c, p, c],
-        # ],
+        7: [
+           [c, p, c, p, c, p, c],
+        ],
+        9: [
+           [c, p, c, p, c, p, c, p, c],
+        ],
     }
 
+    # Meta paths whose tensors are estimated to need more memory than this are only estimated (a dry run)
+    memoryLimit = 2 ** 31
+
     graph, nodeIndex = cPickle.load(open(os.path.join('..', 'data', 'graphWithCitations')))
 
     # Map of experiment length to experiment, which contains a tuple of average times
@@ -82,9 +66,21 @@ def run():
 
     trials = 3
 
+    estimator = MetaPathCostEstimator(FourAreaMetaPathMatrixUtility(graph, nodeIndex), memoryLimit)
+
     for pathLength in sorted(metaPathLengthExperiments.keys()):
         for metaPath in metaPathLengthExperiments[pathLength]:
 
+            # Estimate the tensor size & number of path instances before building anything
+            estimates = estimator.estimate(metaPath)
+            print "Estimated Non-Zeros: %d, Path Instances: %d, Tensor Bytes: %d, Mode: %s, [%s]" % (
+                estimates['nonZeros'], estimates['pathInstances'], estimates['tensorBytes'], estimates['mode'],
+                ', '.join(metaPath)
+            )
+            if estimates['tensorBytes'] > memoryLimit or estimates['enumerationBytes'] > memoryLimit:
+                print "Skipping, since the adjacency tensor would not fit in memory"
+                continue
+
             # Time getting adjacency tensor directly
             fullTime = timeit.timeit(lambda: getMetaPathAdjacencyTensorData(graph, nodeIndex, metaPath), number=trials)
             fullTime /= float(trials)
@@ -130,19 +126,17 @@ def runTest():
       Run a simple multiplication example to check the correctness of tensor multiplication
     """
 
-    inputTensor = SparseArray((4, 4, 2))
-    inputTensor[0, 1, 0] = 10
-    inputTensor[0, 1, 1] = 10
-    inputTensor[1, 0, 0] = 10
-    inputTensor[1, 0, 1] = 10
-    inputTensor[1, 2, 0] = 5
-    inputTensor[1, 2, 1] = 5
-    inputTensor[2, 1, 0] = 5
-    inputTensor[2, 1, 1] = 5
-    inputTensor[3, 0, 0] = 100
-    inputTensor[3, 0, 1] = 100
-    inputTensor[0, 3, 0] = 100
-    inputTensor[0, 3, 1] = 100
+    inputEntries = {
+        (0, 1): 10, (1, 0): 10, (1, 2): 5, (2, 1): 5, (3, 0): 100, (0, 3): 100
+    }
+    rows, columns, layers, data = [], [], [], []
+    for (row, column), entry in inputEntries.iteritems():
+        for layer in [0, 1]:
+            rows.append(row)
+            columns.append(column)
+            layers.append(layer)
+            data.append(entry)
+    inputTensor = SparseTensor.fromCoordinates((4, 4, 2), rows, columns, layers, data)
 
     print "Input:"
     print formatTensorString(inputTensor)
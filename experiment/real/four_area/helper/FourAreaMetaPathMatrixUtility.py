@@ -0,0 +1,45 @@
+from src.util.MetaPathMatrixUtility import MetaPathMatrixUtility
+
+__author__ = 'jontedesco'
+
+
+class FourAreaMetaPathMatrixUtility(MetaPathMatrixUtility):
+    """
+      Meta path matrix utility for the 'four area' dataset, where the graph is a plain networkx graph and node types are
+      given by keywords in the node index (i.e. 'author', 'paper', 'conference' and 'term').
+    """
+
+    def __init__(self, graph, nodeIndex, processes=1):
+        super(FourAreaMetaPathMatrixUtility, self).__init__(graph, processes=processes)
+        self.nodeIndex = nodeIndex
+        self.nodeSets = {}
+
+    def _getNodesOfType(self, nodeType):
+        return self.nodeIndex[nodeType].values()
+
+    def _refreshNodeTypes(self):
+        """
+          Rebuilds the sets of nodes of each type, since nodes may have been added to the node index since
+        """
+
+        self.nodeSets = {}
+
+    def _isNodeOfType(self, node, nodeType):
+        """
+          Checks the node index for the type, through the set of its nodes
+        """
+
+        if nodeType not in self.nodeSets:
+            self.nodeSets[nodeType] = set(self.nodeIndex[nodeType].values())
+        return node in self.nodeSets[nodeType]
+
+    def _getEdgeCounts(self, node, nodeType):
+        """
+          Counts each successor of the given type once, matching 'buildPathsMap' in the meta path helper
+        """
+
+        if nodeType not in self.nodeSets:
+            self.nodeSets[nodeType] = set(self.nodeIndex[nodeType].values())
+        eligibleNodes = self.nodeSets[nodeType]
+
+        return [(neighbor, 1) for neighbor in self.graph.successors(node) if neighbor in eligibleNodes]
@@ -1,7 +1,16 @@
 from collections import defaultdict
+import cPickle
 import operator
+import os
+import tempfile
+import numpy
 from scipy.sparse import csr_matrix, csc_matrix
-from experiment.real.four_area.helper.SparseArray import SparseArray
+from experiment.real.four_area.helper.FourAreaMetaPathMatrixUtility import FourAreaMetaPathMatrixUtility
+from experiment.real.four_area.helper.SparseTensor import SparseTensor
+from src.graph.Graph import Graph
+from src.util.MetaPathCompiler import MetaPathCompiler
+from src.util.MetaPathCostEstimator import MetaPathCostEstimator
+from src.util.MetaPathMatrixCache import MetaPathMatrixCache
 
 __author__ = 'jontedesco'
 
@@ -28,6 +37,114 @@ testConferences = [
     'SIGIR',
 ]
 
+# Aliases of node types in meta path strings (i.e. 'A-P-C-P-A')
+typeAliases = {'A': 'author', 'P': 'paper', 'C': 'conference', 'T': 'term'}
+
+# Graphs & node indices loaded by 'loadSharedGraph' in this process, by absolute path
+sharedGraphs = {}
+
+
+def loadGraph(graphPath, cacheDirectory=None, maxCacheBytes=2 ** 32):
+    """
+      Load the pickled graph & node index, attaching a meta path matrix cache for the graph, so that the adjacency
+      matrices & tensors of meta paths are only computed once across runs & scripts. The graph's fingerprint is kept
+      next to the graph file ('<graphPath>.fingerprint'), and only recomputed when the graph file changes.
+
+        @param  cacheDirectory  The directory of the cache ('metaPathMatrixCache' next to the graph file if None)
+        @return The graph & node index
+    """
+
+    graph, nodeIndex = cPickle.load(open(graphPath))
+
+    graphStat = os.stat(graphPath)
+    fileVersion = '%d:%d' % (graphStat.st_size, int(graphStat.st_mtime))
+    fingerprintPath = graphPath + '.fingerprint'
+    fingerprint = None
+    if os.path.exists(fingerprintPath):
+        storedVersion, storedFingerprint = open(fingerprintPath).read().split()
+        fingerprint = storedFingerprint if storedVersion == fileVersion else None
+    if fingerprint is None:
+        fingerprint = getGraphFingerprint(graph, nodeIndex)
+        with open(fingerprintPath, 'w') as fingerprintFile:
+            fingerprintFile.write('%s %s\n' % (fileVersion, fingerprint))
+
+    if cacheDirectory is None:
+        cacheDirectory = os.path.join(os.path.dirname(graphPath), 'metaPathMatrixCache')
+    graph.graph['metaPathMatrixCache'] = MetaPathMatrixCache(cacheDirectory, fingerprint, maxCacheBytes)
+
+    return graph, nodeIndex
+
+
+def loadSharedGraph(graphPath):
+    """
+      Load a graph (see 'loadGraph') only once per process, attaching a meta path compiler shared by all experiments
+      run on it, so that experiments run by the same driver reuse each other's meta path matrices & sub-paths (see
+      'getSharedMetaPathData')
+
+        @return The graph & node index
+    """
+
+    graphPath = os.path.abspath(graphPath)
+    if graphPath not in sharedGraphs:
+        graph, nodeIndex = loadGraph(graphPath)
+        graph.graph['metaPathCompiler'] = MetaPathCompiler(FourAreaMetaPathMatrixUtility(graph, nodeIndex), typeAliases)
+        sharedGraphs[graphPath] = graph, nodeIndex
+
+    return sharedGraphs[graphPath]
+
+
+def prepareSharedMetaPaths(graphPath, metaPaths):
+    """
+      Compute the matrices of all meta paths used by the experiments of a driver as one batch with the shared compiler
+      of the graph, so that sub-paths shared between experiments are planned & computed only once, and experiments
+      only look up their matrices
+    """
+
+    graph, nodeIndex = loadSharedGraph(graphPath)
+    getCompiledMetaPathMatrices(graph, graph.graph['metaPathCompiler'], metaPaths)
+
+
+def getSharedMetaPathData(graph, nodeIndex, metaPath, rows=False):
+    """
+      Get the adjacency matrix along some meta path (given by an array of keywords) from the compiler shared by all
+      experiments on a graph loaded with 'loadSharedGraph', only computing the sub-paths not already computed for
+      earlier experiments (or loaded from the graph's meta path matrix cache, see 'getCompiledMetaPathMatrices').
+      Falls back to 'getMetaPathAdjacencyData' for graphs without a shared compiler.
+    """
+
+    compiler = getattr(graph, 'graph', {}).get('metaPathCompiler')
+    if compiler is None:
+        return getMetaPathAdjacencyData(graph, nodeIndex, metaPath, rows)
+
+    return getMetaPathMatrixDataBatch(graph, nodeIndex, [metaPath], rows, compiler)[tuple(metaPath)]
+
+
+def getGraphFingerprint(graph, nodeIndex):
+    """
+      Get the content fingerprint of a graph & its node index, as the sum of the 64-bit hashes of each node, edge (once
+      per parallel edge) and node index entry, which does not depend on the order in which they are visited (hashed
+      the same way as 'Graph.fingerprint')
+    """
+
+    fingerprint = 0
+    for node in graph.nodes():
+        fingerprint += Graph.getElementHash('node', node)
+    for source, destination in graph.edges():
+        fingerprint += Graph.getElementHash('edge', source, destination, None)
+    for nodeType in nodeIndex:
+        for index, node in nodeIndex[nodeType].iteritems():
+            fingerprint += Graph.getElementHash('index', nodeType, index, node)
+
+    return '%016x' % (fingerprint % 2 ** 64)
+
+
+def getMetaPathMatrixCache(graph):
+    """
+      Get the meta path matrix cache attached to a graph by 'loadGraph', or None if the graph has no cache
+    """
+
+    return getattr(graph, 'graph', {}).get('metaPathMatrixCache')
+
 
 def buildPathsMap(graph, metaPath, nodeIndex):
     """
@@ -59,13 +176,12 @@ def buildPathsMap(graph, metaPath, nodeIndex):
 
 def getMetaPathAdjacencyData(graph, nodeIndex, metaPath, rows=False):
     """
-      Get the adjacency matrix along some meta path (given by an array of keywords)
+      Get the adjacency matrix along some meta path (given by an array of keywords), loaded from the graph's meta path
+      matrix cache if it has one
     """
 
     assert len(metaPath) >= 1
 
-    pathsMap = buildPathsMap(graph, metaPath, nodeIndex)
-
     # Build the index into the rows of the graph
     fromNodes = nodeIndex[metaPath[0]].values()
     fromNodesIndex = {fromNodes[i]: i for i in xrange(0, len(fromNodes))}
@@ -79,45 +195,199 @@ def getMetaPathAdjacencyData(graph, nodeIndex, metaPath, rows=False):
         'toNodesIndex': toNodesIndex
     }
 
-    # Build the adjacency matrix (as a sparse array)
-    data, row, col = [], [], []
-    for startNode in pathsMap:
-        for endNode in pathsMap[startNode]:
-            for _ in pathsMap[startNode][endNode]:
-                row.append(fromNodesIndex[startNode])
-                col.append(toNodesIndex[endNode])
-                data.append(1)
-    matrixType = csr_matrix if rows else csc_matrix
-    adjMatrix = matrixType((data, (row, col)), shape=(len(fromNodes), len(toNodes)))
+    def buildAdjMatrix():
+        pathsMap = buildPathsMap(graph, metaPath, nodeIndex)
+
+        # Build the adjacency matrix (as a sparse array)
+        data, row, col = [], [], []
+        for startNode in pathsMap:
+            for endNode in pathsMap[startNode]:
+                for _ in pathsMap[startNode][endNode]:
+                    row.append(fromNodesIndex[startNode])
+                    col.append(toNodesIndex[endNode])
+                    data.append(1)
+        return csr_matrix((data, (row, col)), shape=(len(fromNodes), len(toNodes)))
+
+    cache = getMetaPathMatrixCache(graph)
+    adjMatrix = buildAdjMatrix() if cache is None else cache.getMetaPathMatrix(metaPath, buildAdjMatrix)
+    adjMatrix = adjMatrix if rows else csc_matrix(adjMatrix)
 
     return adjMatrix, extraData
 
 
-def getMetaPathAdjacencyTensorData(graph, nodeIndex, metaPath):
+def getMetaPathMatrixData(graph, nodeIndex, metaPath, rows=False, matrixUtility=None, processes=1, adjMatrix=None):
     """
-      Get the adjacency tensor along some meta path
+      Get the adjacency matrix along some meta path (given by an array of keywords), as a product of relation matrices
+      in the least estimated cost order, instead of enumerating path instances. Pass the same matrix utility across
+      calls to reuse its relation matrices, or a number of processes to build the matrices in parallel row blocks.
+      Pass an already computed adjacency matrix to only get its extra data. Otherwise, the matrix is loaded from the
+      graph's meta path matrix cache if it has one.
     """
 
     assert len(metaPath) >= 1
 
-    pathsMap = buildPathsMap(graph, metaPath, nodeIndex)
+    if matrixUtility is None:
+        matrixUtility = FourAreaMetaPathMatrixUtility(graph, nodeIndex, processes)
 
-    # Build the index into the rows of the graph
-    fromNodes = nodeIndex[metaPath[0]].values()
-    fromNodesIndex = {fromNodes[i]: i for i in xrange(0, len(fromNodes))}
-    toNodes = nodeIndex[metaPath[-1]].values()
-    toNodesIndex = {toNodes[i]: i for i in xrange(0, len(toNodes))}
+    fromNodes, fromNodesIndex = matrixUtility.getNodeIndex(metaPath[0])
+    toNodes, toNodesIndex = matrixUtility.getNodeIndex(metaPath[-1])
+    extraData = {
+        'fromNodes': fromNodes,
+        'fromNodesIndex': fromNodesIndex,
+        'toNodes': toNodes,
+        'toNodesIndex': toNodesIndex
+    }
 
-    # Build the adjacency tensor
-    adjacencyTensor = SparseArray((len(fromNodesIndex), len(toNodesIndex), len(metaPath)-1))  # M x N x K tensor
-    for startNode in pathsMap:
-        for endNode in pathsMap[startNode]:
-            pathInstances = pathsMap[startNode][endNode]
+    cache = getMetaPathMatrixCache(graph)
+    if adjMatrix is None and cache is not None:
+        adjMatrix = cache.getMetaPathMatrix(metaPath, lambda: matrixUtility.getMetaPathMatrix(metaPath))
+    adjMatrix = matrixUtility.getMetaPathMatrix(metaPath) if adjMatrix is None else adjMatrix
+    adjMatrix = adjMatrix if rows else csc_matrix(adjMatrix)
+
+    return adjMatrix, extraData
+
+
+def getMetaPathRowsData(graph, nodeIndex, metaPath, sourceNodes, matrixUtility=None):
+    """
+      Get only the rows of the adjacency matrix along some meta path for a few source nodes (i.e. the test authors),
+      computed by multiplying indicator vectors of the source nodes along the chain, so the cost is proportional to the
+      queried rows rather than to the full matrix. For meta paths starting & ending at the same type, also gets the
+      diagonal entries needed to normalize the rows, i.e. those of the source nodes & of every node they reach.
+
+        @return The sparse (CSR) rows, where 'fromNodes' & 'fromNodesIndex' of the extra data are the source nodes &
+                their rows, and 'rowDiagonal' & 'diagonal' hold the diagonal entries of each row & column (zero for
+                columns not reached by any source node)
+    """
+
+    assert len(metaPath) >= 1
+
+    if matrixUtility is None:
+        matrixUtility = FourAreaMetaPathMatrixUtility(graph, nodeIndex)
+
+    sourceNodes = list(sourceNodes)
+    toNodes, toNodesIndex = matrixUtility.getNodeIndex(metaPath[-1])
+    extraData = {
+        'fromNodes': sourceNodes,
+        'fromNodesIndex': {sourceNodes[i]: i for i in xrange(0, len(sourceNodes))},
+        'toNodes': toNodes,
+        'toNodesIndex': toNodesIndex
+    }
+
+    rowMatrix = matrixUtility.getMetaPathMatrixRows(metaPath, sourceNodes)
+
+    if metaPath[0] == metaPath[-1]:
+        reachedColumns = numpy.unique(rowMatrix.indices)
+        diagonal = numpy.zeros(len(toNodes))
+        diagonal[reachedColumns] = matrixUtility.getMetaPathDiagonal(metaPath, [toNodes[j] for j in reachedColumns])
+        extraData['diagonal'] = diagonal
+        extraData['rowDiagonal'] = matrixUtility.getMetaPathDiagonal(metaPath, sourceNodes)
+
+    return rowMatrix, extraData
+
+
+def getMetaPathMatrixDataAuto(graph, nodeIndex, metaPath, memoryLimit=2 ** 31, directory=None):
+    """
+      Get the adjacency matrix along some meta path, computed in the execution mode chosen by the cost estimator for the
+      memory available (a dense array, a sparse chain product, path enumeration, or an on-disk matrix written to the
+      given directory, or a temporary directory). Path counts of this graph cannot be sampled, since the walk estimator
+      needs typed nodes, so meta paths whose factors do not fit in memory are still computed out of core.
+
+        @return The adjacency matrix, extra data, and the estimates used to choose the execution mode
+    """
+
+    matrixUtility = FourAreaMetaPathMatrixUtility(graph, nodeIndex)
+    estimator = MetaPathCostEstimator(matrixUtility, memoryLimit, ['enumeration', 'dense', 'sparse', 'outOfCore'])
+    estimates = estimator.estimate(metaPath)
+
+    if estimates['mode'] == 'enumeration':
+        adjMatrix, extraData = getMetaPathAdjacencyData(graph, nodeIndex, metaPath)
+    elif estimates['mode'] in {'dense', 'sparse'}:
+        adjMatrix, extraData = getMetaPathMatrixData(graph, nodeIndex, metaPath, matrixUtility=matrixUtility)
+        adjMatrix = adjMatrix.toarray() if estimates['mode'] == 'dense' else adjMatrix
+    else:
+        directory = tempfile.mkdtemp() if directory is None else directory
+        adjMatrix = matrixUtility.getOutOfCoreMetaPathMatrix(metaPath, directory)
+        adjMatrix, extraData = getMetaPathMatrixData(
+            graph, nodeIndex, metaPath, rows=True, matrixUtility=matrixUtility, adjMatrix=adjMatrix
+        )
+
+    return adjMatrix, extraData, estimates
+
+
+def getMetaPathMatrixDataBatch(graph, nodeIndex, metaPaths, rows=False, compiler=None):
+    """
+      Get the adjacency matrices along a batch of meta paths (given as arrays of keywords, or strings like 'A-P-P-A'),
+      computing sub-paths shared between the meta paths only once. Pass the same compiler across calls to also reuse
+      sub-paths computed for earlier batches.
+
+        @return Dictionary of each meta path (as a tuple of keywords) to its adjacency matrix & extra data
+    """
 
-            # Get the set of edge cuts for each step along the meta path
-            for i in xrange(0, len(metaPath)-1):
-                edgePairs = {(pathInstance[i], pathInstance[i+1]) for pathInstance in pathInstances}
-                adjacencyTensor[fromNodesIndex[startNode], toNodesIndex[endNode], i] = len(edgePairs)
+    if compiler is None:
+        compiler = MetaPathCompiler(FourAreaMetaPathMatrixUtility(graph, nodeIndex), typeAliases)
+
+    metaPathMatrices = {}
+    for metaPath, adjMatrix in getCompiledMetaPathMatrices(graph, compiler, metaPaths).iteritems():
+        metaPathMatrices[metaPath] = getMetaPathMatrixData(
+            graph, nodeIndex, list(metaPath), rows, matrixUtility=compiler.matrixUtility, adjMatrix=adjMatrix
+        )
+
+    return metaPathMatrices
+
+
+def getCompiledMetaPathMatrices(graph, compiler, metaPaths):
+    """
+      Get the matrices of a batch of meta paths from a compiler, loading those the compiler has not computed yet from
+      the graph's meta path matrix cache if it has one, and only compiling (then storing in the cache) the others.
+      Matrices loaded from the cache are given to the compiler, so later meta paths can reuse them as sub-paths.
+
+        @return Dictionary of each meta path (as a tuple of keywords) to its sparse (CSR) matrix
+    """
+
+    metaPaths = [compiler.canonicalize(metaPath) for metaPath in metaPaths]
+    cache = getMetaPathMatrixCache(graph)
+
+    missedMetaPaths = []
+    for metaPath in metaPaths:
+        if metaPath in compiler.matrices or metaPath in missedMetaPaths:
+            continue
+        matrices = None if cache is None else cache.load(list(metaPath))
+        if matrices is None:
+            missedMetaPaths.append(metaPath)
+        else:
+            compiler.matrices[metaPath] = matrices[0]
+
+    for metaPath, adjMatrix in compiler.getMetaPathMatrices(missedMetaPaths).iteritems():
+        if cache is not None:
+            cache.store(list(metaPath), [adjMatrix])
+
+    return {metaPath: compiler.matrices[metaPath] for metaPath in metaPaths}
+
+
+def getMetaPathAdjacencyTensorData(graph, nodeIndex, metaPath, matrixUtility=None):
+    """
+      Get the adjacency tensor along some meta path, where entry (i, j, k) is the number of distinct edges at step k of
+      the path instances from node i to node j. Layers are built from boolean products of relation matrices, without
+      enumerating path instances. Pass the same matrix utility across calls to reuse its relation matrices. Layers are
+      loaded from the graph's meta path matrix cache if it has one.
+    """
+
+    assert len(metaPath) >= 2
+
+    if matrixUtility is None:
+        matrixUtility = FourAreaMetaPathMatrixUtility(graph, nodeIndex)
+
+    fromNodes, fromNodesIndex = matrixUtility.getNodeIndex(metaPath[0])
+    toNodes, toNodesIndex = matrixUtility.getNodeIndex(metaPath[-1])
+
+    # Build the adjacency tensor (M x N x K)
+    cache = getMetaPathMatrixCache(graph)
+    if cache is None:
+        adjacencyTensor = SparseTensor(matrixUtility.getEdgeCutMatrices(metaPath))
+    else:
+        adjacencyTensor = SparseTensor(
+            cache.getMetaPathMatrices(metaPath, lambda: matrixUtility.getEdgeCutMatrices(metaPath), 'tensor')
+        )
 
     extraData = {
         'fromNodes': fromNodes,
@@ -1,5 +1,6 @@
 from networkx import MultiDiGraph
-from scipy.sparse import lil_matrix
+import numpy
+from scipy.sparse import csc_matrix, csr_matrix, lil_matrix
 import texttable
 from experiment.real.four_area.helper.MetaPathHelper import getMetaPathAdjacencyData, findMostSimilarNodes
 
@@ -13,6 +14,122 @@ def getPathSimScore(adjacencyMatrix, sI, dI):
     return (2.0 * adjacencyMatrix[sI, dI]) / float(adjacencyMatrix[sI, sI] + adjacencyMatrix[dI, dI])
 
 
+def getRowPathSimScore(rowMatrix, sI, dI, diagonal=None, rowDiagonal=None):
+    """
+      PathSim score from only the row of the source node, given the diagonal entries of the meta path matrix for the
+      source row & destination column (see 'getMetaPathRowsData')
+    """
+
+    if rowMatrix[sI, dI] == 0:
+        return 0
+    return (2.0 * rowMatrix[sI, dI]) / float(rowDiagonal[sI] + diagonal[dI])
+
+
+def getTopPathSimScores(adjacencyMatrix, k=10, maxBlockEntries=2 ** 24):
+    """
+      All-pairs PathSim, scoring every non-zero of the (sparse) meta path matrix at once as 2 M[i,j] / (M[i,i] + M[j,j])
+      and keeping the top-k of each row with a partition (see 'selectTopScores'), rather than scoring pairs one at a
+      time. Rows are laid out in dense blocks of at most 'maxBlockEntries' entries (padded to the longest row of the
+      block) for the selection.
+
+        @return Tuple of n x k arrays of the column indices & scores of the most similar nodes of each row, by
+                decreasing score (ties broken by column), padded with index -1 & score 0 for rows with fewer than k
+                other nodes with non-zero scores
+    """
+
+    adjacencyMatrix = csr_matrix(adjacencyMatrix)
+    adjacencyMatrix.sum_duplicates()
+    indptr, indices, data = adjacencyMatrix.indptr, adjacencyMatrix.indices, adjacencyMatrix.data
+    n = adjacencyMatrix.shape[0]
+    rowLengths = numpy.diff(indptr)
+
+    # Score all non-zeros in one pass, excluding the diagonal
+    rows = numpy.repeat(numpy.arange(n), rowLengths)
+    diagonal = adjacencyMatrix.diagonal().astype(float)
+    numCycles = diagonal[rows] + diagonal[indices]
+    scores = 2.0 * data / numpy.where(numCycles > 0, numCycles, 1)
+    scores[(rows == indices) | (data == 0)] = -numpy.inf
+
+    topIndices, topScores = -numpy.ones((n, k), dtype=int), numpy.zeros((n, k))
+    blockRows = max(1, maxBlockEntries // max(1, rowLengths.max() if n > 0 else 1))
+    for start in xrange(0, n, blockRows):
+        end = min(n, start + blockRows)
+        blockWidth = max(1, rowLengths[start:end].max())
+
+        # Pad the rows of the block into dense arrays
+        entries = slice(indptr[start], indptr[end])
+        entryRows = rows[entries] - start
+        entryPositions = numpy.arange(indptr[start], indptr[end]) - indptr[rows[entries]]
+        blockScores = numpy.empty((end - start, blockWidth))
+        blockScores.fill(-numpy.inf)
+        blockIndices = -numpy.ones((end - start, blockWidth), dtype=int)
+        blockScores[entryRows, entryPositions] = scores[entries]
+        blockIndices[entryRows, entryPositions] = indices[entries]
+
+        topIndices[start:end], topScores[start:end] = selectTopScores(blockScores, blockIndices, k)
+
+    return topIndices, topScores
+
+
+def selectTopScores(blockScores, blockIndices, k):
+    """
+      Select the top-k scores of each row of a dense block of scores with a partition, without sorting whole rows,
+      then sort the selected entries (and any others tied with the k-th score) by decreasing score, breaking ties by
+      column
+
+        @param  blockScores     Dense array of scores, with -inf for entries that are not candidates
+        @param  blockIndices    Dense array of the column indices of the scores
+        @return Tuple of arrays of the k column indices & scores of each row, padded with index -1 & score 0
+    """
+
+    numRows, blockWidth = blockScores.shape
+    topIndices, topScores = -numpy.ones((numRows, k), dtype=int), numpy.zeros((numRows, k))
+
+    blockK = min(k, blockWidth)
+    if blockK < blockWidth:
+        # Keep every entry tied with the k-th score of its row, so ties are broken by column, not by partition order
+        kthScores = -numpy.partition(-blockScores, blockK - 1, axis=1)[:, blockK - 1]
+        isSelected = (blockScores >= kthScores[:, numpy.newaxis]) & numpy.isfinite(blockScores)
+        selectedRows, selectedColumns = numpy.nonzero(isSelected)
+        selectedCounts = isSelected.sum(axis=1)
+        selectedPositions = numpy.arange(len(selectedRows)) - numpy.repeat(
+            numpy.cumsum(selectedCounts) - selectedCounts, selectedCounts
+        )
+
+        selectedWidth = max(blockK, selectedCounts.max())
+        selectedScores = numpy.empty((numRows, selectedWidth))
+        selectedScores.fill(-numpy.inf)
+        selectedIndices = -numpy.ones((numRows, selectedWidth), dtype=int)
+        selectedScores[selectedRows, selectedPositions] = blockScores[selectedRows, selectedColumns]
+        selectedIndices[selectedRows, selectedPositions] = blockIndices[selectedRows, selectedColumns]
+        blockScores, blockIndices = selectedScores, selectedIndices
+
+    blockRange = numpy.arange(numRows)[:, numpy.newaxis]
+    order = numpy.lexsort((blockIndices, -blockScores), axis=1)[:, :blockK]
+    blockScores, blockIndices = blockScores[blockRange, order], blockIndices[blockRange, order]
+
+    isScored = numpy.isfinite(blockScores)
+    topScores[:, :blockK] = numpy.where(isScored, blockScores, 0)
+    topIndices[:, :blockK] = numpy.where(isScored, blockIndices, -1)
+    return topIndices, topScores
+
+
+def findAllMostSimilarNodes(adjacencyMatrix, extraData, k=10):
+    """
+      Find the top-k most similar nodes to every node by PathSim, in one batch (see 'getTopPathSimScores')
+
+        @return Dictionary of each node to its list of (node, score) pairs, as given by 'findMostSimilarNodes' but
+                excluding the node itself
+    """
+
+    fromNodes, toNodes = extraData['fromNodes'], extraData['toNodes']
+    topIndices, topScores = getTopPathSimScores(adjacencyMatrix, k)
+    return {
+        fromNodes[i]: [(toNodes[j], score) for j, score in zip(topIndices[i], topScores[i]) if j >= 0]
+        for i in xrange(0, len(fromNodes))
+    }
+
+
 def getNeighborSimScore(adjacencyMatrix, xI, yI, smoothed=False):
 
     sourceColumn = adjacencyMatrix.getcol(xI)
@@ -64,6 +181,121 @@ def getAbsNeighborSimScore(adjacencyMatrix, xI, yI, smoothed=False):
     return similarityScore
 
 
+def getNeighborSimGramMatrix(adjacencyMatrix):
+    """
+      Sparse Gram matrix (A^T A) of the columns of a projection, computed once for all NeighborSim lookups. Its entries
+      are the inner products of the neighbor counts of nodes, only stored for nodes sharing some neighbor, and its
+      diagonal holds the squared norms of the columns.
+    """
+
+    adjacencyMatrix = csc_matrix(adjacencyMatrix, dtype=float)
+    gramMatrix = csr_matrix(adjacencyMatrix.transpose() * adjacencyMatrix)
+    gramMatrix.eliminate_zeros()
+    return gramMatrix
+
+
+def getColumnNorms(adjacencyMatrix):
+    """
+      Squared norms of the columns of a projection (the diagonal of its Gram matrix), without the Gram matrix itself
+    """
+
+    adjacencyMatrix = csc_matrix(adjacencyMatrix, dtype=float)
+    return numpy.asarray(adjacencyMatrix.multiply(adjacencyMatrix).sum(axis=0)).ravel()
+
+
+def getGramNeighborSimScore(gramMatrix, xI, yI, smoothed=False):
+    """
+      NeighborSim score looked up from the Gram matrix of a projection (see 'getNeighborSimGramMatrix'), as given by
+      'getNeighborSimScore' on the projection itself, but without taking its columns for every pair
+    """
+
+    smoothing = 1 if smoothed else 0
+    total = smoothing + gramMatrix[xI, yI]
+    if total == 0:
+        return 0
+    return 2 * total / float(2 * smoothing + gramMatrix[xI, xI] + gramMatrix[yI, yI])
+
+
+def getNeighborSimScores(columnNorms, sourceIndices, gramMatrix=None, smoothed=False, commonNeighbors=True):
+    """
+      Dense NeighborSim scores of some sources against every column of a projection at once, from the squared column
+      norms & the rows of the sources in the Gram matrix (only needed for common neighbors)
+
+        @param  commonNeighbors Whether to score by common neighbors (as 'getNeighborSimScore'), or only by the
+                                differences in neighbor counts (as 'getAbsNeighborSimScore')
+        @return len(sourceIndices) x n array of scores
+    """
+
+    smoothing = 1 if smoothed else 0
+    sourceNorms = columnNorms[sourceIndices]
+    if commonNeighbors:
+        totals = 2 * (smoothing + gramMatrix[sourceIndices].toarray())
+    else:
+        # Note that max(x, y) - |x - y| = min(x, y)
+        totals = smoothing + 2 * numpy.minimum.outer(sourceNorms, columnNorms)
+
+    normalizations = numpy.add.outer(smoothing + sourceNorms, smoothing + columnNorms)
+    return numpy.where(totals > 0, totals / numpy.where(normalizations > 0, normalizations, 1), 0)
+
+
+def getTopNeighborSimScores(adjacencyMatrix, k=10, smoothed=False, commonNeighbors=True, maxBlockEntries=2 ** 24,
+                            gramMatrix=None):
+    """
+      All-pairs NeighborSim between the columns of a projection (i.e. the authors of 'PPA'), keeping the top-k of each
+      column. Without smoothing, only nodes sharing neighbors have non-zero common neighbor scores, which are exactly
+      the PathSim scores of the Gram matrix, so only the non-zeros of the Gram matrix are scored. Otherwise, every pair
+      has a score, so rows of scores are computed in dense blocks of at most 'maxBlockEntries' entries. Pass the Gram
+      matrix of the projection if it is already computed (see 'getNeighborSimGramMatrix').
+
+        @return Tuple of n x k arrays of the column indices & scores of the most similar nodes of each column, as given
+                by 'getTopPathSimScores'
+    """
+
+    if commonNeighbors:
+        gramMatrix = getNeighborSimGramMatrix(adjacencyMatrix) if gramMatrix is None else gramMatrix
+        if not smoothed:
+            return getTopPathSimScores(gramMatrix, k, maxBlockEntries)
+        columnNorms = gramMatrix.diagonal()
+    else:
+        gramMatrix, columnNorms = None, getColumnNorms(adjacencyMatrix)
+
+    n = len(columnNorms)
+    topIndices, topScores = -numpy.ones((n, k), dtype=int), numpy.zeros((n, k))
+    blockRows = max(1, maxBlockEntries // max(1, n))
+    for start in xrange(0, n, blockRows):
+        end = min(n, start + blockRows)
+        blockRange = numpy.arange(start, end)
+
+        # Score the rows of the block against all nodes, excluding the sources themselves
+        blockScores = getNeighborSimScores(columnNorms, blockRange, gramMatrix, smoothed, commonNeighbors)
+        blockScores[blockScores <= 0] = -numpy.inf
+        blockScores[blockRange - start, blockRange] = -numpy.inf
+        blockIndices = numpy.tile(numpy.arange(n), (end - start, 1))
+
+        topIndices[start:end], topScores[start:end] = selectTopScores(blockScores, blockIndices, k)
+
+    return topIndices, topScores
+
+
+def findAllMostSimilarNeighborSimNodes(adjacencyMatrix, extraData, k=10, smoothed=False, commonNeighbors=True,
+                                       gramMatrix=None):
+    """
+      Find the top-k most similar nodes to every node by NeighborSim, in one batch (see 'getTopNeighborSimScores')
+
+        @return Dictionary of each node to its list of (node, score) pairs, as given by 'findMostSimilarNodes' but
+                excluding the node itself
+    """
+
+    toNodes = extraData['toNodes']
+    topIndices, topScores = getTopNeighborSimScores(
+        adjacencyMatrix, k, smoothed, commonNeighbors, gramMatrix=gramMatrix
+    )
+    return {
+        toNodes[i]: [(toNodes[j], score) for j, score in zip(topIndices[i], topScores[i]) if j >= 0]
+        for i in xrange(0, len(toNodes))
+    }
+
+
 def pathSimPaperExample():
 
     def add_apc_to_graph(graph, author, conference, n):
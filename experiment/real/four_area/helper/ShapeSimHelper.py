@@ -1,6 +1,7 @@
 from collections import defaultdict
 import itertools
 from networkx import MultiDiGraph
+import numpy
 from scipy.sparse import csc_matrix
 import texttable
 from experiment.real.four_area.helper.MetaPathHelper import getMetaPathAdjacencyData, getMetaPathAdjacencyTensorData
@@ -12,33 +13,32 @@ __author__ = 'jontedesco'
 def getShapeSimScore(adjacencyTensor, xI, yI, alpha=1.0, omit=list()):
 
     # Configure based on tensor
-    numTensorRows = adjacencyTensor.shape[0]
     metaPathLength = adjacencyTensor.shape[2]
     vectorsIndices = list(xrange(0, metaPathLength-1))
     vectorsIndices = [z for z in vectorsIndices if z not in omit]
 
-    # Calculate sums over layers in adjacency matrix
-    xRowSums, yRowSums = {}, {}
-    for row in xrange(numTensorRows):
-        xRowSums[row] = float(sum([adjacencyTensor[row, xI, layer] for layer in vectorsIndices]))
-        yRowSums[row] = float(sum([adjacencyTensor[row, yI, layer] for layer in vectorsIndices]))
+    # Get the columns of x & y across the layers used, and their sums over these layers
+    xVectors = adjacencyTensor[:, xI, :].toarray()[:, vectorsIndices].astype(float)
+    yVectors = adjacencyTensor[:, yI, :].toarray()[:, vectorsIndices].astype(float)
+    xRowSums, yRowSums = xVectors.sum(axis=1), yVectors.sum(axis=1)
 
     # Calculate the PathSim measure on the original tensors
     absSim, relSim = 1.0, 1.0
-    for z in vectorsIndices:
+    for z in xrange(0, len(vectorsIndices)):
 
         # Calculate PathSim normalized cosine similarity on the original tensor
-        dotProduct = sum([adjacencyTensor[row, xI, z] * adjacencyTensor[row, yI, z] for row in xrange(numTensorRows)])
-        xProduct = sum([adjacencyTensor[row, xI, z] * adjacencyTensor[row, xI, z] for row in xrange(numTensorRows)])
-        yProduct = sum([adjacencyTensor[row, yI, z] * adjacencyTensor[row, yI, z] for row in xrange(numTensorRows)])
+        xVector, yVector = xVectors[:, z], yVectors[:, z]
+        dotProduct = float(xVector.dot(yVector))
+        xProduct, yProduct = float(xVector.dot(xVector)), float(yVector.dot(yVector))
         absSim *= (2 * dotProduct) / float(xProduct + yProduct)
 
         # Calculate relative / normalized dot cosine similarity
-        xNormalized = [0 if adjacencyTensor[row, xI, z] == 0 else adjacencyTensor[row, xI, z] / xRowSums[row] for row in xrange(numTensorRows)]
-        yNormalized = [0 if adjacencyTensor[row, yI, z] == 0 else adjacencyTensor[row, yI, z] / yRowSums[row] for row in xrange(numTensorRows)]
-        normalizedDotProduct = sum([xNormalized[row] * yNormalized[row] for row in xrange(numTensorRows)])
-        xDotProduct = sum([xNormalized[row] * xNormalized[row] for row in xrange(numTensorRows)])
-        yDotProduct = sum([yNormalized[row] * yNormalized[row] for row in xrange(numTensorRows)])
+        xNormalized, yNormalized = numpy.zeros(len(xVector)), numpy.zeros(len(yVector))
+        xNonZero, yNonZero = xVector != 0, yVector != 0
+        xNormalized[xNonZero] = xVector[xNonZero] / xRowSums[xNonZero]
+        yNormalized[yNonZero] = yVector[yNonZero] / yRowSums[yNonZero]
+        normalizedDotProduct = float(xNormalized.dot(yNormalized))
+        xDotProduct, yDotProduct = float(xNormalized.dot(xNormalized)), float(yNormalized.dot(yNormalized))
         relSim *= (2 * normalizedDotProduct) / float(xDotProduct + yDotProduct)
 
     return (alpha * absSim) + ((1 - alpha) * relSim)
@@ -53,45 +53,28 @@ def getNumpyShapeSimScore(adjacencyTensor, xI, yI, alpha=1.0, omit=list()):
     """
 
     # Configure based on tensor
-    numTensorRows = adjacencyTensor.shape[0]
     metaPathLength = adjacencyTensor.shape[2]
     vectorsIndices = list(xrange(0, metaPathLength-1))
     vectorsIndices = [i for i in vectorsIndices if i not in omit]
 
-    # Build the non-normalized matrices for x and y
-    xRows, xCols, xData = [], [], []
-    yRows, yCols, yData = [], [], []
-    xPathSums, yPathSums = defaultdict(int), defaultdict(int)  # Maps of row to sum of path counts for each vector
-
-    # Build or retrieve x matrix
-    for i, j in itertools.product(xrange(0, numTensorRows), vectorsIndices):
-        xEntry = adjacencyTensor[i, xI, j]
-        if xEntry > 0:
-            xRows.append(i)
-            xCols.append(j)
-            xData.append(xEntry)
-            xPathSums[i] += xEntry
-    xMatrix = csc_matrix((xData, (xRows, xCols)), shape=(numTensorRows, metaPathLength))
-
-    # Build or retrieve y matrix
-    for i, j in itertools.product(xrange(0, numTensorRows), vectorsIndices):
-        yEntry = adjacencyTensor[i, yI, j]
-        if yEntry > 0:
-            yRows.append(i)
-            yCols.append(j)
-            yData.append(yEntry)
-            yPathSums[i] += yEntry
-    yMatrix = csc_matrix((yData, (yRows, yCols)), shape=(numTensorRows, metaPathLength))
+    # Get the non-normalized matrices for x and y (the columns of x & y across layers), without omitted layers
+    omittedLayers = [i for i in xrange(0, metaPathLength) if i not in vectorsIndices]
+    xArray = adjacencyTensor[:, xI, :].toarray()
+    yArray = adjacencyTensor[:, yI, :].toarray()
+    xArray[:, omittedLayers] = 0
+    yArray[:, omittedLayers] = 0
+    xMatrix, yMatrix = csc_matrix(xArray), csc_matrix(yArray)
 
     # Abort if there are no paths to one of the objects (would result in missing column)
     if len(xMatrix.data) == 0 or len(yMatrix.data) == 0:
         return 0
 
-    # Build the normalized matrices or get them from the cache
-    normalizedXData = [xData[i] / float(xPathSums[xRows[i]]) for i in xrange(0, len(xData))]
-    normalizedXMatrix = csc_matrix((normalizedXData, (xRows, xCols)), shape=(numTensorRows, metaPathLength))
-    normalizedYData = [yData[i] / float(yPathSums[yRows[i]]) for i in xrange(0, len(yData))]
-    normalizedYMatrix = csc_matrix((normalizedYData, (yRows, yCols)), shape=(numTensorRows, metaPathLength))
+    # Build the normalized matrices, dividing each row by its sum of path counts
+    def normalizeRows(array):
+        rowSums = array.sum(axis=1).astype(float)
+        rowSums[rowSums == 0] = 1.0
+        return csc_matrix(array / rowSums[:, numpy.newaxis])
+    normalizedXMatrix, normalizedYMatrix = normalizeRows(xArray), normalizeRows(yArray)
 
     # Normalized cosine similarity (PathSim score)
     def normalizedCosineScore(vectorA, vectorB):
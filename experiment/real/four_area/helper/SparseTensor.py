@@ -0,0 +1,193 @@
+import numpy
+from scipy.sparse import csr_matrix, coo_matrix, hstack, vstack
+
+__author__ = 'jontedesco'
+
+
+class SparseTensor(object):
+    """
+      Sparse M x N x K tensor, stored as K sparse (CSR) M x N matrices, one per layer. Element-wise arithmetic is done
+      layer by layer on the sparse matrices, and fibers & slices are read without visiting empty entries.
+
+      Indexing follows numpy, for integers & slices in each dimension:
+
+        - tensor[i, j, k]   The entry at row i, column j & layer k
+        - tensor[:, j, :]   The M x K sparse matrix of column j across all layers
+        - tensor[i, :, :]   The N x K sparse matrix of row i across all layers
+        - tensor[:, :, k]   The M x N sparse matrix of layer k
+        - tensor[i, j, :]   The dense vector of entry (i, j) across all layers
+    """
+
+    def __init__(self, layers):
+        """
+          Constructs a tensor from its layers
+
+            @param  layers  The list of sparse matrices of each layer, all with the same shape
+        """
+
+        assert len(layers) > 0
+        self.layers = [csr_matrix(layer) for layer in layers]
+        self.shape = self.layers[0].shape + (len(self.layers),)
+        self.ndim = 3
+
+        for layer in self.layers:
+            assert layer.shape == self.layers[0].shape
+
+
+    @staticmethod
+    def fromCoordinates(shape, rows, columns, layers, data):
+        """
+          Builds a tensor from the coordinates & values of its entries, summing duplicate entries
+
+            @param  shape   The (M, N, K) shape of the tensor
+        """
+
+        rows, columns, layers, data = [numpy.asarray(values) for values in [rows, columns, layers, data]]
+        return SparseTensor([
+            coo_matrix((data[layers == k], (rows[layers == k], columns[layers == k])), shape=shape[:2]).tocsr()
+            for k in xrange(0, shape[2])
+        ])
+
+
+    @staticmethod
+    def fromDense(array):
+        """
+          Builds a tensor from a dense M x N x K array
+        """
+
+        return SparseTensor([csr_matrix(array[:, :, k]) for k in xrange(0, array.shape[2])])
+
+
+    @staticmethod
+    def fromScipy(matrix, numberOfLayers):
+        """
+          Builds a tensor from a sparse M x (N * K) matrix, the layers of the tensor placed side by side (see toScipy)
+        """
+
+        matrix = csr_matrix(matrix)
+        assert matrix.shape[1] % numberOfLayers == 0
+        n = matrix.shape[1] / numberOfLayers
+        return SparseTensor([matrix[:, k * n:(k + 1) * n] for k in xrange(0, numberOfLayers)])
+
+
+    def toScipy(self):
+        """
+          Get the tensor as a sparse (CSR) M x (N * K) matrix, with the layers of the tensor placed side by side
+        """
+
+        return csr_matrix(hstack(self.layers))
+
+
+    def toDense(self):
+        """
+          Get the tensor as a dense M x N x K array
+        """
+
+        return numpy.dstack([layer.toarray() for layer in self.layers])
+
+
+    def __getitem__(self, index):
+        """
+          Get an entry, fiber or slice of the tensor
+        """
+
+        i, j, k = index
+        if not isinstance(k, slice):
+            return self.layers[k][i, j]
+
+        entries = [self.layers[layer][i, j] for layer in range(0, self.shape[2])[k]]
+        if isinstance(i, slice) and isinstance(j, slice):
+            return SparseTensor(entries)
+        if isinstance(i, slice):
+            return csr_matrix(hstack(entries))
+        if isinstance(j, slice):
+            return csr_matrix(vstack(entries).transpose())
+        return numpy.array(entries)
+
+
+    def sumLayers(self, layers=None):
+        """
+          Get the sparse (CSR) M x N matrix of the sum over the layers of the tensor
+
+            @param  layers  The indices of the layers to sum (all layers if None)
+        """
+
+        layers = xrange(0, self.shape[2]) if layers is None else layers
+        total = csr_matrix(self.shape[:2], dtype=self.layers[0].dtype)
+        for k in layers:
+            total = total + self.layers[k]
+        return total
+
+
+    def sum(self):
+        return sum([layer.sum() for layer in self.layers])
+
+
+    def multiply(self, other):
+        """
+          Element-wise product with another tensor of the same shape
+        """
+
+        assert self.shape == other.shape
+        return SparseTensor([self.layers[k].multiply(other.layers[k]) for k in xrange(0, self.shape[2])])
+
+
+    def compose(self, other):
+        """
+          Composes two adjacency tensors along their shared intermediate nodes, i.e. an (M x S x K1) tensor and an
+          (S x N x K2) tensor give an (M x N x (K1 + K2)) tensor. Intermediate node i connects row r & column c when
+          both first layers are positive at (r, i) & (i, c), and each such node adds the layers of the first tensor at
+          (r, i) followed by the layers of the second tensor at (i, c). With B1 & B2 the boolean patterns of the first
+          layers, this is (T1_k o B1) * B2 for the first K1 layers, and B1 * (T2_k o B2) for the remaining layers.
+        """
+
+        assert self.shape[1] == other.shape[0]
+
+        firstMask, otherMask = self.__getMask(self.layers[0]), self.__getMask(other.layers[0])
+        return SparseTensor(
+            [layer.multiply(firstMask) * otherMask for layer in self.layers] +
+            [firstMask * layer.multiply(otherMask) for layer in other.layers]
+        )
+
+
+    @staticmethod
+    def __getMask(layer):
+        """
+          Get the boolean pattern of the positive entries of a layer, as a CSR matrix of ones
+        """
+
+        mask = csr_matrix(layer, copy=True)
+        mask.data = (mask.data > 0).astype(mask.dtype)
+        mask.eliminate_zeros()
+        return mask
+
+
+    def __add__(self, other):
+        assert self.shape == other.shape
+        return SparseTensor([self.layers[k] + other.layers[k] for k in xrange(0, self.shape[2])])
+
+
+    def __sub__(self, other):
+        assert self.shape == other.shape
+        return SparseTensor([self.layers[k] - other.layers[k] for k in xrange(0, self.shape[2])])
+
+
+    def __mul__(self, scalar):
+        return SparseTensor([layer * scalar for layer in self.layers])
+
+    __rmul__ = __mul__
+
+
+    def __eq__(self, other):
+        if not isinstance(other, SparseTensor) or self.shape != other.shape:
+            return False
+        return all([(self.layers[k] != other.layers[k]).nnz == 0 for k in xrange(0, self.shape[2])])
+
+
+    def __ne__(self, other):
+        return not self == other
+
+
+    @property
+    def nnz(self):
+        return sum([layer.nnz for layer in self.layers])
@@ -1,4 +1,5 @@
 import os
+from experiment.real.four_area.helper.MetaPathHelper import prepareSharedMetaPaths
 from experiment.real.four_area.pathsim_experiments import AggregateAuthorsExperiment
 from experiment.real.four_area.pathsim_experiments.authors import AuthorsNeighborSimAbsPPAExperiment,\
     AuthorsNeighborSimPPAExperiment, AuthorsNeighborSimCPAPPAExperiment, AuthorsPathSimAPCPAExperiment,\
@@ -7,6 +8,11 @@ from experiment.real.four_area.pathsim_experiments.authors import AuthorsNeighbo
 
 __author__ = 'jontedesco'
 
+# Compute the meta path matrices of all experiments at once, sharing their common sub-paths
+prepareSharedMetaPaths(os.path.join('../../data', 'graphWithCitations'), [
+    'P-P-A', 'A-P-P-C', 'C-P-A-P-P-A', 'C-P-C', 'C-P-P-A', 'A-P-P-A', 'T-P-P-A'
+])
+
 # Standalone experiments
 print("Running NeighborSim PPA experiment:")
 citationCounts, publicationCounts = AuthorsNeighborSimPPAExperiment.run()
@@ -1,9 +1,16 @@
+import os
+from experiment.real.four_area.helper.MetaPathHelper import prepareSharedMetaPaths
 from experiment.real.four_area.pathsim_experiments.papers import PapersNeighborSimTPPExperiment,\
     PapersNeighborSimCPPExperiment, PapersNeighborSimAPPExperiment, PapersPathsimPAPExperiment,\
     PapersPathsimPCPExperiment, PapersPathsimPTPExperiment
 
 __author__ = 'jontedesco'
 
+# Compute the meta path matrices of all experiments at once, sharing their common sub-paths
+prepareSharedMetaPaths(os.path.join('../../data', 'graphWithCitations'), [
+    'A-P-P', 'C-P-P', 'T-P-P', 'P-A', 'A-P', 'P-C', 'C-P', 'P-T', 'T-P'
+])
+
 print("Running NeighborSim APP Experiment:")
 PapersNeighborSimAPPExperiment.run()
 print("Running NeighborSim CPP Experiment:")
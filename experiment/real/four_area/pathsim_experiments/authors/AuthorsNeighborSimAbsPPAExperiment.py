@@ -2,7 +2,8 @@ import cPickle
 import os
 import texttable
 from experiment.Experiment import Experiment
-from experiment.real.four_area.helper.MetaPathHelper import getMetaPathAdjacencyData, testAuthors, findMostSimilarNodes
+from experiment.real.four_area.helper.MetaPathHelper import getSharedMetaPathData, testAuthors, \
+    findMostSimilarNodes, loadSharedGraph
 from experiment.real.four_area.helper.PathSimHelper import getAbsNeighborSimScore
 
 __author__ = 'jontedesco'
@@ -36,8 +37,8 @@ def run(citationCounts, publicationCounts):
     )
 
     # Compute once, since these never change
-    graph, nodeIndex = cPickle.load(open(os.path.join('../../data', 'graphWithCitations')))
-    ppaAdjMatrix, extraData = getMetaPathAdjacencyData(graph, nodeIndex, ['term', 'paper', 'paper', 'author'])
+    graph, nodeIndex = loadSharedGraph(os.path.join('../../data', 'graphWithCitations'))
+    ppaAdjMatrix, extraData = getSharedMetaPathData(graph, nodeIndex, ['term', 'paper', 'paper', 'author'])
     extraData['fromNodes'] = extraData['toNodes']
     extraData['fromNodesIndex'] = extraData['toNodesIndex']
 
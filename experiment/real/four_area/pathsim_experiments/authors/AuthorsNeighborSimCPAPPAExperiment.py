@@ -2,7 +2,8 @@ import cPickle
 import os
 import texttable
 from experiment.Experiment import Experiment
-from experiment.real.four_area.helper.MetaPathHelper import findMostSimilarNodes, getMetaPathAdjacencyData, testAuthors
+from experiment.real.four_area.helper.MetaPathHelper import findMostSimilarNodes, getSharedMetaPathData, \
+    testAuthors, loadSharedGraph
 from experiment.real.four_area.helper.PathSimHelper import getNeighborSimScore
 
 __author__ = 'jontedesco'
@@ -37,8 +38,8 @@ def run(citationCounts, publicationCounts):
     )
 
     # Compute once, since these never change
-    graph, nodeIndex = cPickle.load(open(os.path.join('../../data', 'graphWithCitations')))
-    cppaAdjMatrix, extraData = getMetaPathAdjacencyData(
+    graph, nodeIndex = loadSharedGraph(os.path.join('../../data', 'graphWithCitations'))
+    cppaAdjMatrix, extraData = getSharedMetaPathData(
         graph, nodeIndex, ['conference', 'paper', 'author', 'paper', 'paper', 'author']
     )
     extraData['fromNodes'] = extraData['toNodes']
@@ -2,7 +2,8 @@ import cPickle
 import os
 import texttable
 from experiment.Experiment import Experiment
-from experiment.real.four_area.helper.MetaPathHelper import findMostSimilarNodes, getMetaPathAdjacencyData, testAuthors
+from experiment.real.four_area.helper.MetaPathHelper import findMostSimilarNodes, getSharedMetaPathData, \
+    testAuthors, loadSharedGraph
 from experiment.real.four_area.helper.PathSimHelper import getNeighborSimScore
 
 __author__ = 'jontedesco'
@@ -37,9 +38,9 @@ def run(citationCounts, publicationCounts):
     )
 
     # Compute once, since these never change
-    graph, nodeIndex = cPickle.load(open(os.path.join('../../data', 'graphWithCitations')))
-    cpcAdjMatrix, extraData = getMetaPathAdjacencyData(graph, nodeIndex, ['conference', 'paper', 'conference'])
-    cppaAdjMatrix, extraData = getMetaPathAdjacencyData(graph, nodeIndex, ['conference', 'paper', 'paper', 'author'])
+    graph, nodeIndex = loadSharedGraph(os.path.join('../../data', 'graphWithCitations'))
+    cpcAdjMatrix, extraData = getSharedMetaPathData(graph, nodeIndex, ['conference', 'paper', 'conference'])
+    cppaAdjMatrix, extraData = getSharedMetaPathData(graph, nodeIndex, ['conference', 'paper', 'paper', 'author'])
     cpcppaAdjMatrix = cpcAdjMatrix * cppaAdjMatrix
     extraData['fromNodes'] = extraData['toNodes']
     extraData['fromNodesIndex'] = extraData['toNodesIndex']
@@ -2,10 +2,11 @@ import cPickle
 from collections import defaultdict
 import os
 import operator
+import numpy
 import texttable
 from experiment.Experiment import Experiment
-from experiment.real.four_area.helper.MetaPathHelper import getMetaPathAdjacencyData, testAuthors, findMostSimilarNodes
-from experiment.real.four_area.helper.PathSimHelper import getNeighborSimScore
+from experiment.real.four_area.helper.MetaPathHelper import getSharedMetaPathData, testAuthors, loadSharedGraph
+from experiment.real.four_area.helper.PathSimHelper import getNeighborSimGramMatrix, getNeighborSimScores
 
 __author__ = 'jontedesco'
 
@@ -14,11 +15,9 @@ class AuthorsNeighborSimPPAExperiment(Experiment):
       Runs some experiments with NeighborSim on author similarity for the 'four area' dataset
     """
 
-    def runFor(self, author, adjMatrix, extraData, citationCounts, publicationCounts):
+    def runFor(self, author, mostSimilar, similarityScores, citationCounts, publicationCounts):
         print("Running for %s..." % author)
 
-        # Find the top 10 most similar nodes to some given node
-        mostSimilar, similarityScores = findMostSimilarNodes(adjMatrix, author, extraData, method=getNeighborSimScore)
         self.output('Most Similar to "%s":' % author)
         mostSimilarTable = texttable.Texttable()
         rows = [['Author', 'Score', 'Citations', 'Publications']]
@@ -39,11 +38,14 @@ def run():
     )
 
     # Compute once, since these never change
-    graph, nodeIndex = cPickle.load(open(os.path.join('../../data', 'graphWithCitations')))
-    ppaAdjMatrix, extraData = getMetaPathAdjacencyData(graph, nodeIndex, ['paper', 'paper', 'author'])
+    graph, nodeIndex = loadSharedGraph(os.path.join('../../data', 'graphWithCitations'))
+    ppaAdjMatrix, extraData = getSharedMetaPathData(graph, nodeIndex, ['paper', 'paper', 'author'])
     extraData['fromNodes'] = extraData['toNodes']
     extraData['fromNodesIndex'] = extraData['toNodesIndex']
 
+    # Score authors by lookups in the Gram matrix of the projection, rather than by taking its columns for every pair
+    ppaGramMatrix = getNeighborSimGramMatrix(ppaAdjMatrix)
+
     # Read paper citation counts
     paperCitationsFile = open(os.path.join('../../data', 'paperCitationCounts'))
     paperCitationCounts = {}
@@ -68,8 +70,19 @@ def run():
     with open(os.path.join('../../data', 'authorCitationCounts'), 'w') as outputFile:
         map(lambda (author, count): outputFile.write('%d: %s\n' % (int(count), author)), citationCountsList)
 
-    for testAuthor in testAuthors:
-        experiment.runFor(testAuthor, ppaAdjMatrix, extraData, citationCounts, publicationCounts)
+    # Score the test authors against all authors at once
+    toNodes, toNodesIndex = extraData['toNodes'], extraData['toNodesIndex']
+    testScores = getNeighborSimScores(
+        ppaGramMatrix.diagonal(), [toNodesIndex[testAuthor] for testAuthor in testAuthors], ppaGramMatrix
+    )
+
+    for i in xrange(0, len(testAuthors)):
+
+        # Find the top 10 most similar authors from the non-zero scores, including the test author itself
+        similarityScores = {toNodes[j]: testScores[i, j] for j in numpy.flatnonzero(testScores[i] > 0)}
+        mostSimilar = sorted(similarityScores.iteritems(), key=operator.itemgetter(1))
+        mostSimilar.reverse()
+        experiment.runFor(testAuthors[i], mostSimilar[:10], similarityScores, citationCounts, publicationCounts)
 
     return citationCounts, publicationCounts
 
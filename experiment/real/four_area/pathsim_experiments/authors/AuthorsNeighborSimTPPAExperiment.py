@@ -1,9 +1,11 @@
 import cPickle
 import os
+import operator
+import numpy
 import texttable
 from experiment.Experiment import Experiment
-from experiment.real.four_area.helper.MetaPathHelper import findMostSimilarNodes, getMetaPathAdjacencyData, testAuthors
-from experiment.real.four_area.helper.PathSimHelper import getNeighborSimScore
+from experiment.real.four_area.helper.MetaPathHelper import getSharedMetaPathData, testAuthors, loadSharedGraph
+from experiment.real.four_area.helper.PathSimHelper import getNeighborSimGramMatrix, getNeighborSimScores
 
 __author__ = 'jontedesco'
 
@@ -12,11 +14,9 @@ class AuthorsNeighborSimTPPAExperiment(Experiment):
       Runs some experiments with NeighborSim on author similarity for the 'four area' dataset
     """
 
-    def runFor(self, author, adjMatrix, extraData, citationCounts, publicationCounts):
+    def runFor(self, author, mostSimilar, similarityScores, citationCounts, publicationCounts):
         print("Running for %s..." % author)
 
-        # Find the top 10 most similar nodes to some given node
-        mostSimilar, similarityScores = findMostSimilarNodes(adjMatrix, author, extraData, method = getNeighborSimScore)
         self.output('Most Similar to "%s":' % author)
         mostSimilarTable = texttable.Texttable()
         rows = [['Author', 'Score', 'Citations', 'Publications']]
@@ -36,10 +36,24 @@ def run(citationCounts, publicationCounts):
     )
 
     # Compute once, since these never change
-    graph, nodeIndex = cPickle.load(open(os.path.join('../../data', 'graphWithCitations')))
-    ppaAdjMatrix, extraData = getMetaPathAdjacencyData(graph, nodeIndex, ['term', 'paper', 'paper', 'author'])
+    graph, nodeIndex = loadSharedGraph(os.path.join('../../data', 'graphWithCitations'))
+    ppaAdjMatrix, extraData = getSharedMetaPathData(graph, nodeIndex, ['term', 'paper', 'paper', 'author'])
     extraData['fromNodes'] = extraData['toNodes']
     extraData['fromNodesIndex'] = extraData['toNodesIndex']
 
-    for testAuthor in testAuthors:
-        experiment.runFor(testAuthor, ppaAdjMatrix, extraData, citationCounts, publicationCounts)
+    # Inner products of authors' term counts, computed once for all test authors
+    ppaGramMatrix = getNeighborSimGramMatrix(ppaAdjMatrix)
+
+    # Score the test authors against all authors at once
+    toNodes, toNodesIndex = extraData['toNodes'], extraData['toNodesIndex']
+    testScores = getNeighborSimScores(
+        ppaGramMatrix.diagonal(), [toNodesIndex[testAuthor] for testAuthor in testAuthors], ppaGramMatrix
+    )
+
+    for i in xrange(0, len(testAuthors)):
+
+        # Find the top 10 most similar authors from the non-zero scores, including the test author itself
+        similarityScores = {toNodes[j]: testScores[i, j] for j in numpy.flatnonzero(testScores[i] > 0)}
+        mostSimilar = sorted(similarityScores.iteritems(), key=operator.itemgetter(1))
+        mostSimilar.reverse()
+        experiment.runFor(testAuthors[i], mostSimilar[:10], similarityScores, citationCounts, publicationCounts)
@@ -1,9 +1,10 @@
 import cPickle
 import os
-from scipy.sparse import lil_matrix
 import texttable
 from experiment.Experiment import Experiment
-from experiment.real.four_area.helper.MetaPathHelper import findMostSimilarNodes, getMetaPathAdjacencyData, testAuthors
+from experiment.real.four_area.helper.MetaPathHelper import findMostSimilarNodes, getMetaPathRowsData, testAuthors, \
+    loadSharedGraph
+from experiment.real.four_area.helper.PathSimHelper import getRowPathSimScore
 
 __author__ = 'jontedesco'
 
@@ -16,7 +17,10 @@ class AuthorsPathSimAPCPAExperiment(Experiment):
         print("Running for %s..." % author)
 
         # Find the top 10 most similar nodes to some given node
-        mostSimilar, similarityScores = findMostSimilarNodes(adjMatrix, author, extraData)
+        mostSimilar, similarityScores = findMostSimilarNodes(
+            adjMatrix, author, extraData, method=getRowPathSimScore,
+            diagonal=extraData['diagonal'], rowDiagonal=extraData['rowDiagonal']
+        )
         self.output('\nMost Similar to "%s":' % author)
         mostSimilarTable = texttable.Texttable()
         rows = [['Author', 'Score', 'Citations', 'Publications']]
@@ -41,16 +45,13 @@ def run(citationCounts, publicationCounts):
     )
 
     # Compute once, since these never change
-    graph, nodeIndex = cPickle.load(open(os.path.join('../../data', 'graphWithCitations')))
+    graph, nodeIndex = loadSharedGraph(os.path.join('../../data', 'graphWithCitations'))
 
-    # Compute APCPA adjacency matrix
-    apcAdjMatrix, extraData = getMetaPathAdjacencyData(graph, nodeIndex, ['author', 'paper', 'conference'], rows=True)
-    cpaAdjMatrix, data = getMetaPathAdjacencyData(graph, nodeIndex, ['conference', 'paper', 'author'])
-    apcpaAdjMatrix = lil_matrix(apcAdjMatrix * cpaAdjMatrix)
-
-    # Correct the toNodes content in extraData
-    extraData['toNodes'] = data['toNodes']
-    extraData['toNodesIndex'] = data['toNodesIndex']
+    # Compute only the APCPA rows of the test authors, with the diagonal entries needed to normalize them
+    apcpaAdjMatrix, extraData = getMetaPathRowsData(
+        graph, nodeIndex, ['author', 'paper', 'conference', 'paper', 'author'], testAuthors,
+        matrixUtility=graph.graph['metaPathCompiler'].matrixUtility
+    )
 
     for testAuthor in testAuthors:
         experiment.runFor(testAuthor, apcpaAdjMatrix, extraData, citationCounts, publicationCounts)
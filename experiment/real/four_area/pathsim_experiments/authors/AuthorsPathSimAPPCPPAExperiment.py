@@ -3,7 +3,8 @@ import os
 from scipy.sparse import lil_matrix
 import texttable
 from experiment.Experiment import Experiment
-from experiment.real.four_area.helper.MetaPathHelper import findMostSimilarNodes, getMetaPathAdjacencyData, testAuthors
+from experiment.real.four_area.helper.MetaPathHelper import findMostSimilarNodes, getSharedMetaPathData, \
+    testAuthors, loadSharedGraph
 
 __author__ = 'jontedesco'
 
@@ -38,10 +39,10 @@ def run(citationCounts, publicationCounts):
     )
 
     # Compute once, since these never change
-    graph, nodeIndex = cPickle.load(open(os.path.join('../../data', 'graphWithCitations')))
+    graph, nodeIndex = loadSharedGraph(os.path.join('../../data', 'graphWithCitations'))
 
     # Compute APCPA adjacency matrix
-    apcAdjMatrix, extraData = getMetaPathAdjacencyData(graph, nodeIndex, ['author', 'paper', 'paper', 'conference'], rows=True)
+    apcAdjMatrix, extraData = getSharedMetaPathData(graph, nodeIndex, ['author', 'paper', 'paper', 'conference'], rows=True)
     cpaAdjMatrix = apcAdjMatrix.transpose()
     apcpaAdjMatrix = lil_matrix(apcAdjMatrix * cpaAdjMatrix)
 
@@ -3,7 +3,8 @@ import os
 import texttable
 from experiment.Experiment import Experiment
 from experiment.real.four_area.helper.PathSimHelper import getNeighborSimScore
-from experiment.real.four_area.helper.MetaPathHelper import findMostSimilarNodes, testConferences, getMetaPathAdjacencyData
+from experiment.real.four_area.helper.MetaPathHelper import findMostSimilarNodes, testConferences, \
+    getMetaPathAdjacencyData, loadGraph
 
 __author__ = 'jontedesco'
 
@@ -43,7 +44,7 @@ def run():
     )
 
     # Compute once, since these never change
-    graph, nodeIndex = cPickle.load(open(os.path.join('..', '..', 'data', 'graphWithCitations')))
+    graph, nodeIndex = loadGraph(os.path.join('..', '..', 'data', 'graphWithCitations'))
     cppaAdjMatrix, extraData = getMetaPathAdjacencyData(
         graph, nodeIndex, ['term', 'paper', 'paper', 'conference']
     )
@@ -1,8 +1,8 @@
-import cPickle
 import os
 import texttable
 from experiment.Experiment import Experiment
-from experiment.real.four_area.helper.MetaPathHelper import getMetaPathAdjacencyData, findMostSimilarNodes, testPapers
+from experiment.real.four_area.helper.MetaPathHelper import getSharedMetaPathData, findMostSimilarNodes, \
+    testPapers, loadSharedGraph
 from experiment.real.four_area.helper.PathSimHelper import getNeighborSimScore
 
 __author__ = 'jontedesco'
@@ -30,8 +30,8 @@ def run():
         None, 'Most Similar CPP NeighborSim Authors', outputFilePath='results/papers/cppNeighborSim')
 
     # Compute once, since these never change
-    graph, nodeIndex = cPickle.load(open(os.path.join('../../data', 'graphWithCitations')))
-    cppAdjMatrix, extraData = getMetaPathAdjacencyData(graph, nodeIndex, ['conference', 'paper', 'paper'])
+    graph, nodeIndex = loadSharedGraph(os.path.join('../../data', 'graphWithCitations'))
+    cppAdjMatrix, extraData = getSharedMetaPathData(graph, nodeIndex, ['conference', 'paper', 'paper'])
     extraData['fromNodes'] = extraData['toNodes']
     extraData['fromNodesIndex'] = extraData['toNodesIndex']
 
@@ -1,9 +1,8 @@
-import cPickle
 import os
-from scipy.sparse import lil_matrix
 import texttable
 from experiment.Experiment import Experiment
-from experiment.real.four_area.helper.MetaPathHelper import findMostSimilarNodes, getMetaPathAdjacencyData, testPapers
+from experiment.real.four_area.helper.MetaPathHelper import getSharedMetaPathData, testPapers, loadSharedGraph
+from experiment.real.four_area.helper.PathSimHelper import findAllMostSimilarNodes
 
 __author__ = 'jontedesco'
 
@@ -12,11 +11,9 @@ class PapersPathSimPCPExperiment(Experiment):
       Runs some experiments with PathSim on author similarity for the 'four area' dataset
     """
 
-    def runFor(self, paper, adjMatrix, extraData):
+    def runFor(self, paper, mostSimilar):
         print("Running for %s..." % paper)
 
-        # Find the top 10 most similar nodes to some given node
-        mostSimilar, similarityScores = findMostSimilarNodes(adjMatrix, paper, extraData)
         self.output('\nMost Similar to "%s":' % paper)
         mostSimilarTable = texttable.Texttable()
         rows = [['Paper', 'Score']]
@@ -29,18 +26,21 @@ def run():
         None, 'Most Similar PCP PathSim Papers', outputFilePath='results/papers/pcpPathSim')
 
     # Compute once, since these never change
-    graph, nodeIndex = cPickle.load(open(os.path.join('../../data', 'graphWithCitations')))
+    graph, nodeIndex = loadSharedGraph(os.path.join('../../data', 'graphWithCitations'))
 
     # Compute APCPA adjacency matrix
-    pcAdjMatrix, extraData = getMetaPathAdjacencyData(graph, nodeIndex, ['paper', 'conference'], rows=True)
-    cpAdjMatrix, data = getMetaPathAdjacencyData(graph, nodeIndex, ['conference', 'paper'])
-    pcpAdjMatrix = lil_matrix(pcAdjMatrix * cpAdjMatrix)
+    pcAdjMatrix, extraData = getSharedMetaPathData(graph, nodeIndex, ['paper', 'conference'], rows=True)
+    cpAdjMatrix, data = getSharedMetaPathData(graph, nodeIndex, ['conference', 'paper'])
+    pcpAdjMatrix = pcAdjMatrix * cpAdjMatrix
 
     # Correct the toNodes content in extraData
     extraData['toNodes'] = data['toNodes']
     extraData['toNodesIndex'] = data['toNodesIndex']
 
+    # Find the top 10 most similar nodes to every paper at once
+    mostSimilarNodes = findAllMostSimilarNodes(pcpAdjMatrix, extraData)
+
     for testPaper in testPapers:
-        experiment.runFor(testPaper, pcpAdjMatrix, extraData)
+        experiment.runFor(testPaper, mostSimilarNodes[testPaper])
 
 if __name__ == '__main__': run()
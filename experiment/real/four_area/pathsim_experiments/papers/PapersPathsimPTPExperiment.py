@@ -1,9 +1,8 @@
-import cPickle
 import os
-from scipy.sparse import lil_matrix
 import texttable
 from experiment.Experiment import Experiment
-from experiment.real.four_area.helper.MetaPathHelper import findMostSimilarNodes, getMetaPathAdjacencyData, testPapers
+from experiment.real.four_area.helper.MetaPathHelper import getSharedMetaPathData, testPapers, loadSharedGraph
+from experiment.real.four_area.helper.PathSimHelper import findAllMostSimilarNodes
 
 __author__ = 'jontedesco'
 
@@ -12,11 +11,9 @@ class PapersPathSimPTPExperiment(Experiment):
       Runs some experiments with PathSim on author similarity for the 'four area' dataset
     """
 
-    def runFor(self, paper, adjMatrix, extraData):
+    def runFor(self, paper, mostSimilar):
         print("Running for %s..." % paper)
 
-        # Find the top 10 most similar nodes to some given node
-        mostSimilar, similarityScores = findMostSimilarNodes(adjMatrix, paper, extraData)
         self.output('\nMost Similar to "%s":' % paper)
         mostSimilarTable = texttable.Texttable()
         rows = [['Paper', 'Score']]
@@ -29,18 +26,21 @@ def run():
         None, 'Most Similar PCP PathSim Papers', outputFilePath='results/papers/ptpPathSim')
 
     # Compute once, since these never change
-    graph, nodeIndex = cPickle.load(open(os.path.join('../../data', 'graphWithCitations')))
+    graph, nodeIndex = loadSharedGraph(os.path.join('../../data', 'graphWithCitations'))
 
     # Compute APCPA adjacency matrix
-    ptAdjMatrix, extraData = getMetaPathAdjacencyData(graph, nodeIndex, ['paper', 'term'], rows=True)
-    tpAdjMatrix, data = getMetaPathAdjacencyData(graph, nodeIndex, ['term', 'paper'])
-    ptpAdjMatrix = lil_matrix(ptAdjMatrix * tpAdjMatrix)
+    ptAdjMatrix, extraData = getSharedMetaPathData(graph, nodeIndex, ['paper', 'term'], rows=True)
+    tpAdjMatrix, data = getSharedMetaPathData(graph, nodeIndex, ['term', 'paper'])
+    ptpAdjMatrix = ptAdjMatrix * tpAdjMatrix
 
     # Correct the toNodes content in extraData
     extraData['toNodes'] = data['toNodes']
     extraData['toNodesIndex'] = data['toNodesIndex']
 
+    # Find the top 10 most similar nodes to every paper at once
+    mostSimilarNodes = findAllMostSimilarNodes(ptpAdjMatrix, extraData)
+
     for testPaper in testPapers:
-        experiment.runFor(testPaper, ptpAdjMatrix, extraData)
+        experiment.runFor(testPaper, mostSimilarNodes[testPaper])
 
 if __name__ == '__main__': run()
\ No newline at end of file
@@ -4,7 +4,7 @@ import texttable
 from experiment.Experiment import Experiment
 from experiment.real.four_area.helper.ShapeSimHelper import getShapeSimScore
 from experiment.real.four_area.helper.MetaPathHelper import findMostSimilarNodes, testAuthors, \
-    getMetaPathAdjacencyTensorData
+    getMetaPathAdjacencyTensorData, loadGraph
 
 __author__ = 'jontedesco'
 
@@ -43,7 +43,7 @@ def run(citationCounts, publicationCounts):
     )
 
     # Compute once, since these never change
-    graph, nodeIndex = cPickle.load(open(os.path.join('../data', 'graphWithCitations')))
+    graph, nodeIndex = loadGraph(os.path.join('../data', 'graphWithCitations'))
     cppaAdjTensor, extraData = getMetaPathAdjacencyTensorData(
         graph, nodeIndex, ['conference', 'paper', 'paper', 'author']
     )
@@ -4,7 +4,7 @@ import texttable
 from experiment.Experiment import Experiment
 from experiment.real.four_area.helper.ShapeSimHelper import getShapeSimScore
 from experiment.real.four_area.helper.MetaPathHelper import findMostSimilarNodes, getMetaPathAdjacencyTensorData, \
-    testConferences
+    testConferences, loadGraph
 
 __author__ = 'jontedesco'
 
@@ -44,7 +44,7 @@ def run(conferenceCitations, conferencePublications):
     )
 
     # Compute once, since these never change
-    graph, nodeIndex = cPickle.load(open(os.path.join('..', 'data', 'graphWithCitations')))
+    graph, nodeIndex = loadGraph(os.path.join('..', 'data', 'graphWithCitations'))
     cppaAdjTensor, extraData = getMetaPathAdjacencyTensorData(
         graph, nodeIndex, ['term', 'paper', 'paper', 'conference']
     )
@@ -1,3 +1,7 @@
+import hashlib
+from scipy.sparse import csr_matrix
+from src.model.edge.ReversedEdgeType import ReversedEdgeType
+
 __author__ = 'jontedesco'
 
 class Graph(object):
@@ -5,6 +9,202 @@ class Graph(object):
       Abstract interface for interacting with a graph instance (directed graph)
     """
 
+    def __init__(self):
+        self._clearCaches()
+
+
+    def _clearCaches(self):
+        """
+          Clears the node indices, relation matrices & fingerprint built from this graph, which must happen whenever it
+          changes in a way that is not tracked incrementally
+        """
+        self.__nodeIndices = {}
+        self.__relationMatrices = {}
+        self.__fingerprint = None
+
+
+    def _addToNodeIndices(self, nodes):
+        """
+          Clears the relation matrices built from this graph after nodes or edges were added, but keeps node indices,
+          appending any new nodes to them. Node orderings then only grow, so that matrices indexed by them can be
+          updated in place rather than rebuilt.
+
+            @param  nodes   The nodes added to the graph, in the order they were added
+        """
+
+        if not hasattr(self, '_Graph__nodeIndices'):
+            self._clearCaches()
+
+        self.__relationMatrices = {}
+        for node in nodes:
+            if node.__class__ in self.__nodeIndices:
+                typeNodes, typeNodesIndex = self.__nodeIndices[node.__class__]
+                if node not in typeNodesIndex:
+                    typeNodesIndex[node] = len(typeNodes)
+                    typeNodes.append(node)
+
+
+    def _addToFingerprint(self, nodes, edges):
+        """
+          Adds nodes & edges added to this graph to its fingerprint, if it was already computed
+
+            @param  nodes   The nodes added to the graph
+            @param  edges   The (source, destination, edge type name) tuples of the edges added to the graph
+        """
+
+        if getattr(self, '_Graph__fingerprint', None) is None:
+            return
+
+        for node in nodes:
+            self.__fingerprint += self.getElementHash('node', self.getNodeKey(node))
+        for source, destination, edgeTypeName in edges:
+            self.__fingerprint += self.getElementHash(
+                'edge', self.getNodeKey(source), self.getNodeKey(destination), edgeTypeName
+            )
+        self.__fingerprint %= 2 ** 64
+
+
+    def fingerprint(self):
+        """
+          Get the content fingerprint of this graph, identifying its (typed) nodes and edges, which caches of artifacts
+          derived from the graph can check against the graph in hand. The fingerprint is the sum (modulo 2^64) of the
+          hashes of each node & edge, so it does not depend on the order in which nodes & edges were added, and is kept
+          up to date as nodes & edges are added. It is computed from scratch (once) after nodes or edges are removed,
+          and stored with the graph when it is pickled.
+
+            @return The fingerprint, as a hexadecimal string
+        """
+
+        if getattr(self, '_Graph__fingerprint', None) is None:
+            fingerprint = 0
+            for source in self.getNodes():
+                sourceKey = self.getNodeKey(source)
+                fingerprint += self.getElementHash('node', sourceKey)
+                for destination in set(self.getSuccessors(source)):
+                    destinationKey = self.getNodeKey(destination)
+                    for attributes in (self.getEdgeData(source, destination) or {}).itervalues():
+                        edgeTypeName = attributes.get('type') if attributes else None
+                        fingerprint += self.getElementHash('edge', sourceKey, destinationKey, edgeTypeName)
+            self.__fingerprint = fingerprint % 2 ** 64
+
+        return '%016x' % self.__fingerprint
+
+
+    @staticmethod
+    def getNodeKey(node):
+        """
+          Get the key identifying a node in graph fingerprints, i.e. its type & id for graph objects, or the node itself
+        """
+
+        if hasattr(node, 'id'):
+            return node.__class__.__name__, node.id
+        return node
+
+
+    @staticmethod
+    def getElementHash(*element):
+        """
+          Get the 64-bit hash of an element of a graph (i.e. a tuple naming a node or edge), which is stable across
+          processes & runs, unlike the builtin hash
+        """
+
+        return int(hashlib.md5(repr(element)).hexdigest()[:16], 16)
+
+
+    def getNodeIndex(self, nodeType):
+        """
+          Get the nodes of exactly some type (excluding subclasses) in a canonical order, shared by the rows & columns
+          of all relation matrices of this graph, along with an index from each of these nodes to its position
+
+            @return A tuple of the list of nodes, and a dictionary of node to index
+        """
+
+        if not hasattr(self, '_Graph__nodeIndices'):
+            self._clearCaches()
+
+        if nodeType not in self.__nodeIndices:
+            nodes = [node for node in self.getNodes() if node.__class__ == nodeType]
+            self.__nodeIndices[nodeType] = (nodes, {nodes[i]: i for i in xrange(0, len(nodes))})
+        return self.__nodeIndices[nodeType]
+
+
+    def getRelationMatrix(self, sourceType, destinationType, edgeType=None, symmetric=False):
+        """
+          Get the sparse (CSR) relation matrix from the nodes of one type to the nodes of another, where entries are
+          the number of edges of some type between nodes. Follows the same rules as meta path enumeration, i.e. self
+          loops are skipped, and edges must exist in both directions when enforcing symmetry. Relation matrices are
+          cached until the graph changes.
+
+            @param  edgeType    The class of edges to count (any edge if None), or a reversed edge type to count edges
+                                of that class from destination to source
+            @param  symmetric   Whether or not edges must also exist in the opposite direction (of the same class)
+        """
+
+        if not hasattr(self, '_Graph__relationMatrices'):
+            self._clearCaches()
+
+        key = (sourceType, edgeType, destinationType, symmetric)
+        if key not in self.__relationMatrices:
+
+            if isinstance(edgeType, ReversedEdgeType):
+                reverseMatrix = self.getRelationMatrix(destinationType, sourceType, edgeType.edgeType, symmetric)
+                relationMatrix = csr_matrix(reverseMatrix.transpose())
+
+            else:
+                sourceNodes, sourceNodesIndex = self.getNodeIndex(sourceType)
+                destinationNodes, destinationNodesIndex = self.getNodeIndex(destinationType)
+
+                data, row, col = [], [], []
+                for node in sourceNodes:
+                    for neighbor, numberOfEdges in self.getRelationCounts(node, destinationType, edgeType, symmetric):
+                        row.append(sourceNodesIndex[node])
+                        col.append(destinationNodesIndex[neighbor])
+                        data.append(numberOfEdges)
+
+                relationMatrix = csr_matrix((data, (row, col)), shape=(len(sourceNodes), len(destinationNodes)))
+
+            self.__relationMatrices[key] = relationMatrix
+
+        return self.__relationMatrices[key]
+
+
+    def getRelationCounts(self, node, destinationType, edgeType=None, symmetric=False):
+        """
+          Get the row of some node in a relation matrix (see getRelationMatrix), without building the matrix
+
+            @return The list of (neighbor, number of edges) pairs with non-zero counts
+        """
+
+        if isinstance(edgeType, ReversedEdgeType):
+            neighbors, edgeType, isReversed = self.getPredecessors(node), edgeType.edgeType, True
+        else:
+            neighbors, isReversed = self.getSuccessors(node), False
+
+        relationCounts = []
+        for neighbor in neighbors:
+            if neighbor == node or neighbor.__class__ != destinationType:
+                continue
+            source, destination = (neighbor, node) if isReversed else (node, neighbor)
+            if symmetric and self.__countEdges(destination, source, edgeType) == 0:
+                continue
+            numberOfEdges = self.__countEdges(source, destination, edgeType)
+            if numberOfEdges > 0:
+                relationCounts.append((neighbor, numberOfEdges))
+
+        return relationCounts
+
+
+    def __countEdges(self, source, destination, edgeType):
+        """
+          Count the edges of some class (or of any class if None) from one node to another
+        """
+
+        if edgeType is None:
+            return self.getNumberOfEdges(source, destination)
+
+        edgeData = self.getEdgeData(source, destination) or {}
+        return len([1 for attributes in edgeData.itervalues() if attributes.get('type') == edgeType.__name__])
+
     def addNode(self, node):
         """
           Add a node to this graph
@@ -18,11 +18,18 @@ class NetworkXGraph(Graph):
 
     def addEdge(self, source, destination, attribute = None):
         attributeDictionary = None if attribute is None else attribute.toDict()
+        newNodes = [node for node in [source, destination] if not self.graph.has_node(node)]
         self.graph.add_edge(source, destination, attr_dict = attributeDictionary)
+        self._addToNodeIndices(newNodes)
+        edgeTypeName = None if attributeDictionary is None else attributeDictionary.get('type')
+        self._addToFingerprint(newNodes, [(source, destination, edgeTypeName)])
 
     def addNode(self, node, attribute = None):
         attributeDictionary = None if attribute is None else attribute.toDict()
+        newNodes = [] if self.graph.has_node(node) else [node]
         self.graph.add_node(node, attr_dict = attributeDictionary)
+        self._addToNodeIndices(newNodes)
+        self._addToFingerprint(newNodes, [])
 
     def getEdges(self, nodes = list()):
         return self.graph.edges(nodes)
@@ -31,9 +38,11 @@ class NetworkXGraph(Graph):
         return self.graph.nodes()
 
     def removeEdge(self, source, destination):
+        self._clearCaches()
         return self.graph.remove_edge(source, destination)
 
     def removeNode(self, node):
+        self._clearCaches()
         return self.graph.remove_node(node)
 
     def hasNode(self, node):
@@ -56,6 +56,9 @@ class ArnetMinerDataImporter(Thread):
             self.logger.info("Building ArnetMiner graph data")
             graph = self.buildGraph(parsedData)
 
+            # Fingerprint the graph before pickling, so that the fingerprint is stored with it
+            graph.fingerprint()
+
             self.logger.info("Pickling ArnetMiner graph data to file")
             with open(self.outputPath, 'w') as outputFile:
                 cPickle.dump(graph, outputFile)
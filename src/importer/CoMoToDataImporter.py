@@ -72,6 +72,9 @@ class CoMoToDataImporter(Thread):
         self.logger.info("Building CoMoTo graph data")
         graph = self.buildGraph(coMoToData)
 
+        # Fingerprint the graph before pickling, so that the fingerprint is stored with it
+        graph.fingerprint()
+
         self.logger.info("Pickling CoMoTo graph data to file")
         with open(self.outputPath, 'w') as outputFile:
             cPickle.dump(graph, outputFile)
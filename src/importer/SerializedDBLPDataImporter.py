@@ -56,6 +56,9 @@ class SerializedDBLPDataImporter(Thread):
             self.logger.info("Parsing input edge content")
             graph = self.parseEdgeContent(partialGraph, nodeIndex)
 
+            # Fingerprint the graph before pickling, so that the fingerprint is stored with it
+            graph.fingerprint()
+
             self.logger.info("Pickling graph data to file")
             with open(self.outputPath, 'w') as outputFile:
                 cPickle.dump(graph, outputFile)
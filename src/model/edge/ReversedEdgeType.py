@@ -0,0 +1,10 @@
+from collections import namedtuple
+
+__author__ = 'jontedesco'
+
+
+class ReversedEdgeType(namedtuple('ReversedEdgeType', ['edgeType'])):
+    """
+      Names an edge type traversed against the direction of its edges in a meta path, i.e. the 'cited by' direction of
+      citations, ReversedEdgeType(Citation)
+    """
@@ -1,6 +1,7 @@
 import operator
 from src.similarity.SimilarityStrategy import SimilarityStrategy
 from src.util.EdgeBasedMetaPathUtility import EdgeBasedMetaPathUtility
+from src.util.MetaPathNeighborIndex import MetaPathNeighborIndex
 
 __author__ = 'jontedesco'
 
@@ -43,7 +44,7 @@ class MetaPathSimilarityStrategy(SimilarityStrategy):
             number = self.n
 
         # Get similarity scores for all entries
-        reachableNodes = self.metaPathUtility.findMetaPathNeighbors(self.graph, source, self.metaPath)
+        reachableNodes = MetaPathNeighborIndex.getInstance(self.graph, self.metaPath).getNeighbors(source)
         for reachableNode in reachableNodes:
             self.similarityScores[source][reachableNode] = self.findSimilarityScore(source, reachableNode)
 
@@ -1,4 +1,5 @@
 from collections import defaultdict
+import numpy
 
 __author__ = 'jontedesco'
 
@@ -38,3 +39,33 @@ class SimilarityStrategy(object):
           maximum score for any destination
         """
         return [self.findSimilarityScore(source, destination) for destination in destinations]
+
+
+    def findMostSimilarNodesBatch(self, sources, k=None):
+        """
+          Find the most similar nodes to each of several nodes, which strategies override to share their setup work
+          across all sources (by default, simply finds the most similar nodes to each source in turn)
+
+            @param  sources The nodes for which to find the most similar other nodes
+            @param  k       The number of similar nodes to find for each source (the strategy's default if None)
+            @return The list of the most similar nodes to each source, in the order of the sources
+        """
+
+        if k is None:
+            return [self.findMostSimilarNodes(source) for source in sources]
+        return [self.findMostSimilarNodes(source, k) for source in sources]
+
+
+    def findSimilarityScoresMatrix(self, sources, destinations):
+        """
+          Find the similarity scores between each of several sources and each of several destinations, which strategies
+          override to compute all scores at once (by default, simply finds the score of each pair in turn)
+
+            @return The dense len(sources) x len(destinations) array of scores
+        """
+
+        scores = numpy.zeros((len(sources), len(destinations)))
+        for i in xrange(0, len(sources)):
+            for j in xrange(0, len(destinations)):
+                scores[i, j] = self.findSimilarityScore(sources[i], destinations[j])
+        return scores
@@ -0,0 +1,124 @@
+import operator
+import random
+import numpy
+from src.similarity.SimilarityStrategy import SimilarityStrategy
+from src.similarity.heterogeneous.PathSimStrategy import PathSimStrategy
+
+__author__ = 'jontedesco'
+
+class ApproximatePathSimStrategy(PathSimStrategy):
+    """
+      PathSim strategy for very large graphs, where the number of paths between the source and other nodes is estimated
+      with typed random walks from the source rather than counted exactly. The normalizing cycle counts (the diagonal of
+      the meta path matrix) are still exact, since they only need the half path matrix, so the PathSim score of each
+      node is an estimate with a confidence interval.
+
+      Walks continue until the top scores are known to within an explicit error budget, or the top nodes are separated
+      by their confidence intervals, which is far fewer walks than exact evaluation needs through hub nodes.
+    """
+
+    def __init__(self, graph, metaPath=None, symmetric=False, scoreError=0.01, confidence=0.95, minWalks=1000,
+                 maxWalks=1000000, randomState=None):
+        """
+          Constructs an approximate PathSim strategy
+
+            @param  scoreError  The error budget, i.e. the largest confidence interval half width of returned scores
+            @param  confidence  The confidence level of score intervals
+            @param  minWalks    The number of walks taken between checks of the stopping rule
+            @param  maxWalks    The largest number of walks taken from any source
+            @param  randomState Optional random number generator (i.e. random.Random(seed)), for reproducible scores
+        """
+
+        super(ApproximatePathSimStrategy, self).__init__(graph, metaPath, symmetric)
+
+        self.scoreError = scoreError
+        self.confidence = confidence
+        self.minWalks = minWalks
+        self.maxWalks = maxWalks
+        self.randomState = random.Random() if randomState is None else randomState
+
+
+    def findSimilarityScore(self, source, destination):
+        """
+          Estimate the PathSim score between two nodes
+        """
+
+        for node, score, halfWidth in self.estimateSimilarityScores(source):
+            if node == destination:
+                return score
+        return 0
+
+
+    def findMostSimilarNodes(self, source, number=None, conserveMemory=False):
+        """
+          Find the nodes with the highest estimated PathSim scores to some node
+        """
+
+        return [node for node, score, halfWidth in self.estimateSimilarityScores(source, number)]
+
+
+    def findMostSimilarNodesBatch(self, sources, k=None):
+        """
+          Find the nodes with the highest estimated PathSim scores to each of several nodes, with walks from each source
+        """
+
+        return SimilarityStrategy.findMostSimilarNodesBatch(self, sources, k)
+
+
+    def findSimilarityScoresMatrix(self, sources, destinations):
+        """
+          Estimate the PathSim scores between each of several sources and destinations, with walks from each source
+        """
+
+        scores = numpy.zeros((len(sources), len(destinations)))
+        for i in xrange(0, len(sources)):
+            sourceScores = dict([(node, score) for node, score, halfWidth in self.estimateSimilarityScores(sources[i])])
+            for j in xrange(0, len(destinations)):
+                scores[i, j] = sourceScores.get(destinations[j], 0)
+        return scores
+
+
+    def estimateSimilarityScores(self, source, number=None):
+        """
+          Estimate the PathSim scores of the nodes most similar to some node, with random walks until the scores of the
+          top nodes are within the error budget, or the top nodes are separated from the others by their intervals
+
+            @param  number  The number of top nodes whose scores must converge (all nodes reached if None)
+            @return The list of (node, score, confidence interval half width) of the top nodes, by decreasing score
+        """
+
+        self.prepare()
+        nodesIndex, diagonal = self.nodesIndex, self.metaPathDiagonal
+
+        def getScores(estimates):
+            scores = []
+            for node, (pathCount, halfWidth) in estimates.iteritems():
+                if node == source or node not in nodesIndex:
+                    continue
+                numCycles = float(diagonal[nodesIndex[source]] + diagonal[nodesIndex[node]])
+                if numCycles > 0:
+                    scores.append((node, 2.0 * pathCount / numCycles, 2.0 * halfWidth / numCycles))
+            scores.sort(key=operator.itemgetter(1), reverse=True)
+            return scores if number is None else scores[:number + 1]
+
+        def isConverged(estimates):
+            scores = getScores(estimates)
+            topScores = scores if number is None else scores[:number]
+            if topScores and all([halfWidth <= self.scoreError for node, score, halfWidth in topScores]):
+                return True
+
+            # The top nodes are known once the lowest bound among them is above the highest bound of the next node
+            if number is None or len(scores) <= number:
+                return False
+            lowestTopBound = min([score - halfWidth for node, score, halfWidth in topScores])
+            node, nextScore, nextHalfWidth = scores[number]
+            return lowestTopBound > nextScore + nextHalfWidth
+
+        # Paths are counted with symmetric edges only, as for exact PathSim scores
+        estimates = self.metaPathUtility.estimateMetaPathCountsFrom(
+            self.graph, source, self.metaPath, True, relativeError=None, confidence=self.confidence,
+            minWalks=self.minWalks, maxWalks=self.maxWalks, isConverged=isConverged, randomState=self.randomState
+        )
+
+        scores = getScores(estimates)
+        return scores if number is None else scores[:number]
@@ -1,4 +1,5 @@
 import numpy
+from scipy.sparse import csc_matrix, csr_matrix
 from src.similarity.MetaPathSimilarityStrategy import MetaPathSimilarityStrategy
 
 __author__ = 'jontedesco'
@@ -18,42 +19,134 @@ class NeighborSimStrategy(MetaPathSimilarityStrategy):
         # (if false, just uses differences in neighbor counts)
         self.commonNeighbors = commonNeighbors
 
+        # Projection of the graph along the meta path, the squared norms of its columns, and the fingerprint of the
+        # graph it was built from
+        self.projection = None
+        self.columnNorms = None
+        self.graphFingerprint = None
+
     def findSimilarityScore(self, source, destination):
         """
           Find the similarity score between two nodes
         """
 
-        # Project graph
-        adjMatrix, adjIndex = self.metaPathUtility.getAdjacencyMatrixFromGraph(
-            self.graph, self.metaPath, project=True, symmetric=self.symmetric
+        adjMatrix, adjIndex = self.__getProjection()
+        return self.__getScores(adjMatrix, [adjIndex[source]], [adjIndex[destination]])[0, 0]
+
+
+    def findMostSimilarNodes(self, source, number=None, conserveMemory=False):
+        """
+          Find the most similar nodes (of the same type) to some node, from its column of the projection, since nodes
+          need not be reachable from each other along the meta path to share neighbors
+        """
+
+        return self.findMostSimilarNodesBatch([source], number)[0]
+
+
+    def findMostSimilarNodesBatch(self, sources, k=None):
+        """
+          Find the most similar nodes (of the same type) to each of several nodes, scoring all sources against all
+          candidates at once from the projection. Without smoothing, only nodes sharing neighbors with a source have
+          non-zero common neighbor scores, so these are scored from the rows of the sources in the Gram matrix (A^T A)
+          of the projection, found with a single sparse product.
+
+            @return The list of the most similar nodes to each source, by decreasing score (ties broken by their order
+                    in the projection), only including nodes with positive scores
+        """
+
+        adjMatrix, adjIndex = self.__getProjection()
+        sourceIndices = [adjIndex[source] for source in sources]
+
+        # Nodes of the type of each source by column, since nodes of other types may share indices in the projection
+        nodesByClass = {}
+        for source in sources:
+            if source.__class__ not in nodesByClass:
+                nodesByClass[source.__class__] = [None] * adjMatrix.shape[1]
+        for node, index in adjIndex.iteritems():
+            if node.__class__ in nodesByClass and index < adjMatrix.shape[1]:
+                nodesByClass[node.__class__][index] = node
+        isNodeByClass = {
+            nodeClass: numpy.array([node is not None for node in nodes])
+            for nodeClass, nodes in nodesByClass.iteritems()
+        }
+
+        if self.commonNeighbors and not self.smoothed:
+            gramRows = csr_matrix(adjMatrix[:, sourceIndices].transpose() * adjMatrix)
+            gramRows.eliminate_zeros()
+
+        mostSimilarNodes = []
+        for i in xrange(0, len(sources)):
+            sourceIndex = sourceIndices[i]
+            if self.commonNeighbors and not self.smoothed:
+                rowEntries = slice(gramRows.indptr[i], gramRows.indptr[i + 1])
+                indices, totals = gramRows.indices[rowEntries], gramRows.data[rowEntries]
+                scores = 2 * totals / (self.columnNorms[sourceIndex] + self.columnNorms[indices])
+            else:
+                indices = numpy.arange(adjMatrix.shape[1])
+                scores = self.__getScores(adjMatrix, [sourceIndex], indices)[0]
+
+            nodes = nodesByClass[sources[i].__class__]
+            isCandidate = isNodeByClass[sources[i].__class__][indices] & (indices != sourceIndex) & (scores > 0)
+            indices, scores = indices[isCandidate], scores[isCandidate]
+            order = numpy.lexsort((indices, -scores))[:k]
+            mostSimilarNodes.append([nodes[indices[j]] for j in order])
+
+        return mostSimilarNodes
+
+
+    def findSimilarityScoresMatrix(self, sources, destinations):
+        """
+          Find the similarity scores between each of several sources and destinations at once, from the inner products
+          & squared norms of their columns in the projection
+        """
+
+        adjMatrix, adjIndex = self.__getProjection()
+        return self.__getScores(
+            adjMatrix, [adjIndex[source] for source in sources], [adjIndex[destination] for destination in destinations]
         )
 
-        # Consider the reverse meta path if flag is enabled
-        if self.reversed:
-            adjMatrix = adjMatrix.transpose()
 
-        transpAdjMatrix = adjMatrix.transpose()
-        sourceColumn = transpAdjMatrix[adjIndex[source]]
-        destColumn = transpAdjMatrix[adjIndex[destination]]
+    def __getProjection(self):
+        """
+          Get the sparse (CSC) adjacency matrix of the graph projected along the meta path (transposed if the meta path
+          is reversed), whose columns are the neighbor counts of nodes, and the index of nodes into it, only projecting
+          the graph (and computing the squared norms of its columns) again once it changes
+        """
+
+        graphFingerprint = self.graph.fingerprint()
+        if self.projection is None or graphFingerprint != self.graphFingerprint:
+            adjMatrix, adjIndex = self.metaPathUtility.getProjectionMatrix(self.graph, self.metaPath, self.symmetric)
+
+            # Consider the reverse meta path if flag is enabled
+            if self.reversed:
+                adjMatrix = adjMatrix.transpose()
+
+            adjMatrix = csc_matrix(adjMatrix, dtype=float)
+            self.projection = (adjMatrix, adjIndex)
+            self.columnNorms = numpy.asarray(adjMatrix.multiply(adjMatrix).sum(axis=0)).ravel()
+            self.graphFingerprint = graphFingerprint
 
-        # Compute numerator dot product
-        total = 1 if self.smoothed else 0
+        return self.projection
+
+
+    def __getScores(self, adjMatrix, sourceIndices, destinationIndices):
+        """
+          Get the dense matrix of scores between the columns of some sources & destinations in the projection
+        """
+
+        sourceNorms, destinationNorms = self.columnNorms[sourceIndices], self.columnNorms[destinationIndices]
+
+        # Compute numerator dot products
+        smoothing = 1 if self.smoothed else 0
         if self.commonNeighbors:
-            total += numpy.dot(destColumn.transpose(), sourceColumn)
-            total *= 2
+            sourceColumns, destinationColumns = adjMatrix[:, sourceIndices], adjMatrix[:, destinationIndices]
+            totals = 2 * (smoothing + (sourceColumns.transpose() * destinationColumns).toarray())
         else:
-            destNorm = numpy.dot(destColumn.transpose(), destColumn)
-            sourceNorm = numpy.dot(sourceColumn.transpose(), sourceColumn)
-            total += 2 * (max(destNorm, sourceNorm) - abs(destNorm - sourceNorm))
+            totals = smoothing + 2 * (
+                numpy.maximum.outer(sourceNorms, destinationNorms) -
+                numpy.abs(numpy.subtract.outer(sourceNorms, destinationNorms))
+            )
 
         # Compute normalization dot products
-        sourceNormalization = 1 if self.smoothed else 0
-        sourceNormalization += numpy.dot(sourceColumn.transpose(), sourceColumn)
-        destNormalization = 1 if self.smoothed else 0
-        destNormalization += numpy.dot(destColumn.transpose(), destColumn)
-
-        similarityScore = total
-        if total > 0:
-            similarityScore = total / float(sourceNormalization + destNormalization)
-
-        return similarityScore
\ No newline at end of file
+        normalizations = numpy.add.outer(smoothing + sourceNorms, smoothing + destinationNorms)
+        return numpy.where(totals > 0, totals / numpy.where(normalizations > 0, normalizations, 1), totals)
@@ -1,5 +1,9 @@
 import numpy
+from scipy.sparse import csr_matrix
 from src.similarity.MetaPathSimilarityStrategy import MetaPathSimilarityStrategy
+from src.util.FactorizedMetaPathMatrix import FactorizedMetaPathMatrix
+from src.util.MetaPathMatrixUtility import MetaPathMatrixUtility
+from src.util.MetaPathNeighborIndex import MetaPathNeighborIndex
 
 __author__ = 'jontedesco'
 
@@ -11,6 +15,46 @@ class PathSimStrategy(MetaPathSimilarityStrategy):
         @see    http://citeseer.ist.psu.edu/viewdoc/summary?doi=10.1.1.220.2455
     """
 
+    # Fraction of the half path matrix (and number of its entries) that the row of a source node must touch for top-k
+    # queries to be pruned, since pruned searches can touch most of the half path matrix in the worst case, and cost
+    # more than single rows on small matrices
+    PRUNING_ROW_FRACTION = 0.25
+    PRUNING_MIN_ROW_ENTRIES = 2 ** 16
+
+    def __init__(self, graph, metaPath=None, symmetric=False, conserveMemory=False):
+        super(PathSimStrategy, self).__init__(graph, metaPath, symmetric, conserveMemory)
+
+        self.metaPathMatrixUtility = MetaPathMatrixUtility(graph, symmetric=True)
+
+        # Built by 'prepare', along with the fingerprint of the graph they were built from
+        self.metaPathMatrix = None
+        self.metaPathDiagonal = None
+        self.diagonalOrder, self.columnCounts = None, None
+        self.nodes, self.nodesIndex = None, None
+        self.columnNodes = None
+        self.graphFingerprint = None
+
+
+    def prepare(self):
+        """
+          Builds the meta path matrix (only its half path matrix, for symmetric meta paths), its diagonal & the index of
+          nodes once, so that pairwise scores are then lookups on the rows of two nodes, and the most similar nodes to
+          some node are found from a single row of the matrix. Called by the first query if not called explicitly, and
+          again if the graph changed (other than by edges given to 'notifyEdgesAdded').
+        """
+
+        graphFingerprint = self.graph.fingerprint()
+        if self.metaPathMatrix is not None and graphFingerprint == self.graphFingerprint:
+            return
+
+        if self.metaPathMatrixUtility.isSymmetricMetaPath(self.metaPath):
+            self.metaPathMatrix = self.metaPathMatrixUtility.getFactorizedMetaPathMatrix(self.metaPath)
+        else:
+            self.metaPathMatrix = self.metaPathMatrixUtility.getMetaPathMatrix(self.metaPath)
+        self.__indexMetaPathMatrix()
+        self.graphFingerprint = graphFingerprint
+
+
     def findSimilarityScore(self, source, destination):
         """
           Find the similarity score between
@@ -18,32 +62,251 @@ class PathSimStrategy(MetaPathSimilarityStrategy):
 
         partialMetaPath = self.metaPath[:len(self.metaPath)/2 + len(self.metaPath) % 2]
 
-        # Get the number of meta paths between source and destination
         if self.conserveMemory:
 
             # Slow, but less in-memory storage
-            numSourceDestinationPaths = len(self.metaPathUtility.findMetaPaths(self.graph, source, destination, self.metaPath, True))
+            numSourceDestinationPaths = self.metaPathUtility.countMetaPaths(
+                self.graph, source, destination, self.metaPath, True
+            )
+
+            # Get cycle counts
+            neighborIndex = MetaPathNeighborIndex.getInstance(self.graph, partialMetaPath, True)
+            numSourceDestinationCycles = 0
+            for node in [source, destination]:
+                neighborIndices, pathCounts = neighborIndex.getRow(node)
+                numSourceDestinationCycles += (pathCounts ** 2).sum()
 
         else:
 
-            # Faster, but requires more memory
-            firstHalfAdjMatrix, firstHalfIndex = self.metaPathUtility.getAdjacencyMatrixFromGraph(
-                self.graph, partialMetaPath, project=True, symmetric=True)
-            secHalfAdjMatrix, secHalfIndex = self.metaPathUtility.getAdjacencyMatrixFromGraph(
-                self.graph, list(reversed(partialMetaPath)), project=True, symmetric=True)
-            adjMatrix = numpy.dot(firstHalfAdjMatrix, secHalfAdjMatrix)
-            numSourceDestinationPaths = adjMatrix[firstHalfIndex[source]][secHalfIndex[destination]]
-
-        # Get cycle counts
-        sourceNeighbors = self.metaPathUtility.findMetaPathNeighbors(self.graph, source, partialMetaPath, True)
-        destinationNeighbors = self.metaPathUtility.findMetaPathNeighbors(self.graph, destination, partialMetaPath, True)
-        numSourceDestinationCycles = 0
-        for node, neighbors in [(source, sourceNeighbors), (destination, destinationNeighbors)]:
-            for neighbor in neighbors:
-                paths = self.metaPathUtility.findMetaPaths(self.graph, node, neighbor, partialMetaPath, True)
-                numSourceDestinationCycles += len(paths) ** 2
+            # Faster, but requires more memory (for symmetric meta paths, only the half path matrix is stored)
+            self.prepare()
+            sourceIndex, destinationIndex = self.nodesIndex[source], self.nodesIndex[destination]
+
+            numSourceDestinationPaths = self.metaPathMatrix[sourceIndex, destinationIndex]
+            numSourceDestinationCycles = self.metaPathDiagonal[sourceIndex] + self.metaPathDiagonal[destinationIndex]
+
+        if numSourceDestinationCycles == 0:
+            return 0
 
         # Compute the PathSim similarity scores of the two nodes
         similarityScore = (2.0 * numSourceDestinationPaths) / float(numSourceDestinationCycles)
 
-        return similarityScore
\ No newline at end of file
+        return similarityScore
+
+
+    def findMostSimilarNodes(self, source, number=None, conserveMemory=False):
+        """
+          Find the nodes with the highest PathSim scores to some node, scoring all nodes reachable along the meta path
+          at once from the row of the source node in the meta path matrix. For top-k queries on symmetric meta paths
+          from nodes whose rows are expensive (i.e. high degree nodes), only candidates whose upper bounds can still
+          beat the k-th score are scored instead.
+        """
+
+        if self.conserveMemory:
+            return super(PathSimStrategy, self).findMostSimilarNodes(source, number)
+
+        return self.findMostSimilarNodesBatch([source], number)[0]
+
+
+    def findMostSimilarNodesBatch(self, sources, k=None):
+        """
+          Find the most similar nodes to each of several nodes, computing the rows of all sources at once with a single
+          sparse product (except for sources searched with pruning, see 'findMostSimilarNodes')
+        """
+
+        if self.conserveMemory:
+            return super(PathSimStrategy, self).findMostSimilarNodesBatch(sources, k)
+
+        # Only nodes of the same type are similar (as in the base class), so meta paths ending in another type than
+        # they start with have no similar nodes
+        if self.metaPath[0] != self.metaPath[-1]:
+            return [[] for source in sources]
+
+        self.prepare()
+        sourceIndices = [self.nodesIndex[source] for source in sources]
+        mostSimilarNodes = [None] * len(sources)
+
+        rowSources = []
+        for i in xrange(0, len(sources)):
+            if k is not None and self.__isPruned(sourceIndices[i]):
+                mostSimilarNodes[i] = [self.columnNodes[j] for j in self.__findTopNodes(sourceIndices[i], k)]
+            else:
+                rowSources.append(i)
+
+        rows = self.__getRows([sourceIndices[i] for i in rowSources])
+        for rowIndex, i in enumerate(rowSources):
+            sourceIndex = sourceIndices[i]
+            rowEntries = slice(rows.indptr[rowIndex], rows.indptr[rowIndex + 1])
+            isOther = rows.indices[rowEntries] != sourceIndex
+            indices, numPaths = rows.indices[rowEntries][isOther], rows.data[rowEntries][isOther]
+
+            numCycles = (self.metaPathDiagonal[sourceIndex] + self.metaPathDiagonal[indices]).astype(float)
+            scores = 2.0 * numPaths / numpy.where(numCycles > 0, numCycles, 1)
+
+            # Sort by decreasing score, breaking ties by node order
+            order = numpy.lexsort((indices, -scores))
+            mostSimilarNodes[i] = [self.columnNodes[indices[j]] for j in order[:k]]
+
+        return mostSimilarNodes
+
+
+    def findSimilarityScoresMatrix(self, sources, destinations):
+        """
+          Find the PathSim scores between each of several sources and destinations at once, from a single sparse product
+          of the half path rows of the sources & destinations (for symmetric meta paths) and the prepared diagonal
+        """
+
+        if self.conserveMemory:
+            return super(PathSimStrategy, self).findSimilarityScoresMatrix(sources, destinations)
+
+        self.prepare()
+        sourceIndices = numpy.array([self.nodesIndex[source] for source in sources], dtype=int)
+        destinationIndices = numpy.array([self.nodesIndex[destination] for destination in destinations], dtype=int)
+
+        if isinstance(self.metaPathMatrix, FactorizedMetaPathMatrix):
+            halfMatrix = self.metaPathMatrix.halfMatrix
+            numPaths = (halfMatrix[sourceIndices] * halfMatrix[destinationIndices].transpose()).toarray()
+        else:
+            numPaths = self.metaPathMatrix[sourceIndices][:, destinationIndices].toarray()
+
+        numCycles = numpy.add.outer(
+            self.metaPathDiagonal[sourceIndices], self.metaPathDiagonal[destinationIndices]
+        ).astype(float)
+        return numpy.where(numCycles > 0, 2.0 * numPaths / numpy.where(numCycles > 0, numCycles, 1), 0)
+
+
+    def notifyEdgesAdded(self, edges):
+        """
+          Keeps the meta path matrix (and so the PathSim diagonal) fresh after edges were added to the graph, applying
+          sparse corrections for the new edges instead of recomputing it
+
+            @param  edges   The (source, destination) pairs of the edges added to the graph, in the order added
+        """
+
+        metaPathDeltas = self.metaPathMatrixUtility.notifyEdgesAdded(edges)
+        if self.metaPathMatrix is None:
+            return
+        self.graphFingerprint = self.graph.fingerprint()
+
+        if not self.metaPathMatrixUtility.isSymmetricMetaPath(self.metaPath):
+            self.metaPathMatrix = self.metaPathMatrixUtility.getMetaPathMatrix(self.metaPath)
+        elif isinstance(self.metaPathMatrix, FactorizedMetaPathMatrix):
+            halfMetaPath = tuple(self.metaPathMatrixUtility.getHalfMetaPath(self.metaPath))
+            self.metaPathMatrix.update(
+                self.metaPathMatrixUtility.getMetaPathMatrix(halfMetaPath), metaPathDeltas.get(halfMetaPath)
+            )
+        else:
+            # The meta path only became symmetric with the new edges
+            self.metaPathMatrix = None
+            return
+
+        self.__indexMetaPathMatrix()
+
+
+    def __indexMetaPathMatrix(self):
+        """
+          Reads the diagonal of the meta path matrix, its order & the non-zeros of each column of the half path matrix
+          (for pruned searches), and the index of nodes. For meta paths that are not symmetric, the normalizing cycle
+          counts are still those of the first half of the meta path (the diagonal of H * H^T, for its matrix H), as for
+          scores counted from meta paths.
+        """
+
+        if isinstance(self.metaPathMatrix, FactorizedMetaPathMatrix):
+            self.metaPathDiagonal = self.metaPathMatrix.diagonal()
+            halfMatrix = self.metaPathMatrix.halfMatrix
+            self.diagonalOrder = numpy.argsort(self.metaPathDiagonal, kind='mergesort')
+            self.columnCounts = numpy.bincount(halfMatrix.indices, minlength=halfMatrix.shape[1])
+        else:
+            partialMetaPath = self.metaPath[:len(self.metaPath)/2 + len(self.metaPath) % 2]
+            partialMatrix = csr_matrix(self.metaPathMatrixUtility.getMetaPathMatrix(partialMetaPath))
+            self.metaPathDiagonal = numpy.asarray(partialMatrix.multiply(partialMatrix).sum(axis=1)).ravel()
+        self.nodes, self.nodesIndex = self.metaPathMatrixUtility.getNodeIndex(self.metaPath[0])
+        self.columnNodes = self.metaPathMatrixUtility.getNodeIndex(self.metaPath[-1])[0]
+
+
+    def __getRows(self, sourceIndices):
+        """
+          Get the rows of some nodes in the meta path matrix, as a sparse (CSR) matrix without explicit zeros
+        """
+
+        if isinstance(self.metaPathMatrix, FactorizedMetaPathMatrix):
+            halfMatrix = self.metaPathMatrix.halfMatrix
+            rows = csr_matrix(halfMatrix[sourceIndices] * halfMatrix.transpose())
+        else:
+            rows = csr_matrix(self.metaPathMatrix[sourceIndices])
+        rows.eliminate_zeros()
+        return rows
+
+
+    def __isPruned(self, sourceIndex):
+        """
+          Whether or not top-k queries from some node are searched with pruning, i.e. for symmetric meta paths where the
+          row of the node would touch a large fraction of a large half path matrix
+        """
+
+        if not isinstance(self.metaPathMatrix, FactorizedMetaPathMatrix):
+            return False
+
+        halfMatrix = self.metaPathMatrix.halfMatrix
+        sourceColumns = halfMatrix.indices[halfMatrix.indptr[sourceIndex]:halfMatrix.indptr[sourceIndex + 1]]
+        rowEntries = self.columnCounts[sourceColumns].sum()
+        return rowEntries >= max(self.PRUNING_ROW_FRACTION * halfMatrix.nnz, self.PRUNING_MIN_ROW_ENTRIES)
+
+
+    def __findTopNodes(self, sourceIndex, number):
+        """
+          Find the indices of the top nodes by PathSim score, pruning candidates with upper bounds on their scores. By
+          Cauchy-Schwarz on the rows of the half path matrix, M[i,j] <= sqrt(M[i,i] M[j,j]), so PathSim(i,j) is at most
+          2 sqrt(r) / (1 + r) for r = M[j,j] / M[i,i], which only decreases as r moves away from 1. Candidates are
+          visited outwards from the source's diagonal entry in diagonal order, in growing blocks scored from the half
+          path rows, until the bounds of the candidates left on both sides fall below the current k-th score.
+
+            @return The indices of the top nodes, by decreasing score (ties broken by node order)
+        """
+
+        halfMatrix = self.metaPathMatrix.halfMatrix
+        diagonal = self.metaPathDiagonal
+        sourceCycles = float(diagonal[sourceIndex])
+        if sourceCycles == 0 or number <= 0:
+            return numpy.array([], dtype=int)
+
+        def getBound(position):
+            cycles = diagonal[self.diagonalOrder[position]]
+            return 2.0 * numpy.sqrt(sourceCycles * cycles) / (sourceCycles + cycles)
+
+        # Nodes without cycles have no paths, so only visit nodes with non-zero diagonal entries
+        sortedDiagonal = diagonal[self.diagonalOrder]
+        firstPosition = numpy.searchsorted(sortedDiagonal, 0, side='right')
+        upperPosition = numpy.searchsorted(sortedDiagonal, sourceCycles)
+        lowerPosition = upperPosition
+
+        sourceRow = halfMatrix.getrow(sourceIndex).toarray().ravel()
+        indices, scores = numpy.array([], dtype=int), numpy.array([])
+        blockSize = max(number, 16)
+        while lowerPosition > firstPosition or upperPosition < len(sortedDiagonal):
+            candidates = numpy.concatenate([
+                self.diagonalOrder[max(firstPosition, lowerPosition - blockSize):lowerPosition],
+                self.diagonalOrder[upperPosition:upperPosition + blockSize]
+            ])
+            lowerPosition = max(firstPosition, lowerPosition - blockSize)
+            upperPosition = min(len(sortedDiagonal), upperPosition + blockSize)
+            blockSize *= 2
+
+            numPaths = halfMatrix[candidates].dot(sourceRow)
+            isScored = (numPaths > 0) & (candidates != sourceIndex)
+            indices = numpy.concatenate([indices, candidates[isScored]])
+            scores = numpy.concatenate([
+                scores, 2.0 * numPaths[isScored] / (sourceCycles + diagonal[candidates[isScored]])
+            ])
+
+            # Stop once no candidate left can reach the k-th score (ties with it are still visited)
+            if len(scores) >= number:
+                kthScore = numpy.partition(scores, len(scores) - number)[len(scores) - number]
+                bounds = [getBound(lowerPosition - 1)] if lowerPosition > firstPosition else []
+                bounds += [getBound(upperPosition)] if upperPosition < len(sortedDiagonal) else []
+                if max(bounds + [0]) < kthScore - 1e-12:
+                    break
+
+        order = numpy.lexsort((indices, -scores))[:number]
+        return indices[order]
+
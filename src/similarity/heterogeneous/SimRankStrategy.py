@@ -1,5 +1,6 @@
 from collections import defaultdict
 import itertools
+import numpy
 from src.similarity.MetaPathSimilarityStrategy import MetaPathSimilarityStrategy
 
 __author__ = 'jontedesco'
@@ -15,6 +16,11 @@ class SimRankStrategy(MetaPathSimilarityStrategy):
     def __init__(self, graph, metaPath = None, symmetric = False, normalization = None, factor = None):
         super(SimRankStrategy, self).__init__(graph, metaPath, symmetric)
         self.similarityScores = None
+
+        # Scores are computed as matrix iterations for the default recurrence, indexed by the nodes of the projection
+        self.isDefaultRecurrence = normalization is None and factor is None
+        self.similarityMatrix, self.nodesIndex = None, None
+
         def defaultNormalization(graph, a, b, sim):
             aNeighbors, bNeighbors = graph.getPredecessors(a), graph.getPredecessors(b)
             return float(len(aNeighbors) * len(bNeighbors))
@@ -28,6 +34,8 @@ class SimRankStrategy(MetaPathSimilarityStrategy):
         """
 
 
+        if self.similarityMatrix is not None:
+            return self.__getMatrixScore(source, destination)
         if self.similarityScores is not None:
             return self.similarityScores[source][destination]
 
@@ -40,6 +48,10 @@ class SimRankStrategy(MetaPathSimilarityStrategy):
             else:
                 projectedGraph = self.metaPathUtility.createHeterogeneousProjection(self.graph, self.metaPath)
 
+        if self.isDefaultRecurrence:
+            self.similarityMatrix, self.nodesIndex = self.__simRankMatrix(projectedGraph, SimRankStrategy.k)
+            return self.__getMatrixScore(source, destination)
+
         # Build initial similarity scores
         self.similarityScores = defaultdict(dict)
         nodes = self.graph.getNodes()
@@ -51,6 +63,68 @@ class SimRankStrategy(MetaPathSimilarityStrategy):
         return self.similarityScores[source][destination]
 
 
+    def findSimilarityScoresMatrix(self, sources, destinations):
+        """
+          Find the SimRank scores between each of several sources and destinations, computing all pairwise scores only
+          once, and reading them from the matrix of scores for the default recurrence
+        """
+
+        if len(sources) == 0 or len(destinations) == 0:
+            return numpy.zeros((len(sources), len(destinations)))
+
+        self.findSimilarityScore(sources[0], destinations[0])
+        if self.similarityMatrix is None:
+            return super(SimRankStrategy, self).findSimilarityScoresMatrix(sources, destinations)
+
+        sourceIndices = numpy.array([self.nodesIndex.get(source, -1) for source in sources])
+        destinationIndices = numpy.array([self.nodesIndex.get(destination, -1) for destination in destinations])
+        scores = self.similarityMatrix[sourceIndices][:, destinationIndices]
+        scores[sourceIndices < 0, :] = 0
+        scores[:, destinationIndices < 0] = 0
+        return scores
+
+
+    def __simRankMatrix(self, projectedGraph, iterations, eps=1e-4):
+        """
+          Compute SimRank scores for all pairs of nodes at once with the default recurrence, S' = C * W^T S W (with ones
+          on the diagonal), for W the in-neighbor matrix of the projection with columns normalized by in-degree. Gives
+          the scores of '__simRank', iterating until the largest change of any score is below 'eps'.
+
+            @return The dense matrix of scores, and the index of nodes into it
+        """
+
+        nodes = projectedGraph.getNodes()
+        nodesIndex = {nodes[i]: i for i in xrange(0, len(nodes))}
+
+        inNeighborMatrix = numpy.zeros((len(nodes), len(nodes)))
+        for node in nodes:
+            for inNeighbor in projectedGraph.getPredecessors(node):
+                inNeighborMatrix[nodesIndex[inNeighbor], nodesIndex[node]] = 1
+        inDegrees = inNeighborMatrix.sum(axis=0)
+        inNeighborMatrix /= numpy.where(inDegrees > 0, inDegrees, 1)
+
+        similarities = numpy.identity(len(nodes))
+        for iteration in xrange(0, iterations):
+            newSimilarities = SimRankStrategy.C * inNeighborMatrix.transpose().dot(similarities).dot(inNeighborMatrix)
+            numpy.fill_diagonal(newSimilarities, 1.0)
+            hasConverged = numpy.abs(newSimilarities - similarities).max() < eps if len(nodes) > 0 else True
+            similarities = newSimilarities
+            if hasConverged:
+                break
+
+        return similarities, nodesIndex
+
+
+    def __getMatrixScore(self, source, destination):
+        """
+          Get the score of a pair of nodes from the matrix of scores (zero for nodes outside of the projection)
+        """
+
+        if source not in self.nodesIndex or destination not in self.nodesIndex:
+            return 0
+        return self.similarityMatrix[self.nodesIndex[source], self.nodesIndex[destination]]
+
+
     def __simRank(self, projectedGraph, previousSimilarities, iterationsRemaining):
         """
           Recursively compute the sim-rank of two nodes given the previous pairwise similarities of nodes in the graph
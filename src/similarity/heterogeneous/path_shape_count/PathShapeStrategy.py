@@ -1,6 +1,7 @@
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 import numpy
 from src.similarity.MetaPathSimilarityStrategy import MetaPathSimilarityStrategy
+from src.util.EdgeCutAggregator import EdgeCutAggregator
 
 __author__ = 'jontedesco'
 
@@ -10,6 +11,9 @@ class PathShapeStrategy(MetaPathSimilarityStrategy):
       Abstract class that performs similarity on the path shape to shared neighbors
     """
 
+    # Maximum number of path sequences kept between pairs of nodes, evicting the least recently used beyond it
+    MAX_PATH_SEQUENCES = 2 ** 20
+
     def __init__(self, graph, weight=1.0, omit=list(), metaPath=None, symmetric=False, vectorSimilarity=None):
         super(PathShapeStrategy, self).__init__(graph, metaPath, symmetric)
         self.similarityScores = defaultdict(dict)
@@ -17,16 +21,21 @@ class PathShapeStrategy(MetaPathSimilarityStrategy):
         self.weight = weight
         self.omit = omit
 
+        # Projection of the graph & path sequences between its nodes, kept until the graph changes (by fingerprint)
+        self.projectedGraph = None
+        self.pathSequences = OrderedDict()
+        self.graphFingerprint = None
+
     def findSimilarityScore(self, source, destination):
         """
           Compute the path shape count similarity, by using path sequences from shared neighbors to source & destination
         """
 
+        projectedGraph = self.__getProjectedGraph()
         if destination in self.similarityScores[source]:
             return self.similarityScores[source][destination]
 
         # Find shared neighbors
-        projectedGraph = self.metaPathUtility.createHeterogeneousProjection(self.graph, self.metaPath)
         sourceInMetaNeighbors = set(projectedGraph.getPredecessors(source))
         destinationInMetaNeighbors = set(projectedGraph.getPredecessors(destination))
         allNeighbors = sourceInMetaNeighbors.union(destinationInMetaNeighbors)
@@ -76,6 +85,26 @@ class PathShapeStrategy(MetaPathSimilarityStrategy):
 
         return self.similarityScores[source][destination]
 
+    def findSimilarityScoresMatrix(self, sources, destinations):
+        """
+          Find the path shape scores between each of several sources and destinations, first finding the path
+          sequences from each of their neighbors in the projection with one traversal of the meta paths from the
+          neighbor to all of its meta path neighbors, rather than one traversal for each pair of neighbor & node
+        """
+
+        projectedGraph = self.__getProjectedGraph()
+        nodes = set(sources).union(destinations)
+        neighbors = set()
+        for node in nodes:
+            neighbors.update([
+                neighbor for neighbor in projectedGraph.getPredecessors(node)
+                if (neighbor, node) not in self.pathSequences
+            ])
+        for neighbor in neighbors:
+            self.__findPathSequencesFrom(neighbor, nodes)
+
+        return super(PathShapeStrategy, self).findSimilarityScoresMatrix(sources, destinations)
+
     def getSimilarityScoreFromMatrices(self, sourceMatrix, destinationMatrix,
                                        normalizedDestinationMatrix, normalizedSourceMatrix):
         """
@@ -84,22 +113,71 @@ class PathShapeStrategy(MetaPathSimilarityStrategy):
 
         raise NotImplementedError()
 
+    def __getProjectedGraph(self):
+        """
+          Get the projection of the graph along the meta path, shared by all pairs of nodes until the graph changes, at
+          which point the path sequences & scores found between nodes are also discarded
+        """
+
+        graphFingerprint = self.graph.fingerprint()
+        if self.projectedGraph is None or graphFingerprint != self.graphFingerprint:
+            self.projectedGraph = self.metaPathUtility.createHeterogeneousProjection(self.graph, self.metaPath)
+            self.pathSequences = OrderedDict()
+            self.similarityScores = defaultdict(dict)
+            self.graphFingerprint = graphFingerprint
+
+        return self.projectedGraph
+
     def __pathSequence(self, source, destination):
         """
           Get the path count sequence between the two nodes along the meta path in the graph, using edge counts only.
+          Sequences are shared by all pairs of nodes with the same neighbor, so each is only found once.
 
             @source         The source object
             @destination    The destination object
             @return         A numpy vector of the sequence
         """
 
-        edgeCuts = []
-        metaPathInstances = self.metaPathUtility.findMetaPaths(self.graph, source, destination, self.metaPath)
-        for i in xrange(0, len(self.metaPath)-1):
-            edgePairs = {(pathInstance[i], pathInstance[i+1]) for pathInstance in metaPathInstances}
-            edgeCuts.append(len(edgePairs))
+        if (source, destination) in self.pathSequences:
+            pathSequence = self.pathSequences.pop((source, destination))
+        else:
+
+            # Stream the meta path instances, keeping only the distinct edges at each step
+            aggregator = self.metaPathUtility.aggregateMetaPaths(
+                self.graph, source, destination, self.metaPath, EdgeCutAggregator(len(self.metaPath))
+            )
+            pathSequence = aggregator.getEdgeCutCounts()
+
+        self.__storePathSequence(source, destination, pathSequence)
+        return list(pathSequence)
+
+    def __findPathSequencesFrom(self, source, destinations):
+        """
+          Find the path count sequences from some node to each of several nodes at once, streaming the meta path
+          instances from the node to all of its meta path neighbors only once. Cycles are found separately (see
+          'iterMetaPaths'), so the sequence from the node to itself is left to '__pathSequence'.
+        """
+
+        aggregators = {}
+        for path in self.metaPathUtility.iterMetaPaths(self.graph, source, None, self.metaPath):
+            destination = path[-1]
+            if destination in destinations and not destination == source:
+                if destination not in aggregators:
+                    aggregators[destination] = EdgeCutAggregator(len(self.metaPath))
+                aggregators[destination].add(path)
+
+        for destination, aggregator in aggregators.iteritems():
+            self.__storePathSequence(source, destination, aggregator.getEdgeCutCounts())
+
+    def __storePathSequence(self, source, destination, pathSequence):
+        """
+          Keep the path sequence between two nodes as the most recently used, evicting the least recently used path
+          sequences beyond the maximum number kept
+        """
 
-        return edgeCuts
+        self.pathSequences[(source, destination)] = pathSequence
+        while len(self.pathSequences) > self.MAX_PATH_SEQUENCES:
+            self.pathSequences.popitem(last=False)
 
     def __pathsimSimilarity(self, _, vectorA, vectorB):
         """
@@ -1,4 +1,7 @@
 import operator
+import numpy
+from scipy.sparse import csc_matrix, identity
+from scipy.sparse.linalg import spsolve
 from src.similarity.SimilarityStrategy import SimilarityStrategy
 
 __author__ = 'jontedesco'
@@ -42,6 +45,25 @@ class PageRankStrategy(SimilarityStrategy):
         return mostSimilarNodes
 
 
+    def findSimilarityScoresMatrix(self, sources, destinations):
+        """
+          Find the similarity scores between each of several sources and destinations, running PageRank on the BFS
+          trees of all sources not scored yet at once (see '__computeSimilarityScoresBatch')
+        """
+
+        unscoredSources = []
+        for source in sources:
+            if source not in self.similarityScores and source not in unscoredSources:
+                unscoredSources.append(source)
+        self.__computeSimilarityScoresBatch(unscoredSources)
+
+        scores = numpy.zeros((len(sources), len(destinations)))
+        for i in xrange(0, len(sources)):
+            sourceScores = self.similarityScores[sources[i]]
+            scores[i] = [sourceScores.get(destination, 0) for destination in destinations]
+        return scores
+
+
     def __computeSimilarityScores(self, source):
         """
           Compute the similarity scores for all reachable nodes from the source node in the graph
@@ -53,6 +75,40 @@ class PageRankStrategy(SimilarityStrategy):
         return self.similarityScores[source]
 
 
+    def __computeSimilarityScoresBatch(self, sources, alpha=0.85):
+        """
+          Compute the similarity scores for all reachable nodes from each of several source nodes, solving PageRank for
+          all of their BFS trees as the blocks of a single sparse linear system. The PageRank vector x of a tree with N
+          nodes is x = alpha * (P^T x + (d . x) / N) + (1 - alpha) / N, for P the transition matrix of the tree & d the
+          indicator of its leaves, which is the solution of (I - alpha * P^T) y = 1 normalized to sum to one.
+        """
+
+        if len(sources) == 0:
+            return
+
+        treeNodes, offsets = [], [0]
+        rows, columns, data = [], [], []
+        for source in sources:
+            tree = self.graph.breadthFirstSearch(source)
+            nodes = tree.getNodes()
+            nodesIndex = {nodes[i]: offsets[-1] + i for i in xrange(0, len(nodes))}
+            for node in nodes:
+                successors = tree.getSuccessors(node)
+                for successor in successors:
+                    rows.append(nodesIndex[successor])
+                    columns.append(nodesIndex[node])
+                    data.append(alpha / len(successors))
+            treeNodes.append(nodes)
+            offsets.append(offsets[-1] + len(nodes))
+
+        n = offsets[-1]
+        system = identity(n, format='csc') - csc_matrix((data, (rows, columns)), shape=(n, n))
+        solution = numpy.atleast_1d(spsolve(system, numpy.ones(n)))
+        for i in xrange(0, len(sources)):
+            treeScores = solution[offsets[i]:offsets[i+1]]
+            self.similarityScores[sources[i]] = dict(zip(treeNodes[i], treeScores / treeScores.sum()))
+
+
     def __getSimilarityScore(self, source, destination):
         """
           Get a similarity score between two nodes, assuming it has already been computed
@@ -1,3 +1,4 @@
+from collections import defaultdict
 from src.util.MetaPathUtility import MetaPathUtility
 
 __author__ = 'jontedesco'
@@ -7,10 +8,13 @@ class EdgeBasedMetaPathUtility(MetaPathUtility):
       Edge-based implementation of meta path utility
     """
 
-    def _findMetaPathsHelper(self, graph, node, metaPathTypes, symmetric = True):
+    def _findMetaPathsHelper(self, graph, node, metaPathTypes, symmetric = True, reverse = False):
         """
           Iterative helper function to find nodes not yet visited according to types in meta path. This helper
           function cannot handle loops back to the original node, but CAN handle multi-edges
+
+            @param  reverse Whether to follow edges backwards, from the end of the meta path towards its start (paths
+                            are still returned in meta path order, ending with the given node)
         """
 
         # We initially start with a path of length 0, just the starting node included
@@ -23,27 +27,30 @@ class EdgeBasedMetaPathUtility(MetaPathUtility):
 
             # For each partial path, add any extensions of this path that are valid
             for path, pathEdgeCount in zip(paths, pathCounts):
-                nodesVisited = path
-                node = path[-1]
-                neighbors = graph.getSuccessors(node)
+                node = path[0] if reverse else path[-1]
+                neighbors = graph.getPredecessors(node) if reverse else graph.getSuccessors(node)
                 for neighbor in neighbors:
 
                     # Do not add this next partial path if (1) it's already been visited, (2) it's the wrong type, or
                     # (3) we require paths to be symmetric and this edge does not exist in both directions
-                    if neighbor == nodesVisited[-1]:
+                    if neighbor == node:
                         continue
                     if neighbor.__class__ != metaPathType:
                         continue
                     if symmetric and not (graph.hasEdge(neighbor, node) and graph.hasEdge(node, neighbor)):
                         continue
 
-                    nextPaths.append(path + (neighbor,))
-                    nextPathCounts.append(pathEdgeCount * graph.getNumberOfEdges(node, neighbor))
+                    if reverse:
+                        nextPaths.append((neighbor,) + path)
+                        nextPathCounts.append(pathEdgeCount * graph.getNumberOfEdges(neighbor, node))
+                    else:
+                        nextPaths.append(path + (neighbor,))
+                        nextPathCounts.append(pathEdgeCount * graph.getNumberOfEdges(node, neighbor))
 
             paths = nextPaths
             pathCounts = nextPathCounts
 
-        metaPathNeighbors = set(path[-1] for path in paths)
+        metaPathNeighbors = set(path[0] if reverse else path[-1] for path in paths)
 
         # Adjust the number of total meta paths based on the number of edges between each step
         countAdjustedPaths = []
@@ -51,3 +58,89 @@ class EdgeBasedMetaPathUtility(MetaPathUtility):
             countAdjustedPaths.extend([path] * pathCount)
 
         return metaPathNeighbors, countAdjustedPaths
+
+
+    def _countMetaPathsHelper(self, graph, node, metaPathTypes, symmetric = True, countEdges = True, reverse = False):
+        """
+          Iterative helper function to count paths according to types in meta path, by propagating the number of paths
+          reaching each node one type at a time. Follows the same rules as '_findMetaPathsHelper'.
+
+            @param  countEdges  Whether to count each of multiple edges between two nodes, or only distinct node sequences
+            @param  reverse     Whether to follow edges backwards, from the end of the meta path towards its start
+            @return A dictionary of each reachable node to the number of paths reaching it
+        """
+
+        pathCounts = {node: 1}
+
+        for metaPathType in metaPathTypes:
+            nextPathCounts = defaultdict(int)
+
+            for node, pathCount in pathCounts.iteritems():
+                neighbors = graph.getPredecessors(node) if reverse else graph.getSuccessors(node)
+                for neighbor in neighbors:
+
+                    # Same rules as for finding meta paths (no self loops, correct type, and optional symmetry)
+                    if neighbor == node:
+                        continue
+                    if neighbor.__class__ != metaPathType:
+                        continue
+                    if symmetric and not (graph.hasEdge(neighbor, node) and graph.hasEdge(node, neighbor)):
+                        continue
+
+                    if not countEdges:
+                        numberOfEdges = 1
+                    elif reverse:
+                        numberOfEdges = graph.getNumberOfEdges(neighbor, node)
+                    else:
+                        numberOfEdges = graph.getNumberOfEdges(node, neighbor)
+                    nextPathCounts[neighbor] += pathCount * numberOfEdges
+
+            pathCounts = nextPathCounts
+
+        return pathCounts
+
+
+    def _iterMetaPathsHelper(self, graph, node, metaPathTypes, symmetric = True, countEdges = True):
+        """
+          Iterative depth-first helper function to stream paths according to types in meta path, following the same
+          rules as '_findMetaPathsHelper'. The stack holds at most one frame per type in the meta path.
+
+            @param  countEdges  Whether to count each of multiple edges between two nodes, or only distinct node sequences
+            @return A generator of (path, count) tuples, where count is the number of instances of the node sequence
+        """
+
+        if len(metaPathTypes) == 0:
+            yield (node,), 1
+            return
+
+        path, pathCounts = [node], [1]
+        stack = [iter(graph.getSuccessors(node))]
+
+        while len(stack) > 0:
+            node = path[-1]
+            neighbor = next(stack[-1], None)
+
+            # Backtrack once all successors of the last node in the path are explored
+            if neighbor is None:
+                stack.pop()
+                path.pop()
+                pathCounts.pop()
+                continue
+
+            # Same rules as for finding meta paths (no self loops, correct type, and optional symmetry)
+            if neighbor == node:
+                continue
+            if neighbor.__class__ != metaPathTypes[len(path) - 1]:
+                continue
+            if symmetric and not (graph.hasEdge(neighbor, node) and graph.hasEdge(node, neighbor)):
+                continue
+
+            numberOfEdges = graph.getNumberOfEdges(node, neighbor) if countEdges else 1
+            pathCount = pathCounts[-1] * numberOfEdges
+
+            if len(path) == len(metaPathTypes):
+                yield tuple(path) + (neighbor,), pathCount
+            else:
+                path.append(neighbor)
+                pathCounts.append(pathCount)
+                stack.append(iter(graph.getSuccessors(neighbor)))
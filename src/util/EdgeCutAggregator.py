@@ -0,0 +1,32 @@
+__author__ = 'jontedesco'
+
+
+class EdgeCutAggregator(object):
+    """
+      Aggregator for streamed meta path instances, that accumulates the set of distinct edges used at each step along
+      the meta path (the 'edge cuts'), without keeping the path instances themselves.
+    """
+
+    def __init__(self, metaPathLength):
+        """
+          Constructs an aggregator for meta path instances with the given number of nodes
+        """
+
+        self.edgeCuts = [set() for _ in xrange(0, metaPathLength - 1)]
+
+
+    def add(self, path):
+        """
+          Add the edges of some path instance to the edge cut sets
+        """
+
+        for i in xrange(0, len(path) - 1):
+            self.edgeCuts[i].add((path[i], path[i+1]))
+
+
+    def getEdgeCutCounts(self):
+        """
+          Get the number of distinct edges used at each step along the meta path
+        """
+
+        return [len(edgeCut) for edgeCut in self.edgeCuts]
@@ -0,0 +1,87 @@
+import numpy
+from scipy.sparse import csr_matrix
+
+__author__ = 'jontedesco'
+
+
+class FactorizedMetaPathMatrix(object):
+    """
+      Meta path matrix of a symmetric meta path, M = C * C^T, stored only as its half path matrix C. Single entries are
+      computed as sparse row dot products, and the diagonal from squared row norms, so the full n x n commuting matrix is
+      never materialized. Mimics the parts of the scipy sparse matrix interface used for PathSim.
+    """
+
+    def __init__(self, halfMatrix):
+        """
+          Constructs the factorized matrix
+
+            @param  halfMatrix  The sparse half path matrix C, with rows indexed by nodes of the meta path's first type
+        """
+
+        self.halfMatrix = csr_matrix(halfMatrix)
+        self.halfMatrix.sum_duplicates()
+        self.shape = (self.halfMatrix.shape[0], self.halfMatrix.shape[0])
+        self.__diagonal = self.__getSquaredRowNorms(self.halfMatrix)
+
+
+    def update(self, halfMatrix, halfMatrixDelta):
+        """
+          Replaces the half path matrix after it changed (or grew), only recomputing the diagonal entries of the rows
+          that changed
+
+            @param  halfMatrix      The updated half path matrix
+            @param  halfMatrixDelta The sparse change of the half path matrix, or None if no rows changed
+        """
+
+        self.halfMatrix = csr_matrix(halfMatrix)
+        self.halfMatrix.sum_duplicates()
+        self.shape = (self.halfMatrix.shape[0], self.halfMatrix.shape[0])
+
+        diagonal = numpy.zeros(self.shape[0], dtype=self.__diagonal.dtype)
+        diagonal[:len(self.__diagonal)] = self.__diagonal
+        if halfMatrixDelta is not None:
+            rows = numpy.unique(halfMatrixDelta.nonzero()[0])
+            diagonal[rows] = self.__getSquaredRowNorms(self.halfMatrix[rows])
+        self.__diagonal = diagonal
+
+
+    @staticmethod
+    def __getSquaredRowNorms(matrix):
+        return numpy.asarray(matrix.multiply(matrix).sum(axis=1)).ravel()
+
+
+    def __getitem__(self, index):
+        """
+          Get the entry M[i, j], as the dot product of rows i and j of the half path matrix, read directly from the CSR
+          arrays so the cost is only that of intersecting the columns of the two rows
+        """
+
+        i, j = index
+        if i == j:
+            return self.__diagonal[i]
+
+        indptr, indices, data = self.halfMatrix.indptr, self.halfMatrix.indices, self.halfMatrix.data
+        iColumns, jColumns = indices[indptr[i]:indptr[i + 1]], indices[indptr[j]:indptr[j + 1]]
+        if len(iColumns) == 0 or len(jColumns) == 0:
+            return data.dtype.type(0)
+
+        # Columns of each row are sorted (by 'sum_duplicates'), so find the columns of row i in row j by binary search
+        jPositions = numpy.minimum(numpy.searchsorted(jColumns, iColumns), len(jColumns) - 1)
+        isCommon = jColumns[jPositions] == iColumns
+        return data[indptr[i]:indptr[i + 1]][isCommon].dot(data[indptr[j] + jPositions[isCommon]])
+
+
+    def diagonal(self):
+        """
+          Get the diagonal of M, i.e. the squared norms of the rows of the half path matrix
+        """
+
+        return self.__diagonal
+
+
+    def getrow(self, i):
+        """
+          Get row i of M as a 1 x n sparse matrix
+        """
+
+        return csr_matrix(self.halfMatrix.getrow(i) * self.halfMatrix.transpose())
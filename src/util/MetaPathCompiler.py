@@ -0,0 +1,274 @@
+from scipy.sparse import csr_matrix, identity
+from src.model.edge.ReversedEdgeType import ReversedEdgeType
+from src.util.MetaPathMatrixUtility import MetaPathMatrixUtility
+
+__author__ = 'jontedesco'
+
+
+class MetaPathCompiler(object):
+    """
+      Compiles batches of meta paths into a shared plan of sparse matrix products, so that sub-paths shared between
+      meta paths (i.e. prefixes, suffixes & halves) are only computed once. Meta paths are given either as lists of
+      types (which may name the edge types between node types, see MetaPathMatrixUtility), or as strings of type
+      aliases like "A-P-C-P-A".
+
+      Each meta path is planned with matrix-chain dynamic programming over its sub-paths, where sub-paths already in the
+      plan (or whose reverse is in the plan, when the relations along it are mirrored) cost nothing. Computed matrices
+      are kept by the compiler, so later batches also reuse them.
+    """
+
+    def __init__(self, matrixUtility, typeAliases=None):
+        """
+          Constructs a compiler that computes matrices with some meta path matrix utility
+
+            @param  matrixUtility   The meta path matrix utility supplying relation matrices
+            @param  typeAliases     Dictionary of the aliases used in meta path strings to node types
+        """
+
+        self.matrixUtility = matrixUtility
+        self.typeAliases = {} if typeAliases is None else typeAliases
+
+        # Matrices of the sub-paths computed so far, by canonical sub-path
+        self.matrices = {}
+
+
+    def parse(self, expression):
+        """
+          Parses a meta path string, where types are separated by dashes, or are single character aliases when there are
+          no dashes (i.e. "A-P-C-P-A" or "APCPA")
+
+            @return The meta path, as a tuple of types
+        """
+
+        tokens = [token.strip() for token in expression.split('-')]
+        if len(tokens) == 1 and tokens[0] not in self.typeAliases:
+            tokens = list(tokens[0])
+
+        for token in tokens:
+            if token not in self.typeAliases:
+                raise ValueError("Unknown type alias '%s' in meta path '%s'" % (token, expression))
+
+        return tuple([self.typeAliases[token] for token in tokens])
+
+
+    def canonicalize(self, metaPath):
+        """
+          Get the canonical form of a meta path, i.e. a tuple of types, parsing it first if given as a string
+        """
+
+        if isinstance(metaPath, basestring):
+            return self.parse(metaPath)
+        return tuple(metaPath)
+
+
+    def plan(self, metaPaths):
+        """
+          Plans the computation of a batch of meta path matrices. Shorter meta paths are planned first, so that longer
+          meta paths can be built from them.
+
+            @param  metaPaths   The batch of meta paths
+            @return The steps of the plan in execution order, as tuples of (sub-path, operation, operand sub-paths),
+                    where operations are 'identity', 'relation', 'transpose' and 'product'
+        """
+
+        # Meta paths of the same length are planned in the order given, so that plans do not depend on hashing
+        uniqueMetaPaths = []
+        for metaPath in [self.canonicalize(metaPath) for metaPath in metaPaths]:
+            if metaPath not in uniqueMetaPaths:
+                uniqueMetaPaths.append(metaPath)
+
+        steps = []
+        available = set(self.matrices.keys())
+        for metaPath in sorted(uniqueMetaPaths, key=len):
+            self.__planMetaPath(metaPath, available, steps)
+        return steps
+
+
+    def getMetaPathMatrices(self, metaPaths):
+        """
+          Compiles & executes the plan for a batch of meta paths
+
+            @return Dictionary of each (canonical) meta path in the batch to its sparse (CSR) meta path matrix
+        """
+
+        for subPath, operation, operands in self.plan(metaPaths):
+            if operation == 'identity':
+                nodes, nodesIndex = self.matrixUtility.getNodeIndex(subPath[0])
+                matrix = csr_matrix(identity(len(nodes), dtype=int))
+            elif operation == 'relation':
+                nodeTypes, edgeTypes = MetaPathMatrixUtility.splitMetaPath(subPath)
+                matrix = self.matrixUtility.getRelationMatrix(nodeTypes[0], nodeTypes[1], edgeTypes[0])
+            elif operation == 'transpose':
+                matrix = csr_matrix(self.matrices[operands[0]].transpose())
+            else:
+                matrix = csr_matrix(self.matrices[operands[0]] * self.matrices[operands[1]])
+            self.matrices[subPath] = matrix
+
+        return {metaPath: self.matrices[metaPath] for metaPath in [self.canonicalize(path) for path in metaPaths]}
+
+
+    def getMetaPathMatrix(self, metaPath):
+        """
+          Get the sparse (CSR) matrix of a single meta path, reusing any sub-paths already computed
+        """
+
+        return self.getMetaPathMatrices([metaPath])[self.canonicalize(metaPath)]
+
+
+    def __planMetaPath(self, metaPath, available, steps):
+        """
+          Adds the least estimated cost steps for some meta path to the plan, given the sub-paths already available
+        """
+
+        if metaPath in available:
+            return
+
+        if len(metaPath) == 1:
+            steps.append((metaPath, 'identity', ()))
+            available.add(metaPath)
+            return
+
+        # Sub-paths between positions of node types, along with the edge types between them
+        nodeTypes, edgeTypes = MetaPathMatrixUtility.splitMetaPath(metaPath)
+        getSubPath = lambda i, j: self.__joinMetaPath(nodeTypes[i:j+1], edgeTypes[i:j])
+
+        # Shapes, estimated non-zeros, costs & best split points of each sub-path [i, j] (positions of node types)
+        n = len(nodeTypes)
+        shapes, nonZeros, costs, splits = {}, {}, {}, {}
+        for i in xrange(0, n-1):
+            relationMatrix = self.matrixUtility.getRelationMatrix(nodeTypes[i], nodeTypes[i+1], edgeTypes[i])
+            shapes[i, i+1] = relationMatrix.shape
+            nonZeros[i, i+1] = float(relationMatrix.nnz)
+            costs[i, i+1] = 0.0
+
+        for length in xrange(3, n + 1):
+            for i in xrange(0, n - length + 1):
+                j = i + length - 1
+                shapes[i, j] = (shapes[i, i+1][0], shapes[j-1, j][1])
+
+                subPath = getSubPath(i, j)
+                if subPath in available or self.__getReusableReverse(subPath, available) is not None:
+                    nonZeros[i, j] = float(self.__getAvailableNonZeros(subPath))
+                    costs[i, j] = 0.0
+                    continue
+
+                for k in xrange(i+1, j):
+                    rightCost = 0.0 if self.__isMirror(getSubPath(i, k), getSubPath(k, j)) else costs[k, j]
+                    cost = costs[i, k] + rightCost + MetaPathMatrixUtility.estimateProductCost(
+                        shapes[i, k], nonZeros[i, k], shapes[k, j], nonZeros[k, j]
+                    )
+                    if (i, j) not in costs or cost < costs[i, j]:
+                        costs[i, j] = cost
+                        splits[i, j] = k
+                k = splits[i, j]
+                nonZeros[i, j] = MetaPathMatrixUtility.estimateProductNonZeros(
+                    shapes[i, k], nonZeros[i, k], shapes[k, j], nonZeros[k, j]
+                )
+
+        def addSteps(i, j):
+            subPath = getSubPath(i, j)
+            if subPath in available:
+                return
+
+            if j == i + 1:
+                steps.append((subPath, 'relation', ()))
+            else:
+                reverseSubPath = self.__getReusableReverse(subPath, available)
+                if reverseSubPath is not None:
+                    steps.append((subPath, 'transpose', (reverseSubPath,)))
+                else:
+                    k = splits[i, j]
+                    leftSubPath, rightSubPath = getSubPath(i, k), getSubPath(k, j)
+                    addSteps(i, k)
+                    if rightSubPath not in available and self.__isMirror(leftSubPath, rightSubPath):
+                        steps.append((rightSubPath, 'transpose', (leftSubPath,)))
+                        available.add(rightSubPath)
+                    else:
+                        addSteps(k, j)
+                    steps.append((subPath, 'product', (leftSubPath, rightSubPath)))
+            available.add(subPath)
+
+        addSteps(0, n-1)
+
+
+    def __getReusableReverse(self, subPath, available):
+        """
+          Get the reverse of some sub-path if it is available and its transpose is the sub-path's matrix
+        """
+
+        reverseSubPath = self.__reverseMetaPath(subPath)
+        if reverseSubPath != subPath and reverseSubPath in available and self.__isMirror(reverseSubPath, subPath):
+            return reverseSubPath
+        return None
+
+
+    def __isMirror(self, subPath, otherSubPath):
+        """
+          Checks whether or not the matrix of one sub-path is the transpose of the other's, i.e. the other sub-path is
+          the reverse of the first, and every relation along it is mirrored by the reverse relation
+        """
+
+        nodeTypes, edgeTypes = MetaPathMatrixUtility.splitMetaPath(subPath)
+        if self.__reverseMetaPath(subPath) != tuple(otherSubPath) or len(nodeTypes) < 2:
+            return False
+        for i in xrange(0, len(nodeTypes)-1):
+            reverseEdgeType = self.__reverseEdgeType(edgeTypes[i])
+            if not self.matrixUtility.isMirroredRelation(nodeTypes[i], nodeTypes[i+1], edgeTypes[i], reverseEdgeType):
+                return False
+        return True
+
+
+    def __getAvailableNonZeros(self, subPath):
+        """
+          Get the number of non-zeros of an available sub-path, or of its reverse, if it has already been computed
+        """
+
+        for path in [subPath, self.__reverseMetaPath(subPath)]:
+            if path in self.matrices:
+                return self.matrices[path].nnz
+
+        # Planned in this batch, but not yet computed, so fall back on the chain estimate
+        relationMatrices = self.matrixUtility.getRelationMatrices(subPath)
+        shape, nonZeros = relationMatrices[0].shape, float(relationMatrices[0].nnz)
+        for relationMatrix in relationMatrices[1:]:
+            nonZeros = MetaPathMatrixUtility.estimateProductNonZeros(
+                shape, nonZeros, relationMatrix.shape, relationMatrix.nnz
+            )
+            shape = (shape[0], relationMatrix.shape[1])
+        return nonZeros
+
+
+    @staticmethod
+    def __joinMetaPath(nodeTypes, edgeTypes):
+        """
+          Get the meta path (as a tuple) through some node types, naming the edge types between them that are not None
+        """
+
+        metaPath = [nodeTypes[0]]
+        for i in xrange(0, len(nodeTypes)-1):
+            metaPath += [nodeTypes[i+1]] if edgeTypes[i] is None else [edgeTypes[i], nodeTypes[i+1]]
+        return tuple(metaPath)
+
+
+    @staticmethod
+    def __reverseEdgeType(edgeType):
+        """
+          Get the edge type of a step of a meta path traversed backwards (None for steps not naming an edge type)
+        """
+
+        if edgeType is None:
+            return None
+        if isinstance(edgeType, ReversedEdgeType):
+            return edgeType.edgeType
+        return ReversedEdgeType(edgeType)
+
+
+    def __reverseMetaPath(self, metaPath):
+        """
+          Get the reverse of a meta path, traversing each of its named edge types backwards
+        """
+
+        nodeTypes, edgeTypes = MetaPathMatrixUtility.splitMetaPath(metaPath)
+        return self.__joinMetaPath(
+            list(reversed(nodeTypes)), [self.__reverseEdgeType(edgeType) for edgeType in reversed(edgeTypes)]
+        )
@@ -0,0 +1,207 @@
+import numpy
+from src.util.MetaPathMatrixUtility import MetaPathMatrixUtility
+
+__author__ = 'jontedesco'
+
+
+class MetaPathCostEstimator(object):
+    """
+      Estimates the non-zeros, intermediate sizes, number of path instances & memory of a meta path matrix (or adjacency
+      tensor) before computing it, using only the degree statistics of the relation matrices along the meta path.
+      Estimates follow the association order the matrix utility would use, and drive the choice of execution mode:
+
+        - 'dense'       The matrix is dense enough that a dense array is no larger than a sparse one
+        - 'enumeration' There are few enough path instances that enumerating them is cheaper than multiplying
+        - 'sparse'      The sparse chain product, with all intermediates, fits in memory
+        - 'outOfCore'   Only the two factors of the final product fit in memory, so rows are spilled to disk
+        - 'sampling'    Not even the factors fit in memory, so path counts can only be sampled
+    """
+
+    # Bytes per entry of a dense float array, and per non-zero & row of a CSR matrix (float data, int32 indices)
+    BYTES_PER_DENSE_ENTRY = 8
+    BYTES_PER_SPARSE_ENTRY = 12
+    BYTES_PER_SPARSE_ROW = 4
+
+    # Bytes per node of an enumerated path instance (a list of references), and per entry of a dictionary-based tensor
+    # (a tuple key, float value & dictionary slot, measured on 64-bit CPython 2.7)
+    BYTES_PER_PATH_NODE = 8
+    BYTES_PER_TENSOR_ENTRY = 140
+
+    # Relative cost of handling a node of an enumerated path instance in Python, compared to a sparse multiplication
+    ENUMERATION_COST_FACTOR = 10.0
+
+    # Execution modes, in the order they are considered (by decreasing memory needed, after enumeration)
+    EXECUTION_MODES = ['enumeration', 'dense', 'sparse', 'outOfCore', 'sampling']
+
+    def __init__(self, matrixUtility, memoryLimit=2 ** 31, modes=None):
+        """
+          Constructs an estimator for the meta paths of some matrix utility
+
+            @param  matrixUtility   The meta path matrix utility supplying relation matrices
+            @param  memoryLimit     The number of bytes available to compute meta path matrices
+            @param  modes           The execution modes the caller supports (all modes if None), where the last of
+                                    these modes is chosen when no supported mode fits in memory
+        """
+
+        self.matrixUtility = matrixUtility
+        self.memoryLimit = memoryLimit
+        self.modes = [mode for mode in self.EXECUTION_MODES if modes is None or mode in modes]
+
+
+    def estimate(self, metaPath):
+        """
+          Dry run for some meta path, estimating its cost without computing its matrix
+
+            @return Dictionary of estimates, with keys 'metaPath', 'shape', 'nonZeros' (of the meta path matrix),
+                    'intermediates' (list of sub-path & estimated non-zeros of each product), 'multiplications',
+                    'pathInstances' (exact), 'denseBytes', 'sparseBytes', 'peakBytes' (sparse, with intermediates),
+                    'factorBytes' (out-of-core), 'enumerationBytes', 'tensorBytes' and the chosen execution 'mode'
+        """
+
+        assert len(metaPath) >= 2
+
+        intermediates = []
+        if self.matrixUtility.isSymmetricMetaPath(metaPath):
+            halfPath = metaPath[:len(metaPath)/2 + 1]
+            halfShape, halfNonZeros, multiplications, peakBytes = self.__estimateChain(halfPath, intermediates)
+            transposeShape = (halfShape[1], halfShape[0])
+            shape = (halfShape[0], halfShape[0])
+            nonZeros = MetaPathMatrixUtility.estimateProductNonZeros(
+                halfShape, halfNonZeros, transposeShape, halfNonZeros
+            )
+            multiplications += MetaPathMatrixUtility.estimateProductCost(
+                halfShape, halfNonZeros, transposeShape, halfNonZeros
+            )
+            factorBytes = 2 * self.getSparseBytes(halfShape, halfNonZeros)
+            peakBytes = max(peakBytes, factorBytes + self.getSparseBytes(shape, nonZeros))
+            intermediates.append((list(metaPath), nonZeros))
+        else:
+            shape, nonZeros, multiplications, peakBytes = self.__estimateChain(metaPath, intermediates)
+            factorBytes = self.__estimateFactorBytes(metaPath)
+
+        pathInstances = self.countPathInstances(metaPath)
+        estimates = {
+            'metaPath': list(metaPath),
+            'shape': shape,
+            'nonZeros': nonZeros,
+            'intermediates': intermediates,
+            'multiplications': multiplications,
+            'pathInstances': pathInstances,
+            'denseBytes': shape[0] * shape[1] * self.BYTES_PER_DENSE_ENTRY,
+            'sparseBytes': self.getSparseBytes(shape, nonZeros),
+            'peakBytes': peakBytes,
+            'factorBytes': factorBytes,
+            'enumerationBytes': pathInstances * len(metaPath) * self.BYTES_PER_PATH_NODE,
+            'tensorBytes': nonZeros * (len(metaPath) - 1) * self.BYTES_PER_TENSOR_ENTRY,
+        }
+        estimates['mode'] = self.chooseExecutionMode(estimates)
+
+        return estimates
+
+
+    def chooseExecutionMode(self, estimates):
+        """
+          Choose the execution mode for a meta path among the supported modes, given its estimates
+        """
+
+        enumerationCost = estimates['pathInstances'] * len(estimates['metaPath']) * self.ENUMERATION_COST_FACTOR
+        isFeasible = {
+            'enumeration': estimates['enumerationBytes'] <= self.memoryLimit and
+                enumerationCost <= estimates['multiplications'],
+            'dense': estimates['denseBytes'] <= min(estimates['sparseBytes'], self.memoryLimit),
+            'sparse': estimates['peakBytes'] <= self.memoryLimit,
+            'outOfCore': estimates['factorBytes'] <= self.memoryLimit,
+            'sampling': True
+        }
+        for mode in self.modes:
+            if isFeasible[mode]:
+                return mode
+        return self.modes[-1]
+
+
+    def countPathInstances(self, metaPath):
+        """
+          Counts the total number of instances of some meta path exactly, by propagating a vector of path counts along
+          the relation matrices, without computing any meta path matrix
+        """
+
+        nodes, nodesIndex = self.matrixUtility.getNodeIndex(metaPath[0])
+        pathCounts = numpy.ones(len(nodes))
+        for i in xrange(0, len(metaPath)-1):
+            pathCounts = self.matrixUtility.getRelationMatrix(metaPath[i], metaPath[i+1]).transpose().dot(pathCounts)
+        return pathCounts.sum()
+
+
+    def getSparseBytes(self, shape, nonZeros):
+        """
+          Get the number of bytes of a CSR matrix of some shape & number of non-zeros
+        """
+
+        return nonZeros * self.BYTES_PER_SPARSE_ENTRY + (shape[0] + 1) * self.BYTES_PER_SPARSE_ROW
+
+
+    def __getChainStatistics(self, metaPath):
+        """
+          Get the relation matrices along some meta path, with their shapes & non-zeros
+        """
+
+        relationMatrices = [
+            self.matrixUtility.getRelationMatrix(metaPath[i], metaPath[i+1]) for i in xrange(0, len(metaPath)-1)
+        ]
+        return relationMatrices, [(matrix.shape, float(matrix.nnz)) for matrix in relationMatrices]
+
+
+    def __estimateChain(self, metaPath, intermediates):
+        """
+          Estimates the product of the relation matrices along some meta path, in the least estimated cost order
+
+            @return The shape, estimated non-zeros, multiplications & peak bytes of the product
+        """
+
+        relationMatrices, statistics = self.__getChainStatistics(metaPath)
+        cost, order = MetaPathMatrixUtility.findMultiplicationOrder(relationMatrices)
+
+        def estimateProduct(order):
+            if not isinstance(order, tuple):
+                shape, nonZeros = statistics[order]
+                return order, order, shape, nonZeros, 0.0, self.getSparseBytes(shape, nonZeros)
+
+            leftStart, leftEnd, leftShape, leftNonZeros, leftCost, leftPeak = estimateProduct(order[0])
+            rightStart, rightEnd, rightShape, rightNonZeros, rightCost, rightPeak = estimateProduct(order[1])
+            shape = (leftShape[0], rightShape[1])
+            nonZeros = MetaPathMatrixUtility.estimateProductNonZeros(leftShape, leftNonZeros, rightShape, rightNonZeros)
+            intermediates.append((list(metaPath[leftStart:rightEnd+2]), nonZeros))
+
+            # Both operands & the result are held while multiplying
+            productBytes = self.getSparseBytes(leftShape, leftNonZeros) + \
+                self.getSparseBytes(rightShape, rightNonZeros) + self.getSparseBytes(shape, nonZeros)
+            multiplications = leftCost + rightCost + MetaPathMatrixUtility.estimateProductCost(
+                leftShape, leftNonZeros, rightShape, rightNonZeros
+            )
+            return leftStart, rightEnd, shape, nonZeros, multiplications, max(leftPeak, rightPeak, productBytes)
+
+        start, end, shape, nonZeros, multiplications, peakBytes = estimateProduct(order)
+        return shape, nonZeros, multiplications, peakBytes
+
+
+    def __estimateFactorBytes(self, metaPath):
+        """
+          Estimates the bytes of the two factors of the final product of a meta path, which are held in memory when
+          computing it out of core
+        """
+
+        relationMatrices, statistics = self.__getChainStatistics(metaPath)
+        cost, order = MetaPathMatrixUtility.findMultiplicationOrder(relationMatrices)
+        if not isinstance(order, tuple):
+            shape, nonZeros = statistics[0]
+            return self.getSparseBytes(shape, nonZeros)
+
+        def countRelations(order):
+            return countRelations(order[0]) + countRelations(order[1]) if isinstance(order, tuple) else 1
+
+        split = countRelations(order[0])
+        factorBytes = 0
+        for subPath in [metaPath[:split+1], metaPath[split:]]:
+            shape, nonZeros, multiplications, peakBytes = self.__estimateChain(subPath, [])
+            factorBytes += self.getSparseBytes(shape, nonZeros)
+        return factorBytes
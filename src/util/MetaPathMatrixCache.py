@@ -0,0 +1,201 @@
+import hashlib
+import os
+import tempfile
+from zipfile import BadZipfile
+import numpy
+from scipy.sparse import csr_matrix
+from src.model.edge.ReversedEdgeType import ReversedEdgeType
+
+__author__ = 'jontedesco'
+
+
+class MetaPathMatrixCache(object):
+    """
+      Persistent on-disk cache of meta path matrices (and adjacency tensors, as lists of matrix layers), so that reruns
+      & sibling scripts load matrices instead of recomputing them. Entries are the CSR arrays of the matrices in 'npz'
+      files, keyed by a content fingerprint of the graph and a canonical signature of the meta path, so entries of other
+      (or changed) graphs are never read.
+
+      Entries are written to a temporary file & renamed into place, so that concurrent scripts never read partial
+      entries, and the least recently used entries are evicted once the cache grows past its size limit.
+    """
+
+    ENTRY_SUFFIX = '.npz'
+
+    def __init__(self, directory, fingerprint, maxBytes=2 ** 32):
+        """
+          Constructs a cache of the matrices of some graph
+
+            @param  directory   The directory holding the cache (created if it does not exist), which may be shared by
+                                the caches of several graphs
+            @param  fingerprint The content fingerprint of the graph
+            @param  maxBytes    The size of the cache directory past which entries are evicted
+        """
+
+        self.directory = directory
+        self.fingerprint = str(fingerprint)
+        self.maxBytes = maxBytes
+
+        if not os.path.isdir(self.directory):
+            try:
+                os.makedirs(self.directory)
+            except OSError:
+                if not os.path.isdir(self.directory):
+                    raise
+
+
+    @staticmethod
+    def getSignature(metaPath, kind='matrix'):
+        """
+          Get the canonical signature of a meta path, naming its node & edge types (i.e. 'matrix:author-paper-author')
+
+            @param  kind    The kind of entry, i.e. 'matrix' or 'tensor'
+        """
+
+        pathTypes = []
+        for pathType in metaPath:
+            if isinstance(pathType, ReversedEdgeType):
+                pathTypes.append('~' + pathType.edgeType.__name__)
+            elif isinstance(pathType, type):
+                pathTypes.append(pathType.__name__)
+            else:
+                pathTypes.append(str(pathType))
+
+        return '%s:%s' % (kind, '-'.join(pathTypes))
+
+
+    def getMetaPathMatrix(self, metaPath, computeMatrix):
+        """
+          Get the matrix of a meta path from the cache, or compute & store it if it is not cached
+
+            @param  computeMatrix   Function computing the (sparse) matrix
+        """
+
+        return self.getMetaPathMatrices(metaPath, lambda: [computeMatrix()])[0]
+
+
+    def getMetaPathMatrices(self, metaPath, computeMatrices, kind='matrix'):
+        """
+          Get the list of matrices of a meta path (i.e. the layers of its adjacency tensor) from the cache, or compute &
+          store them if they are not cached
+
+            @param  computeMatrices Function computing the list of (sparse) matrices
+        """
+
+        matrices = self.load(metaPath, kind)
+        if matrices is None:
+            matrices = [csr_matrix(matrix) for matrix in computeMatrices()]
+            self.store(metaPath, matrices, kind)
+        return matrices
+
+
+    def load(self, metaPath, kind='matrix'):
+        """
+          Load the matrices of a meta path, marking the entry as recently used
+
+            @return The list of sparse (CSR) matrices, or None if not cached (or if the entry is unreadable, in which
+                    case it is removed)
+        """
+
+        signature = self.getSignature(metaPath, kind)
+        entryPath = self.getEntryPath(metaPath, kind)
+        try:
+            with open(entryPath, 'rb') as entryFile:
+                entry = numpy.load(entryFile)
+                if str(entry['fingerprint']) != self.fingerprint or str(entry['signature']) != signature:
+                    return None
+                matrices = [
+                    csr_matrix(
+                        (entry['data%d' % i], entry['indices%d' % i], entry['indptr%d' % i]), shape=tuple(shape)
+                    )
+                    for i, shape in enumerate(entry['shapes'])
+                ]
+            os.utime(entryPath, None)
+        except (IOError, OSError):
+            return None
+        except (BadZipfile, KeyError, ValueError):
+
+            # Corrupt or truncated entry (i.e. written by an older version, or without atomic renames), so drop it
+            try:
+                os.remove(entryPath)
+            except OSError:
+                pass
+            return None
+
+        return matrices
+
+
+    def store(self, metaPath, matrices, kind='matrix'):
+        """
+          Atomically store the matrices of a meta path, then evict the least recently used entries if needed
+        """
+
+        signature = self.getSignature(metaPath, kind)
+        arrays = {
+            'fingerprint': numpy.array(self.fingerprint),
+            'signature': numpy.array(signature),
+            'shapes': numpy.array([matrix.shape for matrix in matrices]).reshape(len(matrices), 2),
+        }
+        for i, matrix in enumerate(matrices):
+            matrix = csr_matrix(matrix)
+            arrays['data%d' % i] = matrix.data
+            arrays['indices%d' % i] = matrix.indices
+            arrays['indptr%d' % i] = matrix.indptr
+
+        fileDescriptor, temporaryPath = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(fileDescriptor, 'wb') as temporaryFile:
+                numpy.savez(temporaryFile, **arrays)
+            os.rename(temporaryPath, self.getEntryPath(metaPath, kind))
+        except:
+            if os.path.exists(temporaryPath):
+                os.remove(temporaryPath)
+            raise
+
+        self.evict()
+
+
+    def evict(self):
+        """
+          Removes the least recently used entries until the cache is within its size limit
+        """
+
+        entries = []
+        for fileName in os.listdir(self.directory):
+            if not fileName.endswith(self.ENTRY_SUFFIX):
+                continue
+            try:
+                entryStat = os.stat(os.path.join(self.directory, fileName))
+                entries.append((entryStat.st_mtime, entryStat.st_size, fileName))
+            except OSError:
+                continue
+
+        totalBytes = sum([size for modifiedTime, size, fileName in entries])
+        for modifiedTime, size, fileName in sorted(entries):
+            if totalBytes <= self.maxBytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, fileName))
+            except OSError:
+                pass
+            totalBytes -= size
+
+
+    def getStorageBytes(self):
+        """
+          Get the total size of the entries in the cache directory
+        """
+
+        return sum([
+            os.path.getsize(os.path.join(self.directory, fileName))
+            for fileName in os.listdir(self.directory) if fileName.endswith(self.ENTRY_SUFFIX)
+        ])
+
+
+    def getEntryPath(self, metaPath, kind='matrix'):
+        """
+          Get the path of the entry file of some meta path, for this graph
+        """
+
+        entryName = hashlib.md5(self.fingerprint + '|' + self.getSignature(metaPath, kind)).hexdigest()
+        return os.path.join(self.directory, entryName + self.ENTRY_SUFFIX)
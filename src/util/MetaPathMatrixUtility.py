@@ -0,0 +1,785 @@
+import multiprocessing
+import numpy
+from scipy.sparse import csr_matrix, identity, vstack
+from src.graph.Graph import Graph
+from src.model.edge.Edge import Edge
+from src.model.edge.ReversedEdgeType import ReversedEdgeType
+from src.util.FactorizedMetaPathMatrix import FactorizedMetaPathMatrix
+from src.util.OnDiskSparseMatrix import OnDiskSparseMatrix
+
+__author__ = 'jontedesco'
+
+
+# State of the worker processes of a pool, given to each worker by the pool initializer, so that it is never set in the
+# parent process (where several pools may be in use at once)
+_workerState = None
+
+
+def _initializeWorker(state):
+    """
+      Initializer of pool worker processes, which keep the (read-only) state of the pool's tasks, inherited when forked
+    """
+
+    global _workerState
+    _workerState = state
+
+
+def _applyWorker(task):
+    """
+      Applies the worker of a task to the state of the worker process
+    """
+
+    worker, block = task
+    return worker(_workerState, block)
+
+
+def _buildRelationMatrixRows(state, block):
+    """
+      Worker for building a block of rows of one of several relation matrices, returned as (data, row, col) lists
+
+        @param  block   The index of the relation matrix in the state & the range of its rows
+    """
+
+    matrixUtility, relations = state
+    relationIndex, rowRange = block
+    fromNodes, fromNodesIndex, toNodesIndex, toType = relations[relationIndex]
+
+    data, row, col = [], [], []
+    for node in fromNodes[rowRange[0]:rowRange[1]]:
+        for neighbor, numberOfEdges in matrixUtility._getEdgeCounts(node, toType):
+            row.append(fromNodesIndex[node])
+            col.append(toNodesIndex[neighbor])
+            data.append(numberOfEdges)
+
+    return data, row, col
+
+
+def _multiplyRowBlock(matrices, rowRange):
+    """
+      Worker for multiplying a block of rows of the first matrix of a chain by the rest of the chain, left to right
+    """
+
+    rows = matrices[0][rowRange[0]:rowRange[1]]
+    for matrix in matrices[1:]:
+        rows = rows * matrix
+    return csr_matrix(rows)
+
+
+class MetaPathMatrixUtility(object):
+    """
+      Computes meta path matrices (commuting matrices) as products of the sparse relation matrices between consecutive
+      types of a meta path. Rows & columns of every matrix are indexed by the nodes of the corresponding type, in the
+      order given by getNodeIndex.
+
+      Products are not simply evaluated left to right, since the association order can change the number of non-zeros
+      in intermediate results by orders of magnitude. Instead, the order is chosen with matrix-chain dynamic programming
+      over estimated non-zeros, and the halves of symmetric meta paths are only computed once.
+
+      Given more than one process, relation matrices and products are built in blocks of rows by forked process pools,
+      which share the graph and operands read-only through their initializers, and the blocks are stacked at the end.
+      Pools are forked once per batch of relation matrices and once per meta path matrix, rather than per product.
+
+      Meta paths may name the edge types between consecutive node types, i.e. [Paper, Citation, Paper, Author] for
+      papers citing papers, or [Paper, ReversedEdgeType(Citation), Paper, Author] for papers cited by papers. The
+      relation matrices of graphs are taken from the graph's own cache of typed relation matrices.
+
+      Meta path matrices are cached, and kept fresh as edges are added to the graph (see notifyEdgesAdded) with sparse
+      corrections on the rows & columns touched by the new edges, rather than recomputed. Caches built from graphs are
+      dropped if the graph's fingerprint shows it changed otherwise.
+    """
+
+    # Number of row blocks given to each process, so that skewed blocks do not leave processes idle
+    BLOCKS_PER_PROCESS = 4
+
+    def __init__(self, graph, symmetric=False, processes=1):
+        """
+          Constructs a meta path matrix utility for some graph
+
+            @param  graph       The graph from which to build relation matrices
+            @param  symmetric   Whether or not edges must exist in both directions to be counted in relation matrices
+            @param  processes   The number of processes used to build relation matrices & products
+        """
+
+        self.graph = graph
+        self.symmetric = symmetric
+        self.processes = processes
+
+        # Caches of node orderings by type, relation matrices by pairs of types & edge type, whether relations are
+        # mirrored, and meta path matrices by meta path (as a tuple)
+        self.nodeIndices = {}
+        self.relationMatrices = {}
+        self.mirroredRelations = {}
+        self.metaPathMatrices = {}
+
+        # Fingerprint of the graph the caches were built from, to detect changes to graphs not told to notifyEdgesAdded
+        self.graphFingerprint = None
+
+
+    def getNodeIndex(self, nodeType):
+        """
+          Get the nodes of some type, and an index from each of these nodes to its row / column in meta path matrices
+
+            @return A tuple of the list of nodes, and a dictionary of node to index
+        """
+
+        self.__validateCaches()
+        if nodeType not in self.nodeIndices:
+            nodes = list(self._getNodesOfType(nodeType))
+            self.nodeIndices[nodeType] = (nodes, {nodes[i]: i for i in xrange(0, len(nodes))})
+        return self.nodeIndices[nodeType]
+
+
+    def getRelationMatrix(self, fromType, toType, edgeType=None):
+        """
+          Get the sparse (CSR) relation matrix between two types, where entries are the number of edges between nodes
+
+            @param  edgeType    The type of edges to count (any edge if None), or a reversed edge type
+        """
+
+        self.__validateCaches()
+        if (fromType, toType, edgeType) not in self.relationMatrices:
+            self.__buildRelationMatrices([(fromType, toType, edgeType)])
+        return self.relationMatrices[(fromType, toType, edgeType)]
+
+
+    def getRelationMatrices(self, metaPath):
+        """
+          Get the relation matrices along some meta path, which may name edge types
+        """
+
+        nodeTypes, edgeTypes = self.splitMetaPath(metaPath)
+        relations = [(nodeTypes[i], nodeTypes[i+1], edgeTypes[i]) for i in xrange(0, len(nodeTypes)-1)]
+
+        self.__validateCaches()
+        self.__buildRelationMatrices([relation for relation in relations if relation not in self.relationMatrices])
+        return [self.relationMatrices[relation] for relation in relations]
+
+
+    def getMetaPathMatrix(self, metaPath):
+        """
+          Get the sparse (CSR) meta path matrix, where entries are the number of meta path instances between nodes
+        """
+
+        assert len(metaPath) >= 1
+
+        self.__validateCaches()
+        if tuple(metaPath) not in self.metaPathMatrices:
+            self.metaPathMatrices[tuple(metaPath)] = self.__computeMetaPathMatrix(metaPath)
+        return self.metaPathMatrices[tuple(metaPath)]
+
+
+    def __computeMetaPathMatrix(self, metaPath):
+        """
+          Computes the meta path matrix of some meta path
+        """
+
+        if len(metaPath) == 1:
+            return csr_matrix(identity(len(self.getNodeIndex(metaPath[0])[0]), dtype=int))
+
+        # Compute symmetric meta paths from the half path only, since M = C * C^T
+        if self.isSymmetricMetaPath(metaPath):
+            halfMatrix = self.getMetaPathMatrix(self.getHalfMetaPath(metaPath))
+            if self.processes <= 1:
+                return csr_matrix(halfMatrix * halfMatrix.transpose())
+            return self.__multiplyRowBlocks([halfMatrix, csr_matrix(halfMatrix.transpose())])
+
+        relationMatrices = self.getRelationMatrices(metaPath)
+        if self.processes <= 1:
+            return csr_matrix(self.multiplyMatrices(relationMatrices))
+        return self.__multiplyRowBlocks(relationMatrices)
+
+
+    def notifyEdgesAdded(self, edges):
+        """
+          Updates the cached relation & meta path matrices after edges were added to the graph, at a cost proportional
+          to the rows touched by the new edges rather than to the size of the matrices. Nodes new to the graph are
+          appended to the node indices, growing matrices with empty rows & columns. Relation matrices change by some
+          D_k only on the rows of the endpoints of new edges, and the change of a meta path matrix R_1 * ... * R_n
+          telescopes into the sum of (R'_1 * ... * R'_{k-1}) * D_k * (R_{k+1} * ... * R_n) over the changed relations,
+          each a product of thin matrices (the columns of the prefix & rows of the suffix at the touched nodes).
+
+            @param  edges   The (source, destination) pairs of the edges added to the graph, in the order added
+            @return Dictionary of each cached meta path (as a tuple) that changed to the (sparse) change of its matrix
+        """
+
+        if isinstance(self.graph, Graph):
+            self.graphFingerprint = self.graph.fingerprint()
+
+        touchedNodes, touchedNodesSet = [], set()
+        for edge in edges:
+            for node in edge[:2]:
+                if node not in touchedNodesSet:
+                    touchedNodesSet.add(node)
+                    touchedNodes.append(node)
+
+        # Append new nodes to the node indices, and grow cached matrices to match. Nodes of graphs are appended in the
+        # graph's own order (including new nodes without edges), which indexes the relation matrices it builds.
+        self._refreshNodeTypes()
+        for nodeType, (nodes, nodesIndex) in self.nodeIndices.iteritems():
+            if isinstance(self.graph, Graph):
+                newNodes = self.graph.getNodeIndex(nodeType)[0][len(nodes):]
+            else:
+                newNodes = [node for node in touchedNodes if self._isNodeOfType(node, nodeType)]
+            for node in newNodes:
+                if node not in nodesIndex:
+                    nodesIndex[node] = len(nodes)
+                    nodes.append(node)
+        for key in self.relationMatrices.keys():
+            shape = (len(self.nodeIndices[key[0]][0]), len(self.nodeIndices[key[1]][0]))
+            self.relationMatrices[key] = self.__resize(self.relationMatrices[key], shape)
+        for metaPath in self.metaPathMatrices.keys():
+            if len(metaPath) == 1:
+                self.metaPathMatrices[metaPath] = self.__computeMetaPathMatrix(metaPath)
+                continue
+            nodeTypes, edgeTypes = self.splitMetaPath(metaPath)
+            shape = (len(self.nodeIndices[nodeTypes[0]][0]), len(self.nodeIndices[nodeTypes[-1]][0]))
+            self.metaPathMatrices[metaPath] = self.__resize(self.metaPathMatrices[metaPath], shape)
+
+        # Rebuild the touched rows of each cached relation matrix, giving the change of each relation
+        relationDeltas = {}
+        for key, relationMatrix in self.relationMatrices.iteritems():
+            fromType, toType, edgeType = key
+            fromNodes, fromNodesIndex = self.nodeIndices[fromType]
+            toNodes, toNodesIndex = self.nodeIndices[toType]
+            rows = [fromNodesIndex[node] for node in touchedNodes if node in fromNodesIndex]
+            if not rows:
+                continue
+
+            data, row, col = [], [], []
+            for i in rows:
+                for neighbor, numberOfEdges in self.__getRelationCounts(fromNodes[i], toType, edgeType):
+                    row.append(i)
+                    col.append(toNodesIndex[neighbor])
+                    data.append(numberOfEdges)
+            touchedRows = csr_matrix((data, (row, col)), shape=relationMatrix.shape)
+
+            rowSelector = self.__getRowSelector(rows, relationMatrix.shape[0])
+            delta = csr_matrix(touchedRows - rowSelector.transpose() * (rowSelector * relationMatrix))
+            delta.eliminate_zeros()
+            if delta.nnz > 0:
+                relationDeltas[key] = delta
+
+        if not relationDeltas:
+            return {}
+
+        updatedRelationMatrices = {
+            key: csr_matrix(self.relationMatrices[key] + delta) for key, delta in relationDeltas.iteritems()
+        }
+
+        # Apply the telescoping sum of thin corrections to each cached meta path matrix along changed relations
+        metaPathDeltas = {}
+        for metaPath in self.metaPathMatrices.keys():
+            nodeTypes, edgeTypes = self.splitMetaPath(metaPath)
+            keys = [(nodeTypes[i], nodeTypes[i+1], edgeTypes[i]) for i in xrange(0, len(nodeTypes)-1)]
+
+            metaPathDelta = None
+            for k in xrange(0, len(keys)):
+                if keys[k] not in relationDeltas:
+                    continue
+
+                delta = relationDeltas[keys[k]]
+                rows = numpy.unique(delta.nonzero()[0])
+                prefixColumns = self.__getRowSelector(rows, delta.shape[0]).transpose()
+                for j in reversed(xrange(0, k)):
+                    prefixColumns = updatedRelationMatrices.get(keys[j], self.relationMatrices[keys[j]]) * prefixColumns
+                suffixRows = delta[rows]
+                for j in xrange(k+1, len(keys)):
+                    suffixRows = suffixRows * self.relationMatrices[keys[j]]
+
+                term = csr_matrix(prefixColumns * suffixRows)
+                metaPathDelta = term if metaPathDelta is None else metaPathDelta + term
+
+            if metaPathDelta is not None:
+                metaPathDelta = csr_matrix(metaPathDelta)
+                metaPathDelta.eliminate_zeros()
+                self.metaPathMatrices[metaPath] = csr_matrix(self.metaPathMatrices[metaPath] + metaPathDelta)
+                metaPathDeltas[metaPath] = metaPathDelta
+
+        self.relationMatrices.update(updatedRelationMatrices)
+        self.mirroredRelations = {}
+
+        return metaPathDeltas
+
+
+    def getMetaPathMatrixRows(self, metaPath, sourceNodes):
+        """
+          Get only the rows of a meta path matrix for some source nodes, by multiplying the indicator vectors of the
+          source nodes along the chain from the left, so the cost is proportional to the paths from the source nodes
+          rather than to the whole meta path matrix
+
+            @param  sourceNodes The nodes (of the first type of the meta path) whose rows to compute
+            @return The sparse (CSR) len(sourceNodes) x N matrix, with the row of each source node in the given order
+        """
+
+        nodes, nodesIndex = self.getNodeIndex(self.splitMetaPath(metaPath)[0][0])
+        rowSelector = self.__getRowSelector([nodesIndex[node] for node in sourceNodes], len(nodes))
+
+        if tuple(metaPath) in self.metaPathMatrices:
+            return csr_matrix(rowSelector * self.metaPathMatrices[tuple(metaPath)])
+
+        rows = rowSelector
+        for relationMatrix in self.getRelationMatrices(metaPath):
+            rows = rows * relationMatrix
+        return csr_matrix(rows)
+
+
+    def getMetaPathDiagonal(self, metaPath, nodes):
+        """
+          Get the diagonal entries of a meta path matrix (i.e. the number of cycles used to normalize PathSim) for some
+          nodes only. For symmetric meta paths, these are the squared norms of the half path rows of the nodes.
+
+            @return The array of diagonal entries, in the order of the given nodes
+        """
+
+        nodeTypes, edgeTypes = self.splitMetaPath(metaPath)
+        assert nodeTypes[0] == nodeTypes[-1]
+
+        if self.isSymmetricMetaPath(metaPath):
+            halfRows = self.getMetaPathMatrixRows(self.getHalfMetaPath(metaPath), nodes)
+            return numpy.asarray(halfRows.multiply(halfRows).sum(axis=1)).ravel()
+
+        rows = self.getMetaPathMatrixRows(metaPath, nodes)
+        nodesIndex = self.getNodeIndex(nodeTypes[0])[1]
+        return numpy.array([rows[i, nodesIndex[nodes[i]]] for i in xrange(0, len(nodes))])
+
+
+    def getEdgeCutMatrices(self, metaPath):
+        """
+          Get the number of distinct edges used at each step of a meta path by the path instances between each pair of
+          nodes (the layers of the meta path's adjacency tensor), without enumerating path instances. An edge (u, v) at
+          step k lies on a path instance from s to e exactly when u is reachable from s along the first k steps, and e
+          is reachable from v along the remaining steps, so layer k is B(P_k) * B(R_k) * B(S_k), for B the boolean
+          pattern of a matrix, P_k and S_k the prefix & suffix meta path matrices, and R_k the relation matrix at step k.
+
+            @return The list of sparse (CSR) matrices of each step
+        """
+
+        relationMatrices = [self.__toBoolean(relationMatrix) for relationMatrix in self.getRelationMatrices(metaPath)]
+        steps = len(relationMatrices)
+
+        # Boolean patterns of the prefix & suffix matrices of each step
+        prefixMatrices = [csr_matrix(identity(relationMatrices[0].shape[0], dtype=int))]
+        for k in xrange(0, steps-1):
+            prefixMatrices.append(self.__toBoolean(prefixMatrices[k] * relationMatrices[k]))
+        suffixMatrices = [csr_matrix(identity(relationMatrices[-1].shape[1], dtype=int))]
+        for k in reversed(xrange(1, steps)):
+            suffixMatrices.insert(0, self.__toBoolean(relationMatrices[k] * suffixMatrices[0]))
+
+        return [
+            csr_matrix(self.multiplyMatrices([prefixMatrices[k], relationMatrices[k], suffixMatrices[k]]))
+            for k in xrange(0, steps)
+        ]
+
+
+    def getFactorizedMetaPathMatrix(self, metaPath):
+        """
+          Get the meta path matrix of a symmetric meta path, stored as its half path matrix only
+        """
+
+        assert self.isSymmetricMetaPath(metaPath)
+        return FactorizedMetaPathMatrix(self.getMetaPathMatrix(self.getHalfMetaPath(metaPath)))
+
+
+    def getOutOfCoreMetaPathMatrix(self, metaPath, directory, rowsPerPanel=1000):
+        """
+          Get the meta path matrix of a meta path whose matrix is too large to hold in memory. The chain is split into
+          two factors where the least estimated cost order makes its last product (or into half paths, for symmetric
+          meta paths), and panels of rows of the left factor are multiplied by the right factor and spilled to disk.
+
+            @param  directory       The (existing) directory in which to store the matrix
+            @param  rowsPerPanel    The number of rows of the meta path matrix computed & held in memory at once
+            @return The meta path matrix, as an on-disk sparse matrix
+        """
+
+        assert len(metaPath) >= 1
+
+        if self.isSymmetricMetaPath(metaPath):
+            leftMatrix = self.getMetaPathMatrix(self.getHalfMetaPath(metaPath))
+            rightMatrix = csr_matrix(leftMatrix.transpose())
+        else:
+            relationMatrices = self.getRelationMatrices(metaPath)
+            cost, order = self.findMultiplicationOrder(relationMatrices) if relationMatrices else (0, None)
+            if isinstance(order, tuple):
+                leftMatrix = csr_matrix(self.multiplyMatrices(relationMatrices, order[0]))
+                rightMatrix = csr_matrix(self.multiplyMatrices(relationMatrices, order[1]))
+            else:
+                leftMatrix = self.getMetaPathMatrix(metaPath)
+                rightMatrix = csr_matrix(identity(leftMatrix.shape[1], dtype=int))
+
+        numberOfRows = leftMatrix.shape[0]
+        panels = (
+            leftMatrix[start:min(start + rowsPerPanel, numberOfRows)] * rightMatrix
+            for start in xrange(0, numberOfRows, rowsPerPanel)
+        )
+        return OnDiskSparseMatrix.write(panels, (numberOfRows, rightMatrix.shape[1]), directory)
+
+
+    def isSymmetricMetaPath(self, metaPath):
+        """
+          Checks whether or not a meta path matrix is of the form C * C^T, i.e. the meta path has an odd number of node
+          types, reads the same in both directions, and each relation in the second half is the transpose of its mirror
+          in the first half
+        """
+
+        nodeTypes, edgeTypes = self.splitMetaPath(metaPath)
+        if len(nodeTypes) < 3 or len(nodeTypes) % 2 == 0 or nodeTypes != list(reversed(nodeTypes)):
+            return False
+
+        for i in xrange(0, len(nodeTypes)/2):
+            if not self.isMirroredRelation(nodeTypes[i], nodeTypes[i+1], edgeTypes[i], edgeTypes[-1-i]):
+                return False
+        return True
+
+
+    def isMirroredRelation(self, fromType, toType, edgeType=None, reverseEdgeType=None):
+        """
+          Checks whether or not the relation matrix from one type to another is the transpose of the reverse relation
+
+            @param  edgeType        The type of edges from the first type to the second
+            @param  reverseEdgeType The type of edges from the second type back to the first
+        """
+
+        if (fromType, toType, edgeType, reverseEdgeType) not in self.mirroredRelations:
+            forwardMatrix = self.getRelationMatrix(fromType, toType, edgeType)
+            reverseMatrix = self.getRelationMatrix(toType, fromType, reverseEdgeType)
+            isMirrored = (forwardMatrix - reverseMatrix.transpose()).nnz == 0
+            self.mirroredRelations[(fromType, toType, edgeType, reverseEdgeType)] = isMirrored
+            self.mirroredRelations[(toType, fromType, reverseEdgeType, edgeType)] = isMirrored
+
+        return self.mirroredRelations[(fromType, toType, edgeType, reverseEdgeType)]
+
+
+    @staticmethod
+    def splitMetaPath(metaPath):
+        """
+          Splits a meta path into its node types and the edge types between them, where steps not naming an edge type
+          are given None
+
+            @return A tuple of the list of node types, and the list of edge types of each step
+        """
+
+        nodeTypes, edgeTypes = [], []
+        for pathType in metaPath:
+            isEdgeType = isinstance(pathType, ReversedEdgeType) or \
+                (isinstance(pathType, type) and issubclass(pathType, Edge))
+            if isEdgeType:
+                assert len(nodeTypes) == len(edgeTypes) + 1
+                edgeTypes.append(pathType)
+            else:
+                if len(edgeTypes) < len(nodeTypes):
+                    edgeTypes.append(None)
+                nodeTypes.append(pathType)
+
+        return nodeTypes, edgeTypes
+
+
+    @staticmethod
+    def getHalfMetaPath(metaPath):
+        """
+          Get the first half of a meta path with an odd number of node types, up to & including its middle node type
+        """
+
+        nodeTypes, edgeTypes = MetaPathMatrixUtility.splitMetaPath(metaPath)
+        middle = len(nodeTypes)/2
+        halfMetaPath = [nodeTypes[0]]
+        for i in xrange(0, middle):
+            halfMetaPath += [nodeTypes[i+1]] if edgeTypes[i] is None else [edgeTypes[i], nodeTypes[i+1]]
+        return halfMetaPath
+
+
+    @staticmethod
+    def estimateProductNonZeros(leftShape, leftNonZeros, rightShape, rightNonZeros):
+        """
+          Estimates the number of non-zeros in the product of two sparse matrices, assuming that non-zeros are
+          independently and uniformly distributed in each matrix
+        """
+
+        m, k = leftShape
+        n = rightShape[1]
+        if m == 0 or k == 0 or n == 0:
+            return 0.0
+
+        leftDensity = leftNonZeros / float(m * k)
+        rightDensity = rightNonZeros / float(k * n)
+
+        # Probability that an output entry has at least one of its k contributing products non-zero
+        return m * n * (1.0 - (1.0 - leftDensity * rightDensity) ** k)
+
+
+    @staticmethod
+    def estimateProductCost(leftShape, leftNonZeros, rightShape, rightNonZeros):
+        """
+          Estimates the number of scalar multiplications needed for the product of two sparse matrices, under the same
+          uniformity assumption used to estimate non-zeros
+        """
+
+        k = leftShape[1]
+        if k == 0:
+            return 0.0
+        return leftNonZeros * rightNonZeros / float(k)
+
+
+    @staticmethod
+    def findMultiplicationOrder(matrices):
+        """
+          Finds the association order for the product of a chain of sparse matrices with the least estimated cost, using
+          matrix-chain dynamic programming on estimated non-zeros.
+
+            @param  matrices    The chain of matrices to multiply (only shape & nnz are used)
+            @return The estimated cost, and the order as nested pairs of indices into the chain, i.e. ((0, 1), 2)
+        """
+
+        n = len(matrices)
+        assert n >= 1
+
+        # Shapes, estimated non-zeros, costs & best split points of each sub-chain [i, j]
+        shapes, nonZeros, costs, splits = {}, {}, {}, {}
+        for i in xrange(0, n):
+            shapes[i, i] = matrices[i].shape
+            nonZeros[i, i] = float(matrices[i].nnz)
+            costs[i, i] = 0.0
+
+        for length in xrange(2, n + 1):
+            for i in xrange(0, n - length + 1):
+                j = i + length - 1
+                for k in xrange(i, j):
+                    cost = costs[i, k] + costs[k+1, j] + MetaPathMatrixUtility.estimateProductCost(
+                        shapes[i, k], nonZeros[i, k], shapes[k+1, j], nonZeros[k+1, j]
+                    )
+                    if (i, j) not in costs or cost < costs[i, j]:
+                        costs[i, j] = cost
+                        splits[i, j] = k
+                shapes[i, j] = (shapes[i, i][0], shapes[j, j][1])
+                k = splits[i, j]
+                nonZeros[i, j] = MetaPathMatrixUtility.estimateProductNonZeros(
+                    shapes[i, k], nonZeros[i, k], shapes[k+1, j], nonZeros[k+1, j]
+                )
+
+        def buildOrder(i, j):
+            if i == j:
+                return i
+            return buildOrder(i, splits[i, j]), buildOrder(splits[i, j] + 1, j)
+
+        return costs[0, n-1], buildOrder(0, n-1)
+
+
+    @staticmethod
+    def multiplyMatrices(matrices, order=None):
+        """
+          Multiplies a chain of sparse matrices, in the given association order or the least estimated cost order
+
+            @param  matrices    The chain of matrices to multiply
+            @param  order       Nested pairs of indices into the chain, as returned by findMultiplicationOrder
+        """
+
+        if order is None:
+            cost, order = MetaPathMatrixUtility.findMultiplicationOrder(matrices)
+
+        if isinstance(order, tuple):
+            left, right = order
+            return MetaPathMatrixUtility.multiplyMatrices(matrices, left) * \
+                MetaPathMatrixUtility.multiplyMatrices(matrices, right)
+        return matrices[order]
+
+
+    def __validateCaches(self):
+        """
+          Clears the cached node indices & matrices if the graph changed since they were built, other than by edges
+          given to notifyEdgesAdded, as told by the graph's fingerprint
+        """
+
+        if not isinstance(self.graph, Graph):
+            return
+
+        graphFingerprint = self.graph.fingerprint()
+        if graphFingerprint != self.graphFingerprint:
+            self.nodeIndices, self.relationMatrices, self.mirroredRelations, self.metaPathMatrices = {}, {}, {}, {}
+            self.graphFingerprint = graphFingerprint
+
+
+    @staticmethod
+    def __getRowSelector(rows, size):
+        """
+          Get the sparse (CSR) len(rows) x size matrix selecting some rows when multiplied on the left (or columns, when
+          transposed & multiplied on the right)
+        """
+
+        return csr_matrix((numpy.ones(len(rows), dtype=int), (numpy.arange(len(rows)), rows)), shape=(len(rows), size))
+
+
+    @staticmethod
+    def __resize(matrix, shape):
+        """
+          Grows a sparse matrix to some shape, with empty rows & columns added at the end
+        """
+
+        if matrix.shape == shape:
+            return matrix
+
+        matrix = csr_matrix(matrix)
+        extraRows = numpy.repeat(matrix.indptr[-1], shape[0] - matrix.shape[0])
+        return csr_matrix((matrix.data, matrix.indices, numpy.concatenate([matrix.indptr, extraRows])), shape=shape)
+
+
+    def __getRelationCounts(self, node, toType, edgeType):
+        """
+          Get the row of some node in a relation matrix, as (neighbor, number of edges) pairs
+        """
+
+        if isinstance(self.graph, Graph) and edgeType is not None:
+            return self.graph.getRelationCounts(node, toType, edgeType, self.symmetric)
+
+        assert edgeType is None
+        return self._getEdgeCounts(node, toType)
+
+
+    @staticmethod
+    def __toBoolean(matrix):
+        """
+          Get the boolean pattern of a sparse matrix, as a CSR matrix of ones at its non-zeros
+        """
+
+        matrix = csr_matrix(matrix, dtype=int, copy=True)
+        matrix.eliminate_zeros()
+        matrix.data[:] = 1
+        return matrix
+
+
+    def __buildRelationMatrices(self, relations):
+        """
+          Builds the relation matrices of several (fromType, toType, edgeType) relations. Those of graphs are taken from
+          the graph's own cache, and the others are built from the edge counts of their nodes in blocks of rows, in a
+          single forked process pool when using more than one process.
+        """
+
+        builtRelations = []
+        for fromType, toType, edgeType in relations:
+            if (fromType, toType, edgeType) in self.relationMatrices or (fromType, toType, edgeType) in builtRelations:
+                continue
+
+            if isinstance(self.graph, Graph) and (self.processes <= 1 or edgeType is not None):
+                self.getNodeIndex(fromType), self.getNodeIndex(toType)
+                self.relationMatrices[(fromType, toType, edgeType)] = self.graph.getRelationMatrix(
+                    fromType, toType, edgeType, self.symmetric
+                )
+            else:
+                assert edgeType is None
+                builtRelations.append((fromType, toType, edgeType))
+
+        # Index the nodes of all relations before forking, so that workers share the same indices
+        relationStates, blocks = [], []
+        for i in xrange(0, len(builtRelations)):
+            fromType, toType, edgeType = builtRelations[i]
+            fromNodes, fromNodesIndex = self.getNodeIndex(fromType)
+            toNodes, toNodesIndex = self.getNodeIndex(toType)
+            relationStates.append((fromNodes, fromNodesIndex, toNodesIndex, toType))
+            blocks.extend([(i, rowRange) for rowRange in self.__getRowRanges(len(fromNodes))])
+
+        entries = [([], [], []) for relation in builtRelations]
+        blockEntries = self.__mapBlocks(_buildRelationMatrixRows, (self, relationStates), blocks)
+        for (i, rowRange), (blockData, blockRow, blockCol) in zip(blocks, blockEntries):
+            data, row, col = entries[i]
+            data.extend(blockData)
+            row.extend(blockRow)
+            col.extend(blockCol)
+
+        for i in xrange(0, len(builtRelations)):
+            fromType, toType, edgeType = builtRelations[i]
+            data, row, col = entries[i]
+            shape = (len(self.getNodeIndex(fromType)[0]), len(self.getNodeIndex(toType)[0]))
+            self.relationMatrices[(fromType, toType, edgeType)] = csr_matrix((data, (row, col)), shape=shape)
+
+
+    def __multiplyRowBlocks(self, matrices):
+        """
+          Multiplies a chain of sparse matrices in the least estimated cost order, in blocks of rows across a single
+          forked process pool. Any such order is a left spine ((M_1 * X_1) * X_2) ... * X_k, where each X_i is the
+          product of a later part of the chain, so the X_i are multiplied first (in their own order), and the blocks of
+          rows of M_1 are then carried through the spine in parallel.
+        """
+
+        cost, order = self.findMultiplicationOrder(matrices)
+
+        spine = []
+        while isinstance(order, tuple):
+            order, rightOrder = order
+            spine.insert(0, csr_matrix(self.multiplyMatrices(matrices, rightOrder)))
+        operands = [csr_matrix(matrices[order])] + spine
+
+        rowBlocks = self.__mapBlocks(_multiplyRowBlock, operands, self.__getRowRanges(operands[0].shape[0]))
+        return csr_matrix(vstack(rowBlocks, format='csr'))
+
+
+    def __getRowRanges(self, numberOfRows):
+        """
+          Splits rows into consecutive blocks, several per process so that skewed blocks do not leave processes idle
+
+            @return The list of (start, stop) ranges of the blocks (a single empty block if there are no rows)
+        """
+
+        numberOfBlocks = max(1, min(numberOfRows, self.processes * self.BLOCKS_PER_PROCESS))
+        blockSize = max(1, -(-numberOfRows // numberOfBlocks))
+        rowRanges = [(start, min(start + blockSize, numberOfRows)) for start in xrange(0, numberOfRows, blockSize)]
+        return rowRanges or [(0, 0)]
+
+
+    def __mapBlocks(self, worker, state, blocks):
+        """
+          Applies a worker to each block, in a forked process pool when using more than one process. The state is given
+          to the workers through the pool initializer, so concurrent calls never share it.
+
+            @param  worker  Module level function of the state & a block
+            @return The results of the worker for each block, in order
+        """
+
+        if self.processes <= 1 or len(blocks) <= 1:
+            return [worker(state, block) for block in blocks]
+
+        pool = multiprocessing.Pool(self.processes, _initializeWorker, (state,))
+        try:
+            return pool.map(_applyWorker, [(worker, block) for block in blocks])
+        finally:
+            pool.close()
+            pool.join()
+
+
+    def _getNodesOfType(self, nodeType):
+        """
+          Get the nodes of some type in the graph, in the graph's canonical order
+        """
+
+        return self.graph.getNodeIndex(nodeType)[0]
+
+
+    def _refreshNodeTypes(self):
+        """
+          Refreshes any state used to check the types of nodes, once before checking the types of new nodes
+        """
+
+        pass
+
+
+    def _isNodeOfType(self, node, nodeType):
+        """
+          Checks whether or not a node (possibly new to the graph) has some type
+        """
+
+        return node.__class__ == nodeType
+
+
+    def _getEdgeCounts(self, node, nodeType):
+        """
+          Get the successors of some node having the given type, along with the number of edges to each successor.
+          Follows the same rules as meta path enumeration, i.e. self loops are skipped, and edges must exist in both
+          directions when enforcing symmetry.
+        """
+
+        edgeCounts = []
+        for neighbor in self.graph.getSuccessors(node):
+            if neighbor == node or neighbor.__class__ != nodeType:
+                continue
+            if self.symmetric and not self.graph.hasEdge(neighbor, node):
+                continue
+            edgeCounts.append((neighbor, self.graph.getNumberOfEdges(node, neighbor)))
+
+        return edgeCounts
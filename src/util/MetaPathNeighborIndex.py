@@ -0,0 +1,97 @@
+import weakref
+import numpy
+from src.graph.Graph import Graph
+from src.util.EdgeBasedMetaPathUtility import EdgeBasedMetaPathUtility
+
+__author__ = 'jontedesco'
+
+
+class MetaPathNeighborIndex(object):
+    """
+      Precomputed meta path neighbors of every node of a meta path's first type, stored as CSR rows of reachable end
+      nodes with the number of meta paths reaching each. Built once per (graph, meta path), after which neighbors and
+      path counts of a node are read in time proportional to the length of its row. Indices are rebuilt once the
+      fingerprint of their graph shows it changed.
+    """
+
+    # Indices already built, by graph (weakly referenced), then by meta path & symmetry, with the graph fingerprint
+    __instances = weakref.WeakKeyDictionary()
+
+    def __init__(self, graph, metaPath, symmetric=False, metaPathUtility=None):
+        """
+          Builds the neighbor index for some meta path
+
+            @param  metaPathUtility The meta path utility used to count paths (defaults to the edge-based utility)
+        """
+
+        self.metaPath = metaPath
+        self.symmetric = symmetric
+        metaPathUtility = EdgeBasedMetaPathUtility() if metaPathUtility is None else metaPathUtility
+
+        # Rows are nodes of the first type, columns are the end nodes reached from any of them
+        self.sourceNodes = [node for node in graph.getNodesOfType(metaPath[0]) if node.__class__ == metaPath[0]]
+        self.sourceNodesIndex = {self.sourceNodes[i]: i for i in xrange(0, len(self.sourceNodes))}
+        self.neighborNodes = []
+        self.neighborNodesIndex = {}
+
+        indptr, indices, pathCounts = [0], [], []
+        for node in self.sourceNodes:
+            for neighbor, pathCount in metaPathUtility.countMetaPathsFrom(graph, node, metaPath, symmetric).iteritems():
+                if neighbor not in self.neighborNodesIndex:
+                    self.neighborNodesIndex[neighbor] = len(self.neighborNodes)
+                    self.neighborNodes.append(neighbor)
+                indices.append(self.neighborNodesIndex[neighbor])
+                pathCounts.append(pathCount)
+            indptr.append(len(indices))
+
+        self.indptr = numpy.array(indptr, dtype=int)
+        self.indices = numpy.array(indices, dtype=int)
+        self.pathCounts = numpy.array(pathCounts, dtype=int)
+
+
+    @staticmethod
+    def getInstance(graph, metaPath, symmetric=False):
+        """
+          Get the neighbor index for some graph & meta path, only building it if it has not been built already for the
+          current contents of the graph
+        """
+
+        graphInstances = MetaPathNeighborIndex.__instances.setdefault(graph, {})
+        key = (tuple(metaPath), symmetric)
+        graphFingerprint = graph.fingerprint() if isinstance(graph, Graph) else None
+        if key not in graphInstances or graphInstances[key][1] != graphFingerprint:
+            graphInstances[key] = (MetaPathNeighborIndex(graph, metaPath, symmetric), graphFingerprint)
+        return graphInstances[key][0]
+
+
+    def getRow(self, node):
+        """
+          Get the row of some node, as arrays of the column indices of its meta path neighbors and their path counts
+        """
+
+        assert(node.__class__ == self.metaPath[0])
+
+        if node not in self.sourceNodesIndex:
+            return numpy.array([], dtype=int), numpy.array([], dtype=int)
+
+        i = self.sourceNodesIndex[node]
+        start, end = self.indptr[i], self.indptr[i+1]
+        return self.indices[start:end], self.pathCounts[start:end]
+
+
+    def getNeighbors(self, node):
+        """
+          Get the meta path neighbors of some node
+        """
+
+        indices, pathCounts = self.getRow(node)
+        return [self.neighborNodes[j] for j in indices]
+
+
+    def getPathCounts(self, node):
+        """
+          Get a dictionary of the meta path neighbors of some node to the number of meta paths reaching each
+        """
+
+        indices, pathCounts = self.getRow(node)
+        return {self.neighborNodes[indices[j]]: pathCounts[j] for j in xrange(0, len(indices))}
@@ -1,5 +1,11 @@
+from collections import defaultdict
+import bisect
 import itertools
+import math
+import random
 import numpy
+from scipy.sparse import csr_matrix
+from scipy.stats import norm
 
 __author__ = 'jontedesco'
 
@@ -31,9 +37,15 @@ class MetaPathUtility(object):
                 metaPathNeighbors.add(node)
         return set(metaPathNeighbors)
 
-    def _findMetaPathsHelper(self, graph, node, metaPath, symmetric):
+    def _findMetaPathsHelper(self, graph, node, metaPath, symmetric, reverse=False):
         raise NotImplementedError("Implement a concrete subclass to find meta paths!")
 
+    def _countMetaPathsHelper(self, graph, node, metaPath, symmetric, countEdges=True, reverse=False):
+        raise NotImplementedError("Implement a concrete subclass to count meta paths!")
+
+    def _iterMetaPathsHelper(self, graph, node, metaPath, symmetric, countEdges=True):
+        raise NotImplementedError("Implement a concrete subclass to stream meta paths!")
+
     def findMetaPaths(self, graph, startingNode, endingNode, metaPath, symmetric=False):
         """
           Finds all paths that match the metaPath connecting the given nodes
@@ -49,6 +61,190 @@ class MetaPathUtility(object):
         else:
             return self.__findNonLoopMetaPaths(graph, startingNode, endingNode, metaPath, symmetric)
 
+    def iterMetaPaths(self, graph, startingNode, endingNode, metaPath, symmetric=False, aggregator=None):
+        """
+          Generator variant of 'findMetaPaths', which yields the same path instances depth-first instead of building
+          them all in memory. If the ending node is None, yields the paths to all meta path neighbors.
+
+            @param  aggregator  Optional object with an 'add(path)' method, called with each path instance as it is
+                                yielded (i.e. an EdgeCutAggregator)
+        """
+
+        assert(startingNode.__class__ == metaPath[0])
+        assert(endingNode is None or endingNode.__class__ == metaPath[-1])
+
+        if endingNode is not None and startingNode == endingNode:
+            if startingNode.__class__ != metaPath[-1]:
+                return
+
+            # Cycles, where each distinct sequence of nodes is only found once
+            for path, pathCount in self._iterMetaPathsHelper(graph, startingNode, metaPath[1:-1], symmetric, False):
+                if not graph.hasEdge(path[-1], startingNode):
+                    continue
+                if symmetric and not graph.hasEdge(startingNode, path[-1]):
+                    continue
+                path = list(path) + [startingNode]
+                if aggregator is not None:
+                    aggregator.add(path)
+                yield path
+
+        else:
+            for path, pathCount in self._iterMetaPathsHelper(graph, startingNode, metaPath[1:], symmetric):
+                if endingNode is not None and path[-1] is not endingNode:
+                    continue
+                for i in xrange(0, pathCount):
+                    pathInstance = list(path)
+                    if aggregator is not None:
+                        aggregator.add(pathInstance)
+                    yield pathInstance
+
+    def aggregateMetaPaths(self, graph, startingNode, endingNode, metaPath, aggregator, symmetric=False):
+        """
+          Streams the meta paths between the given nodes through an aggregator, without keeping the path instances
+
+            @return The aggregator
+        """
+
+        for _ in self.iterMetaPaths(graph, startingNode, endingNode, metaPath, symmetric, aggregator):
+            pass
+        return aggregator
+
+    def countMetaPaths(self, graph, startingNode, endingNode, metaPath, symmetric=False):
+        """
+          Counts the paths that match the metaPath connecting the given nodes, i.e. the length of the list returned by
+          'findMetaPaths', without building any path instances
+        """
+
+        # Check that the endpoints are of the correct types
+        assert(startingNode.__class__ == metaPath[0])
+        assert(endingNode.__class__ == metaPath[-1])
+
+        # Split logic based on whether or not the path should be a cycle
+        if startingNode == endingNode:
+            return self.__countLoopMetaPaths(graph, startingNode, metaPath, symmetric)
+        else:
+            return self.__countNonLoopMetaPaths(graph, startingNode, endingNode, metaPath, symmetric)
+
+    def countMetaPathsFrom(self, graph, startingNode, metaPath, symmetric=False):
+        """
+          Counts the paths that match the metaPath from the given node to each of its meta path neighbors, by
+          propagating per-node path counts one type at a time (memory is proportional to the frontier, not the number
+          of paths).
+
+            @return A dictionary of each meta path neighbor to the number of paths reaching it, where the starting node
+                    is counted as in 'countMetaPaths'
+        """
+
+        assert(startingNode.__class__ == metaPath[0])
+
+        pathCounts = dict(self._countMetaPathsHelper(graph, startingNode, metaPath[1:], symmetric))
+
+        # Paths back to the starting node are cycles, which are counted differently
+        pathCounts.pop(startingNode, None)
+        if startingNode.__class__ == metaPath[-1]:
+            numLoopPaths = self.__countLoopMetaPaths(graph, startingNode, metaPath, symmetric)
+            if numLoopPaths > 0:
+                pathCounts[startingNode] = numLoopPaths
+
+        return pathCounts
+
+    def estimateMetaPathCountsFrom(self, graph, startingNode, metaPath, symmetric=False, relativeError=0.05,
+                                   confidence=0.95, minWalks=100, maxWalks=100000, isConverged=None, randomState=None):
+        """
+          Estimates the number of paths that match the metaPath from the given node to each of its meta path neighbors
+          with typed random walks, for graphs where exact counts are too expensive (i.e. through hub nodes). Each walk
+          picks one of the edges to a node of the next type uniformly at random at each step, and is weighted by the
+          number of edges it could have picked at each step, so the mean weight of the walks ending at a node is an
+          unbiased estimate of its path count (as in 'countMetaPathsFrom', except that each edge of cycles is counted).
+
+          Walks are taken in batches of 'minWalks' until the confidence interval of the total number of paths from the
+          node is within the relative error, some other stopping rule is met, or the maximum number of walks is reached.
+
+            @param  relativeError   The relative half width of the interval of the total count at which to stop, or
+                                    None to only stop on the given stopping rule
+            @param  confidence      The confidence level of the intervals
+            @param  isConverged     Optional function called with the estimates after each batch, returning whether to
+                                    stop
+            @param  randomState     Optional random number generator (i.e. random.Random(seed)), for reproducible walks
+            @return A dictionary of each meta path neighbor reached to a tuple of its estimated path count & the half
+                    width of its confidence interval
+        """
+
+        assert(startingNode.__class__ == metaPath[0])
+
+        randomState = random if randomState is None else randomState
+        criticalValue = norm.ppf(0.5 + confidence / 2.0)
+
+        # Sums of walk weights & squared walk weights ending at each node
+        weightSums, squaredWeightSums = defaultdict(float), defaultdict(float)
+        steps = {}
+
+        numberOfWalks = 0
+        estimates = {}
+        while numberOfWalks < maxWalks:
+            for i in xrange(0, min(minWalks, maxWalks - numberOfWalks)):
+                endingNode, weight = self.__walkMetaPath(graph, startingNode, metaPath, symmetric, randomState, steps)
+                if weight > 0:
+                    weightSums[endingNode] += weight
+                    squaredWeightSums[endingNode] += weight ** 2
+            numberOfWalks += min(minWalks, maxWalks - numberOfWalks)
+
+            estimates = {
+                node: self.__getEstimate(weightSums[node], squaredWeightSums[node], numberOfWalks, criticalValue)
+                for node in weightSums
+            }
+            if isConverged is not None and isConverged(estimates):
+                break
+            if relativeError is not None:
+                totalCount, totalHalfWidth = self.__getEstimate(
+                    sum(weightSums.itervalues()), sum(squaredWeightSums.itervalues()), numberOfWalks, criticalValue
+                )
+                if totalHalfWidth <= relativeError * totalCount:
+                    break
+
+        return estimates
+
+    def __walkMetaPath(self, graph, startingNode, metaPath, symmetric, randomState, steps):
+        """
+          Takes a single typed random walk along a meta path, following the same rules as '_findMetaPathsHelper'
+
+            @param  steps   Cache of the neighbors & cumulative edge counts of nodes at each position of the meta path
+            @return The node at which the walk ends & the weight of the walk, which is zero for dead ends
+        """
+
+        node, weight = startingNode, 1.0
+        for position in xrange(1, len(metaPath)):
+            if (node, position) not in steps:
+                neighbors, cumulativeEdges = [], []
+                for neighbor in graph.getSuccessors(node):
+                    if neighbor == node or neighbor.__class__ != metaPath[position]:
+                        continue
+                    if symmetric and not (graph.hasEdge(neighbor, node) and graph.hasEdge(node, neighbor)):
+                        continue
+                    neighbors.append(neighbor)
+                    cumulativeEdges.append((cumulativeEdges[-1] if cumulativeEdges else 0) +
+                                           graph.getNumberOfEdges(node, neighbor))
+                steps[(node, position)] = (neighbors, cumulativeEdges)
+
+            neighbors, cumulativeEdges = steps[(node, position)]
+            if len(neighbors) == 0:
+                return None, 0.0
+
+            node = neighbors[bisect.bisect_right(cumulativeEdges, randomState.random() * cumulativeEdges[-1])]
+            weight *= cumulativeEdges[-1]
+
+        return node, weight
+
+    @staticmethod
+    def __getEstimate(weightSum, squaredWeightSum, numberOfWalks, criticalValue):
+        """
+          Get the mean of walk weights & the half width of its confidence interval, from the sums over all walks
+        """
+
+        mean = weightSum / numberOfWalks
+        variance = max(0.0, squaredWeightSum / numberOfWalks - mean ** 2)
+        return mean, criticalValue * math.sqrt(variance / numberOfWalks)
+
     def expandPartialMetaPath(self, partialMetaPath, repeatLastType=False):
         """
           Expands a partial meta path into a full one (i.e. ABC into ABCBA or ABCCBA)
@@ -90,11 +286,12 @@ class MetaPathUtility(object):
 
         homogeneous = metaPath[0] == metaPath[-1]
 
+        # Compute the projection's adjacency matrix directly, rather than building the projected graph
         if project:
-            projFunction = self.createHomogeneousProjection if homogeneous else self.createHeterogeneousProjection
-            projectedGraph = projFunction(graph, metaPath, symmetric)
-        else:
-            projectedGraph = graph
+            projectionMatrix, nodesIndex = self.getProjectionMatrix(graph, metaPath, symmetric)
+            return projectionMatrix.toarray(), nodesIndex
+
+        projectedGraph = graph
 
         if homogeneous:
             startNodes = projectedGraph.getNodes()
@@ -113,6 +310,48 @@ class MetaPathUtility(object):
 
         return adjacencyMatrix, nodesIndex
 
+    def getProjectionMatrix(self, graph, metaPath, symmetric=False):
+        """
+          Computes the weighted (sparse) adjacency matrix of the graph projection along some meta path, in a single pass
+          of per-source path counts, without building the projected graph. Entries are the number of edges the
+          projection would have between two nodes.
+
+            @return The CSR adjacency matrix, and the index of nodes into it (as for 'getAdjacencyMatrixFromGraph')
+        """
+
+        homogeneous = metaPath[0] == metaPath[-1]
+
+        startNodes = graph.getNodesOfType(metaPath[0])
+        startNodesIndex = {startNodes[i]: i for i in xrange(0, len(startNodes))}
+        if homogeneous:
+            endNodes, endNodesIndex = startNodes, startNodesIndex
+        else:
+            endNodes = graph.getNodesOfType(metaPath[-1])
+            endNodesIndex = {endNodes[i]: i for i in xrange(0, len(endNodes))}
+
+        data, row, col = [], [], []
+        for node in startNodes:
+            for neighbor, numPaths in self.countMetaPathsFrom(graph, node, metaPath).iteritems():
+                if neighbor not in endNodesIndex:
+                    continue
+                row.append(startNodesIndex[node])
+                col.append(endNodesIndex[neighbor])
+                data.append(numPaths)
+
+                # Symmetric projections also have the reverse edges, which are only in the matrix when homogeneous
+                if symmetric and homogeneous:
+                    row.append(endNodesIndex[neighbor])
+                    col.append(startNodesIndex[node])
+                    data.append(numPaths)
+
+        projectionMatrix = csr_matrix((data, (row, col)), shape=(len(startNodes), len(endNodes)), dtype=float)
+
+        nodesIndex = dict(startNodesIndex)
+        if not homogeneous:
+            nodesIndex.update(endNodesIndex)
+
+        return projectionMatrix, nodesIndex
+
     def __projectionHelper(self, graph, metaPath, symmetric=False, heterogeneous=False):
         """
           Helper method to assist in creating a projection over a graph using some meta path
@@ -129,11 +368,10 @@ class MetaPathUtility(object):
         for node in newGraph.getNodes():
             if not isinstance(node, metaPath[0]):
                 continue
-            neighbors = self.findMetaPathNeighbors(graph, node, metaPath)
-            for neighbor in neighbors:
+            pathCounts = self.countMetaPathsFrom(graph, node, metaPath)
+            for neighbor, numPaths in pathCounts.iteritems():
                 if not isinstance(neighbor, metaPath[-1]):
                     continue
-                numPaths = len(self.findMetaPaths(graph, node, neighbor, metaPath))
                 for i in xrange(0, numPaths):
                     newGraph.addEdge(node, neighbor)
                     if symmetric:
@@ -175,10 +413,63 @@ class MetaPathUtility(object):
 
         return returnPaths
 
+    def __countLoopMetaPaths(self, graph, startingNode, metaPath, symmetric):
+        """
+          Helper function to count meta paths, given that we know the start and end nodes are the same. Like
+          '__findLoopMetaPaths', each distinct sequence of nodes is only counted once.
+        """
+
+        if startingNode.__class__ != metaPath[-1]:
+            return 0
+
+        pathCounts = self._countMetaPathsHelper(graph, startingNode, metaPath[1:-1], symmetric, countEdges=False)
+
+        numPaths = 0
+        for endingNode, pathCount in pathCounts.iteritems():
+            if not graph.hasEdge(endingNode, startingNode):
+                continue
+            if symmetric and not graph.hasEdge(startingNode, endingNode):
+                continue
+            numPaths += pathCount
+
+        return numPaths
+
     def __findNonLoopMetaPaths(self, graph, startingNode, endingNode, metaPath, symmetric):
         """
-          Helper function to find meta paths, given that we know the start and end nodes are not the same
+          Helper function to find meta paths, given that we know the start and end nodes are not the same. Meets in the
+          middle, expanding paths from both endpoints to the middle type and joining them on shared middle nodes.
+        """
+
+        middle = len(metaPath) / 2
+        (forwardNeighbors, forwardPaths) = self._findMetaPathsHelper(
+            graph, startingNode, metaPath[1:middle+1], symmetric=symmetric
+        )
+        (backwardNeighbors, backwardPaths) = self._findMetaPathsHelper(
+            graph, endingNode, list(reversed(metaPath[middle:-1])), symmetric=symmetric, reverse=True
+        )
+
+        # Index the paths from the ending node by their middle node
+        backwardPathsByMiddleNode = defaultdict(list)
+        for backwardPath in backwardPaths:
+            backwardPathsByMiddleNode[backwardPath[0]].append(backwardPath)
+
+        paths = []
+        for forwardPath in forwardPaths:
+            for backwardPath in backwardPathsByMiddleNode.get(forwardPath[-1], []):
+                paths.append(list(forwardPath) + list(backwardPath[1:]))
+        return paths
+
+    def __countNonLoopMetaPaths(self, graph, startingNode, endingNode, metaPath, symmetric):
         """
+          Helper function to count meta paths, given that we know the start and end nodes are not the same. Like
+          '__findNonLoopMetaPaths', joins the path counts from both endpoints on shared middle nodes.
+        """
+
+        middle = len(metaPath) / 2
+        forwardPathCounts = self._countMetaPathsHelper(graph, startingNode, metaPath[1:middle+1], symmetric)
+        backwardPathCounts = self._countMetaPathsHelper(
+            graph, endingNode, list(reversed(metaPath[middle:-1])), symmetric, reverse=True
+        )
 
-        (metaPathNeighbors, paths) = self._findMetaPathsHelper(graph, startingNode, metaPath[1:], symmetric=symmetric)
-        return [list(path) for path in paths if path[-1] is endingNode]
+        return sum([pathCount * backwardPathCounts.get(middleNode, 0)
+                    for middleNode, pathCount in forwardPathCounts.iteritems()])
@@ -0,0 +1,150 @@
+import os
+import bisect
+import re
+import numpy
+from scipy.sparse import csr_matrix
+
+__author__ = 'jontedesco'
+
+
+class OnDiskSparseMatrix(object):
+    """
+      Sparse matrix too large to hold in memory, stored on disk as consecutive row panels in CSR format. The arrays of
+      each panel are memory mapped, so that rows & entries are read from disk on demand, and only the diagonal is kept
+      in memory. Mimics the parts of the scipy sparse matrix interface used for PathSim.
+    """
+
+    def __init__(self, directory):
+        """
+          Opens an on-disk sparse matrix previously written to some directory
+
+            @param  directory   The directory holding the matrix, as written by 'write'
+        """
+
+        self.directory = directory
+
+        header = numpy.load(os.path.join(directory, 'header.npy'))
+        self.shape = (int(header[0]), int(header[1]))
+        self.panelStarts = [int(start) for start in header[2:]]
+        self.__diagonal = numpy.load(os.path.join(directory, 'diagonal.npy'))
+
+        self.panels = []
+        for i in xrange(0, len(self.panelStarts)):
+            data, indices, indptr = [
+                numpy.load(self.__getPanelPath(directory, i, name), mmap_mode='r')
+                for name in ['data', 'indices', 'indptr']
+            ]
+            self.panels.append((data, indices, indptr))
+
+
+    @staticmethod
+    def write(panels, shape, directory):
+        """
+          Writes a sparse matrix to disk one row panel at a time, so that at most one panel is held in memory
+
+            @param  panels      Iterable of consecutive sparse row panels, which together form the matrix
+            @param  shape       The shape of the full matrix
+            @param  directory   The (existing) directory in which to store the matrix, replacing any matrix already
+                                written there
+            @return The matrix, opened from disk
+        """
+
+        # Remove the files of any matrix previously written here, header first, so that its panels are never read
+        fileNames = sorted(os.listdir(directory), key=lambda fileName: fileName != 'header.npy')
+        for fileName in fileNames:
+            isPanelFile = re.match(r'^panel-\d+-(data|indices|indptr)\.npy$', fileName) is not None
+            if isPanelFile or fileName in ['header.npy', 'diagonal.npy']:
+                os.remove(os.path.join(directory, fileName))
+
+        panelStarts = []
+        diagonal = None
+        start = 0
+        for panel in panels:
+            panel = csr_matrix(panel)
+            panel.sort_indices()
+
+            # Keep the diagonal in the type of the matrix entries
+            if diagonal is None:
+                diagonal = numpy.zeros(min(shape), dtype=panel.dtype)
+            elif numpy.result_type(diagonal, panel.dtype) != diagonal.dtype:
+                diagonal = diagonal.astype(numpy.result_type(diagonal, panel.dtype))
+
+            for name, array in [('data', panel.data), ('indices', panel.indices), ('indptr', panel.indptr)]:
+                numpy.save(OnDiskSparseMatrix.__getPanelPath(directory, len(panelStarts), name), array)
+
+            # Keep the diagonal entries falling within this panel
+            end = min(start + panel.shape[0], len(diagonal))
+            if end > start:
+                diagonal[start:end] = panel[:, start:end].diagonal()
+
+            panelStarts.append(start)
+            start += panel.shape[0]
+
+        assert start == shape[0]
+        if diagonal is None:
+            diagonal = numpy.zeros(min(shape), dtype=int)
+
+        numpy.save(os.path.join(directory, 'diagonal.npy'), diagonal)
+        numpy.save(os.path.join(directory, 'header.npy'), numpy.array([shape[0], shape[1]] + panelStarts, dtype=int))
+
+        return OnDiskSparseMatrix(directory)
+
+
+    def __getitem__(self, index):
+        """
+          Get the entry M[i, j], by binary search over the (sorted) column indices of row i
+        """
+
+        i, j = index
+        if i == j:
+            return self.__diagonal[i]
+
+        data, indices = self.__getRowArrays(i)
+        position = numpy.searchsorted(indices, j)
+        if position < len(indices) and indices[position] == j:
+            return data[position]
+        return 0
+
+
+    def diagonal(self):
+        """
+          Get the diagonal of M
+        """
+
+        return self.__diagonal
+
+
+    def getrow(self, i):
+        """
+          Get row i of M as a 1 x n sparse matrix, read into memory
+        """
+
+        data, indices = self.__getRowArrays(i)
+        return csr_matrix((numpy.array(data), numpy.array(indices), [0, len(indices)]), shape=(1, self.shape[1]))
+
+
+    def getStorageBytes(self):
+        """
+          Get the number of bytes used on disk by the files of the matrix (ignoring any other files in its directory)
+        """
+
+        paths = [os.path.join(self.directory, 'header.npy'), os.path.join(self.directory, 'diagonal.npy')]
+        for i in xrange(0, len(self.panelStarts)):
+            paths += [self.__getPanelPath(self.directory, i, name) for name in ['data', 'indices', 'indptr']]
+        return sum([os.path.getsize(path) for path in paths])
+
+
+    def __getRowArrays(self, i):
+        """
+          Get the memory mapped data & column indices of row i
+        """
+
+        panelIndex = bisect.bisect_right(self.panelStarts, i) - 1
+        data, indices, indptr = self.panels[panelIndex]
+        start, end = indptr[i - self.panelStarts[panelIndex]], indptr[i - self.panelStarts[panelIndex] + 1]
+        return data[start:end], indices[start:end]
+
+
+    @staticmethod
+    def __getPanelPath(directory, panelIndex, name):
+        return os.path.join(directory, 'panel-%d-%s.npy' % (panelIndex, name))
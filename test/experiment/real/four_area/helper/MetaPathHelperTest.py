@@ -0,0 +1,76 @@
+import shutil
+import tempfile
+import unittest
+import networkx
+from experiment.real.four_area.helper.FourAreaMetaPathMatrixUtility import FourAreaMetaPathMatrixUtility
+from experiment.real.four_area.helper.MetaPathHelper import getMetaPathMatrixDataBatch, typeAliases
+from src.util.MetaPathCompiler import MetaPathCompiler
+from src.util.MetaPathMatrixCache import MetaPathMatrixCache
+
+__author__ = 'jontedesco'
+
+
+class MetaPathHelperTest(unittest.TestCase):
+    """
+      Tests the meta path helpers of the 'four area' experiments
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+        # Small 'four area' style graph, with edges in both directions between authors, papers & conferences
+        self.graph = networkx.DiGraph()
+        self.nodeIndex = {
+            'author': {0: 'a0', 1: 'a1', 2: 'a2'}, 'paper': {0: 'p0', 1: 'p1', 2: 'p2', 3: 'p3'},
+            'conference': {0: 'c0', 1: 'c1'}
+        }
+        for source, destination in [
+            ('a0', 'p0'), ('a0', 'p1'), ('a1', 'p1'), ('a1', 'p2'), ('a2', 'p3'),
+            ('p0', 'c0'), ('p1', 'c0'), ('p2', 'c1'), ('p3', 'c1')
+        ]:
+            self.graph.add_edge(source, destination)
+            self.graph.add_edge(destination, source)
+        self.graph.graph['metaPathMatrixCache'] = MetaPathMatrixCache(self.directory, 'graph')
+
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+    def getCompiler(self):
+        """
+          Get a new compiler for the graph, without any computed sub-paths
+        """
+
+        return MetaPathCompiler(FourAreaMetaPathMatrixUtility(self.graph, self.nodeIndex), typeAliases)
+
+
+    def testBatchMatricesUseCache(self):
+        """
+          Tests that batches of meta path matrices are stored in the graph's cache, and that later compilers load them
+          from the cache instead of compiling them again
+        """
+
+        metaPaths = ['A-P-C-P-A', 'A-P-A']
+        metaPathMatrices = getMetaPathMatrixDataBatch(
+            self.graph, self.nodeIndex, metaPaths, compiler=self.getCompiler()
+        )
+
+        cache = self.graph.graph['metaPathMatrixCache']
+        matrixUtility = FourAreaMetaPathMatrixUtility(self.graph, self.nodeIndex)
+        for metaPath in [('author', 'paper', 'conference', 'paper', 'author'), ('author', 'paper', 'author')]:
+            self.assertIsNotNone(cache.load(list(metaPath)))
+            expectedMatrix = matrixUtility.getMetaPathMatrix(list(metaPath))
+            self.assertTrue(expectedMatrix.nnz > 0)
+            self.assertEquals(0, (expectedMatrix - metaPathMatrices[metaPath][0]).nnz)
+
+        # Only the cached meta paths are known to a new compiler, since no sub-paths were compiled
+        compiler = self.getCompiler()
+
+        cachedMatrices = getMetaPathMatrixDataBatch(self.graph, self.nodeIndex, metaPaths, compiler=compiler)
+        self.assertEquals(
+            {('author', 'paper', 'conference', 'paper', 'author'), ('author', 'paper', 'author')},
+            set(compiler.matrices.keys())
+        )
+        for metaPath in cachedMatrices:
+            self.assertEquals(0, (metaPathMatrices[metaPath][0] - cachedMatrices[metaPath][0]).nnz)
@@ -0,0 +1,131 @@
+import unittest
+import numpy
+from scipy.sparse import csr_matrix
+from experiment.real.four_area.helper.PathSimHelper import getTopPathSimScores, findAllMostSimilarNodes, \
+    getNeighborSimScore, getAbsNeighborSimScore, getNeighborSimGramMatrix, getColumnNorms, getGramNeighborSimScore, \
+    getNeighborSimScores, getTopNeighborSimScores
+
+__author__ = 'jontedesco'
+
+
+class PathSimHelperTest(unittest.TestCase):
+    """
+      Tests the batch PathSim & NeighborSim helpers of the 'four area' experiments against scoring pairs one at a time
+    """
+
+    def setUp(self):
+
+        # Symmetric meta path matrix (i.e. APCPA = APC * CPA) of a random 0/1 half path matrix, so many scores are tied
+        random = numpy.random.RandomState(0)
+        halfMatrix = csr_matrix((random.rand(12, 6) < 0.6).astype(int))
+        self.adjacencyMatrix = csr_matrix(halfMatrix * halfMatrix.transpose())
+
+        # Projection with small neighbor counts (i.e. PPA), where some column has no neighbors
+        projection = random.randint(1, 4, (15, 10)) * (random.rand(15, 10) < 0.3)
+        projection[:, 2] = 0
+        self.projection = csr_matrix(projection)
+
+
+    def getBruteForceTopScores(self, adjacencyMatrix, k):
+        """
+          Get the top-k PathSim scores of each row by scoring every pair, sorted by decreasing score & then by column
+        """
+
+        adjacencyMatrix = adjacencyMatrix.toarray()
+        topScores = []
+        for i in xrange(0, adjacencyMatrix.shape[0]):
+            scores = [
+                (2.0 * adjacencyMatrix[i, j] / (adjacencyMatrix[i, i] + adjacencyMatrix[j, j]), j)
+                for j in xrange(0, adjacencyMatrix.shape[1]) if j != i and adjacencyMatrix[i, j] > 0
+            ]
+            topScores.append(sorted(scores, key=lambda pair: (-pair[0], pair[1]))[:k])
+        return topScores
+
+
+    def testTopPathSimScoresMatchBruteForce(self):
+        """
+          Tests that the batch top-k PathSim scores match scoring every pair, including ties at the k-th score, for
+          several block sizes & for k larger than the rows
+        """
+
+        n = self.adjacencyMatrix.shape[0]
+        for k in [1, 2, 3, n + 5]:
+            expectedTopScores = self.getBruteForceTopScores(self.adjacencyMatrix, k)
+            for maxBlockEntries in [1, 5, 40, 2 ** 24]:
+                topIndices, topScores = getTopPathSimScores(self.adjacencyMatrix, k, maxBlockEntries)
+                self.assertEquals((n, k), topIndices.shape)
+                for i in xrange(0, n):
+                    expectedIndices = [j for score, j in expectedTopScores[i]]
+                    expectedScores = [score for score, j in expectedTopScores[i]]
+                    padding = k - len(expectedIndices)
+                    self.assertEquals(expectedIndices + [-1] * padding, list(topIndices[i]))
+                    self.assertTrue(numpy.allclose(expectedScores + [0] * padding, topScores[i]))
+
+
+    def testFindAllMostSimilarNodes(self):
+        """
+          Tests that the most similar nodes to every node exclude the node itself & nodes with zero scores
+        """
+
+        nodes = ['Node %d' % i for i in xrange(0, self.adjacencyMatrix.shape[0])]
+        extraData = {'fromNodes': nodes, 'toNodes': nodes}
+        mostSimilarNodes = findAllMostSimilarNodes(self.adjacencyMatrix, extraData, 3)
+
+        expectedTopScores = self.getBruteForceTopScores(self.adjacencyMatrix, 3)
+        for i in xrange(0, len(nodes)):
+            self.assertEquals([nodes[j] for score, j in expectedTopScores[i]], [
+                node for node, score in mostSimilarNodes[nodes[i]]
+            ])
+
+
+    def testNeighborSimScoresMatchPairScores(self):
+        """
+          Tests that NeighborSim scores from the Gram matrix & column norms of a projection match the scores of each
+          pair from the columns of the projection, for each variant of NeighborSim
+        """
+
+        n = self.projection.shape[1]
+        gramMatrix, columnNorms = getNeighborSimGramMatrix(self.projection), getColumnNorms(self.projection)
+        self.assertTrue(numpy.allclose(gramMatrix.diagonal(), columnNorms))
+
+        for smoothed in [False, True]:
+            for commonNeighbors in [True, False]:
+                scoreMethod = getNeighborSimScore if commonNeighbors else getAbsNeighborSimScore
+                expectedScores = numpy.array([
+                    [scoreMethod(self.projection, i, j, smoothed=smoothed) for j in xrange(0, n)] for i in xrange(0, n)
+                ])
+                scores = getNeighborSimScores(
+                    columnNorms, range(0, n), gramMatrix if commonNeighbors else None, smoothed, commonNeighbors
+                )
+                self.assertTrue(numpy.allclose(expectedScores, scores))
+
+                if commonNeighbors:
+                    gramScores = numpy.array([
+                        [getGramNeighborSimScore(gramMatrix, i, j, smoothed) for j in xrange(0, n)]
+                        for i in xrange(0, n)
+                    ])
+                    self.assertTrue(numpy.allclose(expectedScores, gramScores))
+
+
+    def testTopNeighborSimScoresMatchPairScores(self):
+        """
+          Tests that the batch top-k NeighborSim scores match the top scores of each column from scoring every pair, for
+          each variant of NeighborSim
+        """
+
+        n = self.projection.shape[1]
+        for smoothed in [False, True]:
+            for commonNeighbors in [True, False]:
+                scoreMethod = getNeighborSimScore if commonNeighbors else getAbsNeighborSimScore
+                for k in [1, 4, n + 5]:
+                    topIndices, topScores = getTopNeighborSimScores(
+                        self.projection, k, smoothed, commonNeighbors, maxBlockEntries=25
+                    )
+                    for i in xrange(0, n):
+                        expectedScores = sorted([
+                            scoreMethod(self.projection, i, j, smoothed=smoothed) for j in xrange(0, n) if j != i
+                        ], reverse=True)
+                        expectedScores = [score for score in expectedScores if score > 0][:k]
+                        numScores = len(expectedScores)
+                        self.assertTrue(numpy.allclose(expectedScores, topScores[i, :numScores]))
+                        self.assertTrue((topIndices[i, numScores:] == -1).all())
@@ -0,0 +1,120 @@
+import unittest
+import numpy
+from experiment.real.four_area.helper.SparseTensor import SparseTensor
+
+__author__ = 'jontedesco'
+
+
+class SparseTensorTest(unittest.TestCase):
+    """
+      Tests the sparse tensor against the same operations on dense (numpy) arrays of random tensors
+    """
+
+    def setUp(self):
+        self.random = numpy.random.RandomState(0)
+
+
+    def getRandomArray(self, shape, density=0.4):
+        """
+          Get a random dense array of small counts, where about the given fraction of entries are non-zero
+        """
+
+        return self.random.randint(1, 4, shape) * (self.random.rand(*shape) < density)
+
+
+    def testConversions(self):
+        """
+          Tests building tensors from dense arrays, coordinates & side by side layers, and converting them back
+        """
+
+        array = self.getRandomArray((5, 4, 3))
+        tensor = SparseTensor.fromDense(array)
+        self.assertEquals((5, 4, 3), tensor.shape)
+        self.assertTrue((array == tensor.toDense()).all())
+        self.assertEquals(numpy.count_nonzero(array), tensor.nnz)
+        self.assertEquals(array.sum(), tensor.sum())
+
+        # Layers placed side by side, as a M x (N * K) matrix
+        sideBySide = numpy.hstack([array[:, :, k] for k in xrange(0, 3)])
+        self.assertTrue((sideBySide == tensor.toScipy().toarray()).all())
+        self.assertEquals(tensor, SparseTensor.fromScipy(tensor.toScipy(), 3))
+        self.assertTrue((array == SparseTensor.fromScipy(sideBySide, 3).toDense()).all())
+
+        # Duplicate coordinates are summed
+        rows, columns, layers = numpy.nonzero(array)
+        data = array[rows, columns, layers]
+        tensor = SparseTensor.fromCoordinates(
+            array.shape, numpy.tile(rows, 2), numpy.tile(columns, 2), numpy.tile(layers, 2), numpy.tile(data, 2)
+        )
+        self.assertTrue((2 * array == tensor.toDense()).all())
+
+
+    def testIndexing(self):
+        """
+          Tests that entries, fibers & slices of the tensor match indexing the dense array
+        """
+
+        array = self.getRandomArray((5, 4, 3))
+        tensor = SparseTensor.fromDense(array)
+
+        for i in xrange(0, 5):
+            for j in xrange(0, 4):
+                self.assertTrue((array[i, j, :] == tensor[i, j, :]).all())
+                for k in xrange(0, 3):
+                    self.assertEquals(array[i, j, k], tensor[i, j, k])
+
+        for j in xrange(0, 4):
+            self.assertTrue((array[:, j, :] == tensor[:, j, :].toarray()).all())
+        for i in xrange(0, 5):
+            self.assertTrue((array[i, :, :] == tensor[i, :, :].toarray()).all())
+        for k in xrange(0, 3):
+            self.assertTrue((array[:, :, k] == tensor[:, :, k].toarray()).all())
+
+        for index in [
+            (slice(1, 4), slice(None), slice(None)),
+            (slice(None), slice(0, 2), slice(1, 3)),
+            (slice(0, 5, 2), slice(1, None), slice(None, None, -1))
+        ]:
+            self.assertTrue((array[index] == tensor[index].toDense()).all())
+        self.assertTrue((array[2, 1:3, ::2] == tensor[2, 1:3, ::2].toarray()).all())
+
+
+    def testArithmetic(self):
+        """
+          Tests element-wise arithmetic & layer sums against the dense arrays
+        """
+
+        firstArray, secondArray = self.getRandomArray((5, 4, 3)), self.getRandomArray((5, 4, 3))
+        first, second = SparseTensor.fromDense(firstArray), SparseTensor.fromDense(secondArray)
+
+        self.assertTrue((firstArray + secondArray == (first + second).toDense()).all())
+        self.assertTrue((firstArray - secondArray == (first - second).toDense()).all())
+        self.assertTrue((firstArray * secondArray == first.multiply(second).toDense()).all())
+        self.assertTrue((3 * firstArray == (3 * first).toDense()).all())
+        self.assertTrue((firstArray.sum(axis=2) == first.sumLayers().toarray()).all())
+        self.assertTrue((firstArray[:, :, [0, 2]].sum(axis=2) == first.sumLayers([0, 2]).toarray()).all())
+        self.assertTrue(first == SparseTensor.fromDense(firstArray))
+        self.assertTrue(first != second)
+
+
+    def testCompose(self):
+        """
+          Tests composing two tensors against summing the concatenated layers over each intermediate node connected to
+          both the row & column, by the first layer of each tensor
+        """
+
+        for firstShape, secondShape in [((5, 6, 2), (6, 4, 3)), ((3, 7, 1), (7, 3, 1)), ((4, 2, 3), (2, 5, 2))]:
+            firstArray, secondArray = self.getRandomArray(firstShape), self.getRandomArray(secondShape)
+
+            expectedArray = numpy.zeros((firstShape[0], secondShape[1], firstShape[2] + secondShape[2]), dtype=int)
+            for row in xrange(0, firstShape[0]):
+                for column in xrange(0, secondShape[1]):
+                    for i in xrange(0, firstShape[1]):
+                        if firstArray[row, i, 0] > 0 and secondArray[i, column, 0] > 0:
+                            expectedArray[row, column] += numpy.concatenate(
+                                [firstArray[row, i, :], secondArray[i, column, :]]
+                            )
+
+            tensor = SparseTensor.fromDense(firstArray).compose(SparseTensor.fromDense(secondArray))
+            self.assertEquals(expectedArray.shape, tensor.shape)
+            self.assertTrue((expectedArray == tensor.toDense()).all())
@@ -0,0 +1,48 @@
+import random
+import unittest
+from src.model.node.dblp.Author import Author
+from src.model.node.dblp.Conference import Conference
+from src.model.node.dblp.Paper import Paper
+from src.similarity.heterogeneous.ApproximatePathSimStrategy import ApproximatePathSimStrategy
+from src.similarity.heterogeneous.PathSimStrategy import PathSimStrategy
+from src.util.SampleGraphUtility import SampleGraphUtility
+
+__author__ = 'jontedesco'
+
+class ApproximatePathSimStrategyTest(unittest.TestCase):
+    """
+      Tests the random walk approximation of the PathSim similarity strategy
+    """
+
+    def testFindAllSimilarityFromNodeOnPathSimExampleThree(self):
+        """
+          Tests that the approximate top nodes match exact PathSim, and exact scores are within the estimated intervals,
+          using example 3 from PathSim paper
+        """
+
+        graph, authorMap, conferenceMap  = SampleGraphUtility.constructPathSimExampleThree()
+        metaPath = [Author, Paper, Conference, Paper, Author]
+        strategy = ApproximatePathSimStrategy(graph, metaPath, scoreError=0.05, randomState=random.Random(0))
+        exactStrategy = PathSimStrategy(graph, metaPath)
+
+        mike = authorMap['Mike']
+        self.assertEquals(exactStrategy.findMostSimilarNodes(mike, 3), strategy.findMostSimilarNodes(mike, 3))
+        for node, score, halfWidth in strategy.estimateSimilarityScores(mike, 3):
+            self.assertAlmostEquals(exactStrategy.findSimilarityScore(mike, node), score, delta=2 * halfWidth)
+
+
+    def testFindSimilarityOnNonSymmetricMetaPath(self):
+        """
+          Tests that scores along meta paths that are not symmetric are estimated with the same cycle counts as exact
+          PathSim, so exact scores are within the estimated intervals, using example 3 from PathSim paper
+        """
+
+        graph, authorMap, conferenceMap  = SampleGraphUtility.constructPathSimExampleThree()
+        metaPath = [Author, Paper, Conference, Paper, Author, Paper, Author]
+        strategy = ApproximatePathSimStrategy(graph, metaPath, scoreError=0.05, randomState=random.Random(0))
+        exactStrategy = PathSimStrategy(graph, metaPath)
+
+        mike = authorMap['Mike']
+        self.assertEquals(exactStrategy.findMostSimilarNodes(mike, 1), strategy.findMostSimilarNodes(mike, 1))
+        for node, score, halfWidth in strategy.estimateSimilarityScores(mike, 3):
+            self.assertAlmostEquals(exactStrategy.findSimilarityScore(mike, node), score, delta=2 * halfWidth)
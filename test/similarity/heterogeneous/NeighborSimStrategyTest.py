@@ -0,0 +1,57 @@
+import unittest
+import numpy
+from src.model.node.dblp.Author import Author
+from src.model.node.dblp.Conference import Conference
+from src.model.node.dblp.Paper import Paper
+from src.similarity.heterogeneous.NeighborSimStrategy import NeighborSimStrategy
+from src.util.SampleGraphUtility import SampleGraphUtility
+
+__author__ = 'jontedesco'
+
+class NeighborSimStrategyTest(unittest.TestCase):
+    """
+      Tests the NeighborSim similarity strategy
+    """
+
+    def testFindSimilarityPathSimExampleThree(self):
+        """
+          Tests NeighborSim scores & most similar nodes by shared conferences, using example 3 from PathSim paper
+        """
+
+        graph, authorMap, conferenceMap  = SampleGraphUtility.constructPathSimExampleThree()
+        strategy = NeighborSimStrategy(graph, [Conference, Paper, Author])
+
+        mike = authorMap['Mike']
+        self.assertAlmostEquals(1.0, strategy.findSimilarityScore(mike, authorMap['Bob']))
+        self.assertAlmostEquals(0.8, strategy.findSimilarityScore(mike, authorMap['Mary']))
+        self.assertAlmostEquals(0, strategy.findSimilarityScore(mike, authorMap['Ann']))
+        self.assertEquals(
+            [authorMap['Bob'], authorMap['Mary'], authorMap['Jim']], strategy.findMostSimilarNodes(mike, 5)
+        )
+
+
+    def testMostSimilarNodesMatchScores(self):
+        """
+          Tests that the most similar nodes found from the Gram matrix (or dense scores) are ordered by the scores of
+          all pairs, for each variant of NeighborSim
+        """
+
+        graph, authorMap, conferenceMap  = SampleGraphUtility.constructPathSimExampleThree()
+        authors = sorted(authorMap.values(), key=lambda author: author.name)
+
+        for smoothed in [False, True]:
+            for commonNeighbors in [False, True]:
+                strategy = NeighborSimStrategy(
+                    graph, [Conference, Paper, Author], smoothed=smoothed, commonNeighbors=commonNeighbors
+                )
+                scores = strategy.findSimilarityScoresMatrix(authors, authors)
+                mostSimilarNodes = strategy.findMostSimilarNodesBatch(authors, 3)
+                for i in xrange(0, len(authors)):
+                    self.assertAlmostEquals(
+                        strategy.findSimilarityScore(authors[i], authors[-1]), scores[i, len(authors) - 1]
+                    )
+                    expectedScores = sorted([
+                        scores[i, j] for j in xrange(0, len(authors)) if j != i and scores[i, j] > 0
+                    ], reverse=True)[:3]
+                    actualScores = [scores[i, authors.index(node)] for node in mostSimilarNodes[i]]
+                    self.assertTrue(numpy.allclose(expectedScores, actualScores))
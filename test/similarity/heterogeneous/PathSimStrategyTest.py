@@ -43,3 +43,108 @@ class PathSimStrategyTest(unittest.TestCase):
         mostSimilarNodes = strategy.findMostSimilarNodes(mike, 5)
 
         self.assertEquals([authorMap['Bob'], authorMap['Mary'], authorMap['Jim']], mostSimilarNodes)
+
+
+    def testPreparedScoresMatchPathCounts(self):
+        """
+          Tests that scores looked up from the prepared meta path matrix match those counted from meta paths, and that
+          the most similar nodes found from a single row are ordered by these scores
+        """
+
+        graph, authorMap, conferenceMap  = SampleGraphUtility.constructPathSimExampleThree()
+        metaPath = [Author, Paper, Conference, Paper, Author]
+        strategy = PathSimStrategy(graph, metaPath)
+        pathCountStrategy = PathSimStrategy(graph, metaPath, conserveMemory=True)
+        strategy.prepare()
+
+        authors = authorMap.values()
+        for source in authors:
+            scores = {}
+            for destination in authors:
+                scores[destination] = pathCountStrategy.findSimilarityScore(source, destination)
+                self.assertAlmostEquals(scores[destination], strategy.findSimilarityScore(source, destination))
+
+            mostSimilarNodes = strategy.findMostSimilarNodes(source)
+            self.assertEquals(
+                set([node for node in authors if node != source and scores[node] > 0]), set(mostSimilarNodes)
+            )
+            mostSimilarScores = [scores[node] for node in mostSimilarNodes]
+            self.assertEquals(sorted(mostSimilarScores, reverse=True), mostSimilarScores)
+
+
+    def testPrunedMostSimilarNodes(self):
+        """
+          Tests that top-k queries pruned by the upper bounds of scores give the top-k nodes of the full row
+        """
+
+        graph, authorMap, conferenceMap  = SampleGraphUtility.constructPathSimExampleThree()
+        metaPath = [Author, Paper, Conference, Paper, Author]
+        strategy = PathSimStrategy(graph, metaPath)
+        strategy.PRUNING_ROW_FRACTION, strategy.PRUNING_MIN_ROW_ENTRIES = 0, 0
+
+        for source in authorMap.values():
+            mostSimilarNodes = strategy.findMostSimilarNodes(source)
+            for number in xrange(0, len(authorMap) + 1):
+                self.assertEquals(mostSimilarNodes[:number], strategy.findMostSimilarNodes(source, number))
+
+
+    def testBatchQueriesMatchSingleQueries(self):
+        """
+          Tests that batch queries for several sources give the same scores & most similar nodes as single queries
+        """
+
+        graph, authorMap, conferenceMap  = SampleGraphUtility.constructPathSimExampleThree()
+        metaPath = [Author, Paper, Conference, Paper, Author]
+        strategy = PathSimStrategy(graph, metaPath)
+
+        authors = authorMap.values()
+        scores = strategy.findSimilarityScoresMatrix(authors, authors)
+        for i in xrange(0, len(authors)):
+            for j in xrange(0, len(authors)):
+                self.assertAlmostEquals(strategy.findSimilarityScore(authors[i], authors[j]), scores[i, j])
+
+        for number in [None, 2]:
+            self.assertEquals(
+                [strategy.findMostSimilarNodes(source, number) for source in authors],
+                strategy.findMostSimilarNodesBatch(authors, number)
+            )
+
+
+    def testNonSymmetricMetaPathScoresMatchPathCounts(self):
+        """
+          Tests that scores of meta paths that are not symmetric are still normalized by the cycle counts of the first
+          half of the meta path, both when looked up from the prepared matrix & when counted from meta paths
+        """
+
+        graph, authorMap, conferenceMap  = SampleGraphUtility.constructPathSimExampleThree()
+        metaPath = [Author, Paper, Conference, Paper, Author, Paper, Author]
+        strategy = PathSimStrategy(graph, metaPath)
+        pathCountStrategy = PathSimStrategy(graph, metaPath, conserveMemory=True)
+
+        # Mike & Bob share 5 'APCPA' paths, each continuing through Bob's 3 papers, and each has 56 * 2^2 + 22 * 1^2
+        # 'APCP' cycles (through the 56 papers of SIGMOD & 22 of VLDB)
+        mike, bob = authorMap['Mike'], authorMap['Bob']
+        self.assertAlmostEquals(2.0 * 15 / (246 + 246), strategy.findSimilarityScore(mike, bob))
+
+        authors = authorMap.values()
+        for source in authors:
+            for destination in authors:
+                self.assertAlmostEquals(
+                    pathCountStrategy.findSimilarityScore(source, destination),
+                    strategy.findSimilarityScore(source, destination)
+                )
+
+
+    def testMostSimilarNodesOnMetaPathEndingInOtherType(self):
+        """
+          Tests that meta paths ending in another type than they start with give no similar nodes, rather than nodes
+          of the start type at the indices of the reached nodes
+        """
+
+        graph, authorMap, conferenceMap  = SampleGraphUtility.constructPathSimExampleThree()
+        metaPath = [Author, Paper, Conference]
+        strategy = PathSimStrategy(graph, metaPath)
+
+        mike = authorMap['Mike']
+        self.assertEquals([], strategy.findMostSimilarNodes(mike, 5))
+        self.assertEquals([[], []], strategy.findMostSimilarNodesBatch([mike, authorMap['Bob']], 5))
@@ -0,0 +1,35 @@
+import unittest
+import numpy
+from src.model.node.dblp.Author import Author
+from src.model.node.dblp.Conference import Conference
+from src.model.node.dblp.Paper import Paper
+from src.similarity.heterogeneous.SimRankStrategy import SimRankStrategy
+from src.util.SampleGraphUtility import SampleGraphUtility
+
+__author__ = 'jontedesco'
+
+class SimRankStrategyTest(unittest.TestCase):
+    """
+      Tests the SimRank similarity strategy
+    """
+
+    def testMatrixScoresMatchRecursiveScores(self):
+        """
+          Tests that the scores iterated as matrices for the default recurrence match the scores of the recursive
+          computation, using example 3 from PathSim paper
+        """
+
+        graph, authorMap, conferenceMap  = SampleGraphUtility.constructPathSimExampleThree()
+        authors = sorted(authorMap.values(), key=lambda author: author.name)
+
+        for metaPath in [[Author, Paper, Conference, Paper, Author], [Conference, Paper, Author]]:
+            strategy = SimRankStrategy(graph, metaPath)
+            recursiveStrategy = SimRankStrategy(graph, metaPath, factor=lambda: SimRankStrategy.C)
+
+            scores = strategy.findSimilarityScoresMatrix(authors, authors)
+            for i in xrange(0, len(authors)):
+                for j in xrange(0, len(authors)):
+                    self.assertAlmostEquals(
+                        recursiveStrategy.findSimilarityScore(authors[i], authors[j]), scores[i, j], places=12
+                    )
+                    self.assertEquals(strategy.findSimilarityScore(authors[i], authors[j]), scores[i, j])
@@ -0,0 +1,67 @@
+import unittest
+import numpy
+from src.model.node.dblp.Author import Author
+from src.model.node.dblp.Conference import Conference
+from src.model.node.dblp.Paper import Paper
+from src.similarity.heterogeneous.path_shape_count.FlattenedMatrixStrategy import FlattenedMatrixStrategy
+from src.similarity.heterogeneous.path_shape_count.VectorProductStrategy import VectorProductStrategy
+from src.util.SampleGraphUtility import SampleGraphUtility
+
+__author__ = 'jontedesco'
+
+class PathShapeStrategyTest(unittest.TestCase):
+    """
+      Tests the path shape (ShapeSim) similarity strategies
+    """
+
+    def setUp(self):
+        self.graph, self.authorMap, self.conference, citationsPublications = \
+            SampleGraphUtility.constructSkewedCitationPublicationExample(introduceRandomness=False)
+        self.authors = sorted(self.authorMap.values(), key=lambda author: author.name)
+
+
+    def testSimilarityScoresMatrixMatchesPairScores(self):
+        """
+          Tests that the scores found for all pairs at once match the scores of each pair, for both strategies, with &
+          without omitting steps, including when only a few path sequences are kept
+        """
+
+        for strategyClass in [FlattenedMatrixStrategy, VectorProductStrategy]:
+            for weight, omit in [(1.0, []), (0.5, []), (1.0, [0])]:
+                for metaPath in [[Conference, Paper, Paper, Author], [Conference, Paper, Author]]:
+                    strategy = strategyClass(self.graph, weight, list(omit), metaPath, symmetric=True)
+                    pairStrategy = strategyClass(self.graph, weight, list(omit), metaPath, symmetric=True)
+                    boundedStrategy = strategyClass(self.graph, weight, list(omit), metaPath, symmetric=True)
+                    boundedStrategy.MAX_PATH_SEQUENCES = 2
+
+                    expectedScores = numpy.array([
+                        [pairStrategy.findSimilarityScore(source, destination) for destination in self.authors]
+                        for source in self.authors
+                    ])
+                    self.assertTrue(numpy.allclose(
+                        expectedScores, strategy.findSimilarityScoresMatrix(self.authors, self.authors)
+                    ))
+                    self.assertTrue(numpy.allclose(
+                        expectedScores, boundedStrategy.findSimilarityScoresMatrix(self.authors, self.authors)
+                    ))
+                    self.assertTrue(len(boundedStrategy.pathSequences) <= 2)
+
+
+    def testScoresRecomputedWhenGraphChanges(self):
+        """
+          Tests that scores found before the graph changes are discarded, rather than returned from the cache
+        """
+
+        alice, bob = self.authorMap['Alice'], self.authorMap['Bob']
+        strategy = FlattenedMatrixStrategy(self.graph, metaPath=[Conference, Paper, Author], symmetric=True)
+        oldScore = strategy.findSimilarityScore(alice, bob)
+
+        for i in xrange(0, 50):
+            paper = Paper(100000 + i, "Bob's New Paper %d" % i)
+            self.graph.addNode(paper)
+            self.graph.addBothEdges(bob, paper)
+            self.graph.addBothEdges(paper, self.conference)
+
+        newStrategy = FlattenedMatrixStrategy(self.graph, metaPath=[Conference, Paper, Author], symmetric=True)
+        self.assertNotAlmostEqual(oldScore, newStrategy.findSimilarityScore(alice, bob))
+        self.assertEquals(newStrategy.findSimilarityScore(alice, bob), strategy.findSimilarityScore(alice, bob))
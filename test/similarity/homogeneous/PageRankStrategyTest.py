@@ -1,4 +1,5 @@
 import unittest
+import numpy
 from src.similarity.homogeneous.PageRankStrategy import PageRankStrategy
 from src.util.SampleGraphUtility import SampleGraphUtility
 
@@ -40,3 +41,28 @@ class PageRankStrategyTest(unittest.TestCase):
         mostSimilarNodes = strategy.findMostSimilarNodes(mike, 1)
 
         self.assertEquals([authorMap['Ann']], mostSimilarNodes)
+
+
+    def testSimilarityScoresMatrixMatchesPairScores(self):
+        """
+          Tests that the scores of the BFS trees of all sources solved at once match PageRank on the tree of each
+          source, using example 3 from PathSim paper
+        """
+
+        graph, authorMap, conferenceMap  = SampleGraphUtility.constructPathSimExampleThree()
+        nodes = graph.getNodes()
+        strategy, pairStrategy = PageRankStrategy(graph), PageRankStrategy(graph)
+
+        scores = strategy.findSimilarityScoresMatrix(nodes, nodes)
+        expectedScores = numpy.array([
+            [pairStrategy.findSimilarityScore(source, destination) for destination in nodes] for source in nodes
+        ])
+        self.assertTrue(numpy.allclose(expectedScores, scores, rtol=0, atol=1e-12))
+
+        # Nodes with tied scores may be listed in either order, so compare the scores of the most similar nodes
+        mike = authorMap['Mike']
+        self.assertTrue(numpy.allclose(
+            [pairStrategy.findSimilarityScore(mike, node) for node in pairStrategy.findMostSimilarNodes(mike, 3)],
+            [pairStrategy.findSimilarityScore(mike, node) for node in strategy.findMostSimilarNodes(mike, 3)],
+            rtol=0, atol=1e-12
+        ))
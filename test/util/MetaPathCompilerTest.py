@@ -0,0 +1,96 @@
+import unittest
+from src.model.edge.ReversedEdgeType import ReversedEdgeType
+from src.model.edge.dblp.Authorship import Authorship
+from src.model.edge.dblp.Citation import Citation
+from src.model.edge.dblp.Publication import Publication
+from src.model.node.dblp.Author import Author
+from src.model.node.dblp.Conference import Conference
+from src.model.node.dblp.Paper import Paper
+from src.util.MetaPathCompiler import MetaPathCompiler
+from src.util.MetaPathMatrixUtility import MetaPathMatrixUtility
+from src.util.SampleGraphUtility import SampleGraphUtility
+
+__author__ = 'jontedesco'
+
+
+class MetaPathCompilerTest(unittest.TestCase):
+    """
+      Tests the meta path compiler
+    """
+
+    def setUp(self):
+        self.graph, self.authorMap, self.conferenceMap = SampleGraphUtility.constructPathSimExampleThree()
+        self.matrixUtility = MetaPathMatrixUtility(self.graph)
+        self.compiler = MetaPathCompiler(self.matrixUtility, {'A': Author, 'P': Paper, 'C': Conference})
+
+
+    def testParse(self):
+        """
+          Tests parsing meta path strings with & without dashes
+        """
+
+        self.assertEquals((Author, Paper, Conference, Paper, Author), self.compiler.parse('A-P-C-P-A'))
+        self.assertEquals((Author, Paper, Conference, Paper, Author), self.compiler.parse('APCPA'))
+        self.assertEquals((Author, Paper, Author), self.compiler.canonicalize([Author, Paper, Author]))
+        self.assertRaises(ValueError, self.compiler.parse, 'A-X-A')
+
+
+    def testSharedSubPathsComputedOnce(self):
+        """
+          Tests that each sub-path shared across a batch is planned once, and mirrored halves are transposed
+        """
+
+        batch = ['PPA', 'CPPA', 'CPAPPA', 'CPCPPA', 'APPCPPA', 'APCPA']
+        steps = self.compiler.plan(batch)
+        subPaths = [subPath for subPath, operation, operands in steps]
+        self.assertEquals(len(subPaths), len(set(subPaths)))
+
+        # The second half of APCPA is the transpose of the first
+        self.assertTrue(((Conference, Paper, Author), 'transpose', ((Author, Paper, Conference),)) in steps)
+
+
+    def testMetaPathMatricesMatchUtility(self):
+        """
+          Tests that compiled meta path matrices match the matrices computed one meta path at a time
+        """
+
+        batch = ['PPA', 'CPPA', 'CPAPPA', 'CPCPPA', 'APPCPPA', 'A-P-C-P-A', 'APA', 'A']
+        metaPathMatrices = self.compiler.getMetaPathMatrices(batch)
+        for metaPath in batch:
+            metaPath = self.compiler.canonicalize(metaPath)
+            expectedMatrix = self.matrixUtility.getMetaPathMatrix(list(metaPath))
+            self.assertEquals(0, (metaPathMatrices[metaPath] - expectedMatrix).nnz)
+
+        # Meta paths in later batches reuse computed sub-paths
+        self.assertEquals([], self.compiler.plan(['APPCPPA', 'CPA']))
+
+
+    def testTypedMetaPathMatricesMatchUtility(self):
+        """
+          Tests that compiled matrices of meta paths naming edge types match the matrices computed one meta path at a
+          time, where only sub-paths traversing the same edges backwards are transposed
+        """
+
+        graph, authorMap, conferenceMap = SampleGraphUtility.constructPathSimExampleThree(
+            extraAuthorsAndCitations=True, citationMap={'Mike': {'Jim': 3, 'Mary': 1}, 'Jim': {'Mike': 1}}
+        )
+        matrixUtility = MetaPathMatrixUtility(graph)
+        compiler = MetaPathCompiler(MetaPathMatrixUtility(graph))
+
+        citedBy, authoredBy = ReversedEdgeType(Citation), ReversedEdgeType(Authorship)
+        publishes = ReversedEdgeType(Publication)
+        batch = [
+            (Author, Authorship, Paper, Author), (Paper, Citation, Paper, Author), (Paper, citedBy, Paper, Author),
+            (Author, Paper, citedBy, Paper, Author), (Author, Paper, Citation, Paper, Author),
+            (Author, Authorship, Paper, Citation, Paper, Authorship, Author),
+            (Author, Authorship, Paper, Publication, Conference, publishes, Paper, authoredBy, Author)
+        ]
+        steps = compiler.plan(batch)
+        self.assertTrue(((Author, Paper, Citation, Paper, Author), 'transpose', (batch[3],)) in steps)
+        self.assertFalse(((Paper, Citation, Paper, Author), 'transpose', (batch[2],)) in steps)
+
+        metaPathMatrices = compiler.getMetaPathMatrices(batch)
+        for metaPath in batch:
+            expectedMatrix = matrixUtility.getMetaPathMatrix(list(metaPath))
+            self.assertTrue(expectedMatrix.nnz > 0)
+            self.assertEquals(0, (metaPathMatrices[metaPath] - expectedMatrix).nnz)
@@ -0,0 +1,68 @@
+import unittest
+from src.model.node.dblp.Author import Author
+from src.model.node.dblp.Conference import Conference
+from src.model.node.dblp.Paper import Paper
+from src.util.MetaPathCostEstimator import MetaPathCostEstimator
+from src.util.MetaPathMatrixUtility import MetaPathMatrixUtility
+from src.util.SampleGraphUtility import SampleGraphUtility
+
+__author__ = 'jontedesco'
+
+
+class MetaPathCostEstimatorTest(unittest.TestCase):
+    """
+      Tests the meta path cost estimator
+    """
+
+    def setUp(self):
+        self.graph, self.authorMap, self.conferenceMap = SampleGraphUtility.constructPathSimExampleThree()
+        self.matrixUtility = MetaPathMatrixUtility(self.graph)
+
+
+    def testEstimates(self):
+        """
+          Tests that path instances are counted exactly, and relation matrices are estimated exactly
+        """
+
+        estimator = MetaPathCostEstimator(self.matrixUtility)
+        for metaPath in [[Author, Paper, Conference, Paper, Author], [Author, Paper, Paper, Author]]:
+            estimates = estimator.estimate(metaPath)
+            metaPathMatrix = self.matrixUtility.getMetaPathMatrix(metaPath)
+            self.assertEquals(metaPathMatrix.sum(), estimates['pathInstances'])
+            self.assertEquals(metaPathMatrix.shape, estimates['shape'])
+
+        relationMatrix = self.matrixUtility.getRelationMatrix(Author, Paper)
+        estimates = estimator.estimate([Author, Paper])
+        self.assertEquals(relationMatrix.nnz, estimates['nonZeros'])
+        self.assertEquals([], estimates['intermediates'])
+
+
+    def testChooseExecutionMode(self):
+        """
+          Tests that less memory chooses modes holding less in memory
+        """
+
+        metaPath = [Author, Paper, Conference, Paper, Author]
+        estimates = MetaPathCostEstimator(self.matrixUtility).estimate(metaPath)
+        self.assertTrue(estimates['factorBytes'] < estimates['peakBytes'])
+
+        # Leave out enumeration & dense arrays, which are chosen for this small graph whenever they fit
+        modes = ['sparse', 'outOfCore', 'sampling']
+        for memoryLimit, mode in [
+            (estimates['peakBytes'], 'sparse'), (estimates['factorBytes'], 'outOfCore'), (0, 'sampling')
+        ]:
+            estimator = MetaPathCostEstimator(self.matrixUtility, memoryLimit, modes)
+            self.assertEquals(mode, estimator.estimate(metaPath)['mode'])
+
+
+    def testChooseSupportedExecutionMode(self):
+        """
+          Tests that only supported modes are chosen, falling back to the last supported mode when none fits in memory
+        """
+
+        metaPath = [Author, Paper, Conference, Paper, Author]
+        estimator = MetaPathCostEstimator(self.matrixUtility, 0, ['enumeration', 'dense', 'sparse', 'outOfCore'])
+        self.assertEquals('outOfCore', estimator.estimate(metaPath)['mode'])
+
+        estimator = MetaPathCostEstimator(self.matrixUtility, modes=['sparse'])
+        self.assertEquals('sparse', estimator.estimate(metaPath)['mode'])
@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy
+from scipy.sparse import csr_matrix
+from src.model.edge.ReversedEdgeType import ReversedEdgeType
+from src.model.edge.dblp.Citation import Citation
+from src.model.node.dblp.Author import Author
+from src.model.node.dblp.Paper import Paper
+from src.util.MetaPathMatrixCache import MetaPathMatrixCache
+
+__author__ = 'jontedesco'
+
+
+class MetaPathMatrixCacheTest(unittest.TestCase):
+    """
+      Tests the on-disk meta path matrix cache
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.matrix = csr_matrix(numpy.array([[1, 0, 2], [0, 0, 3]]))
+
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+    def testLoadStoredMatrices(self):
+        """
+          Tests that stored matrices & tensor layers are loaded back, only for the same graph fingerprint & meta path
+        """
+
+        cache = MetaPathMatrixCache(self.directory, 'graph')
+        metaPath = [Author, Paper, Citation, Paper, ReversedEdgeType(Citation), Paper, Author]
+        self.assertEquals('matrix:Author-Paper-Citation-Paper-~Citation-Paper-Author',
+                          MetaPathMatrixCache.getSignature(metaPath))
+
+        computedMatrices = []
+        computeMatrix = lambda: computedMatrices.append(self.matrix) or self.matrix
+        for i in xrange(0, 2):
+            self.assertEquals(0, (self.matrix - cache.getMetaPathMatrix(metaPath, computeMatrix)).nnz)
+        self.assertEquals(1, len(computedMatrices))
+
+        layers = [self.matrix, 2 * self.matrix]
+        cache.store(['author', 'paper'], layers, 'tensor')
+        loadedLayers = cache.load(['author', 'paper'], 'tensor')
+        self.assertEquals(2, len(loadedLayers))
+        for layer, loadedLayer in zip(layers, loadedLayers):
+            self.assertEquals(layer.shape, loadedLayer.shape)
+            self.assertEquals(0, (layer - loadedLayer).nnz)
+
+        self.assertIsNone(cache.load(['author', 'paper']))
+        self.assertIsNone(MetaPathMatrixCache(self.directory, 'otherGraph').load(metaPath))
+        self.assertEquals([], [fileName for fileName in os.listdir(self.directory) if fileName.endswith('.tmp')])
+
+
+    def testEvictLeastRecentlyUsed(self):
+        """
+          Tests that the least recently used entries are evicted once the cache is past its size limit
+        """
+
+        cache = MetaPathMatrixCache(self.directory, 'graph')
+        cache.store(['author'], [self.matrix])
+        entryBytes = cache.getStorageBytes()
+
+        # Room for two entries (with some slack for longer signatures), where the older entry is used last
+        cache.maxBytes = 2 * entryBytes + 100
+        cache.store(['paper'], [self.matrix])
+        os.utime(cache.getEntryPath(['author']), (0, 0))
+        os.utime(cache.getEntryPath(['paper']), (1, 1))
+        cache.load(['author'])
+        cache.store(['conference'], [self.matrix])
+
+        self.assertTrue(cache.getStorageBytes() <= cache.maxBytes)
+        self.assertIsNotNone(cache.load(['author']))
+        self.assertIsNone(cache.load(['paper']))
+        self.assertIsNotNone(cache.load(['conference']))
+
+
+
+    def testCorruptEntriesAreMisses(self):
+        """
+          Tests that truncated, garbled & incomplete entries are treated as misses & removed from the cache
+        """
+
+        cache = MetaPathMatrixCache(self.directory, 'graph')
+        cache.store(['author'], [self.matrix])
+        entryPath = cache.getEntryPath(['author'])
+        with open(entryPath, 'rb') as entryFile:
+            entry = entryFile.read()
+
+        incompleteArrays = {'fingerprint': numpy.array('graph'), 'signature': numpy.array('matrix:author')}
+        for writeEntry in [
+            lambda entryFile: entryFile.write(entry[:len(entry) / 2]),
+            lambda entryFile: entryFile.write('not an entry'),
+            lambda entryFile: numpy.savez(entryFile, **incompleteArrays)
+        ]:
+            with open(entryPath, 'wb') as entryFile:
+                writeEntry(entryFile)
+            self.assertIsNone(cache.load(['author']))
+            self.assertFalse(os.path.exists(entryPath))
+
+        self.assertEquals(0, (self.matrix - cache.getMetaPathMatrix(['author'], lambda: self.matrix)).nnz)
+        self.assertIsNotNone(cache.load(['author']))
@@ -0,0 +1,364 @@
+import shutil
+import tempfile
+import unittest
+import numpy
+from scipy.sparse import csr_matrix
+from src.graph.impl.NetworkXGraph import NetworkXGraph
+from src.model.edge.ReversedEdgeType import ReversedEdgeType
+from src.model.edge.dblp.Authorship import Authorship
+from src.model.edge.dblp.Citation import Citation
+from src.model.node.dblp.Author import Author
+from src.model.node.dblp.Conference import Conference
+from src.model.node.dblp.Paper import Paper
+from src.util.EdgeBasedMetaPathUtility import EdgeBasedMetaPathUtility
+from src.util.EdgeCutAggregator import EdgeCutAggregator
+from src.util.FactorizedMetaPathMatrix import FactorizedMetaPathMatrix
+from src.util.MetaPathMatrixUtility import MetaPathMatrixUtility
+from src.util.OnDiskSparseMatrix import OnDiskSparseMatrix
+from src.util.SampleGraphUtility import SampleGraphUtility
+
+__author__ = 'jontedesco'
+
+
+class MetaPathMatrixUtilityTest(unittest.TestCase):
+    """
+      Tests the sparse meta path matrix utility
+    """
+
+    def setUp(self):
+        self.graph, self.authorMap, self.conferenceMap = SampleGraphUtility.constructPathSimExampleThree()
+        self.matrixUtility = MetaPathMatrixUtility(self.graph)
+        self.metaPathUtility = EdgeBasedMetaPathUtility()
+
+
+    def testMetaPathMatrixMatchesPathCounts(self):
+        """
+          Tests that entries of the meta path matrix are the number of meta path instances between nodes
+        """
+
+        metaPath = [Author, Paper, Conference]
+        metaPathMatrix = self.matrixUtility.getMetaPathMatrix(metaPath)
+        authors, authorsIndex = self.matrixUtility.getNodeIndex(Author)
+        conferences, conferencesIndex = self.matrixUtility.getNodeIndex(Conference)
+
+        for author in authors:
+            for conference in conferences:
+                self.assertEquals(
+                    len(self.metaPathUtility.findMetaPaths(self.graph, author, conference, metaPath)),
+                    metaPathMatrix[authorsIndex[author], conferencesIndex[conference]]
+                )
+
+
+    def testSymmetricMetaPathMatrixMatchesChainProduct(self):
+        """
+          Tests that computing a symmetric meta path from its half path gives the left to right product
+        """
+
+        metaPath = [Author, Paper, Conference, Paper, Author]
+        self.assertTrue(self.matrixUtility.isSymmetricMetaPath(metaPath))
+        self.assertFalse(self.matrixUtility.isSymmetricMetaPath([Author, Paper, Paper, Author]))
+
+        expectedMatrix = self.matrixUtility.getRelationMatrix(Author, Paper)
+        for fromType, toType in zip(metaPath[1:-1], metaPath[2:]):
+            expectedMatrix = expectedMatrix * self.matrixUtility.getRelationMatrix(fromType, toType)
+
+        metaPathMatrix = self.matrixUtility.getMetaPathMatrix(metaPath)
+        self.assertEquals(0, (metaPathMatrix - expectedMatrix).nnz)
+
+        # Check against the PathSim paper example (Mike has 2 papers in SIGMOD and 1 in VLDB)
+        authors, authorsIndex = self.matrixUtility.getNodeIndex(Author)
+        mikeIndex = authorsIndex[self.authorMap['Mike']]
+        self.assertEquals(5, metaPathMatrix[mikeIndex, mikeIndex])
+
+
+    def testFindMultiplicationOrder(self):
+        """
+          Tests that the chain order with the least estimated cost is chosen
+        """
+
+        matrices = [
+            csr_matrix(numpy.ones((10, 100))), csr_matrix(numpy.ones((100, 5))), csr_matrix(numpy.ones((5, 50)))
+        ]
+        cost, order = MetaPathMatrixUtility.findMultiplicationOrder(matrices)
+        self.assertEquals(((0, 1), 2), order)
+        self.assertEquals(7500, cost)
+
+        product = MetaPathMatrixUtility.multiplyMatrices(matrices)
+        self.assertTrue(numpy.array_equal(numpy.ones((10, 50)) * 500, product.toarray()))
+
+
+    def testFactorizedMetaPathMatrix(self):
+        """
+          Tests that entries, rows & the diagonal of the factorized matrix match the full meta path matrix
+        """
+
+        metaPath = [Author, Paper, Conference, Paper, Author]
+        metaPathMatrix = self.matrixUtility.getMetaPathMatrix(metaPath)
+        factorizedMatrix = self.matrixUtility.getFactorizedMetaPathMatrix(metaPath)
+
+        self.assertEquals(metaPathMatrix.shape, factorizedMatrix.shape)
+        self.assertTrue(numpy.array_equal(metaPathMatrix.diagonal(), factorizedMatrix.diagonal()))
+        for i in xrange(0, metaPathMatrix.shape[0]):
+            self.assertEquals(0, (metaPathMatrix.getrow(i) - factorizedMatrix.getrow(i)).nnz)
+            for j in xrange(0, metaPathMatrix.shape[1]):
+                self.assertEquals(metaPathMatrix[i, j], factorizedMatrix[i, j])
+
+        # Random half path matrix with unsorted columns, duplicate entries & empty rows
+        random = numpy.random.RandomState(0)
+        indptr = numpy.concatenate([[0], numpy.cumsum(random.randint(0, 7, 14) * (random.rand(14) < 0.8))])
+        halfMatrix = csr_matrix(
+            (random.randint(1, 4, indptr[-1]), random.randint(0, 9, indptr[-1]), indptr), shape=(14, 9)
+        )
+        expectedMatrix = (halfMatrix * halfMatrix.transpose()).toarray()
+        factorizedMatrix = FactorizedMetaPathMatrix(halfMatrix)
+        for i in xrange(0, 14):
+            for j in xrange(0, 14):
+                self.assertEquals(expectedMatrix[i, j], factorizedMatrix[i, j])
+
+
+    def testMetaPathMatrixRows(self):
+        """
+          Tests that rows & diagonal entries computed for a few nodes match those of the full meta path matrix
+        """
+
+        authors, authorsIndex = self.matrixUtility.getNodeIndex(Author)
+        sourceNodes = [self.authorMap['Mary'], self.authorMap['Mike']]
+        sourceRows = [authorsIndex[node] for node in sourceNodes]
+
+        metaPaths = [[Author, Paper, Conference, Paper, Author], [Author, Paper, Conference], [Author, Paper, Author]]
+        for metaPath in metaPaths:
+            metaPathMatrix = MetaPathMatrixUtility(self.graph).getMetaPathMatrix(metaPath)
+            rows = self.matrixUtility.getMetaPathMatrixRows(metaPath, sourceNodes)
+            self.assertEquals(0, (metaPathMatrix[sourceRows] - rows).nnz)
+            if metaPath[0] == metaPath[-1]:
+                self.assertTrue(numpy.array_equal(
+                    metaPathMatrix.diagonal()[sourceRows], self.matrixUtility.getMetaPathDiagonal(metaPath, sourceNodes)
+                ))
+
+
+    def testParallelMetaPathMatrix(self):
+        """
+          Tests that building meta path matrices in row blocks across processes gives the same matrices, including
+          meta paths whose multiplication order first multiplies later parts of the chain
+        """
+
+        parallelMatrixUtility = MetaPathMatrixUtility(self.graph, processes=2)
+        for metaPath in [
+            [Author, Paper, Conference], [Author, Paper, Conference, Paper, Author], [Conference, Paper],
+            [Author, Paper, Conference, Paper], [Conference, Paper, Author, Paper, Conference, Paper, Author]
+        ]:
+            expectedMatrix = self.matrixUtility.getMetaPathMatrix(metaPath)
+            metaPathMatrix = parallelMatrixUtility.getMetaPathMatrix(metaPath)
+            self.assertEquals(expectedMatrix.shape, metaPathMatrix.shape)
+            self.assertEquals(0, (expectedMatrix - metaPathMatrix).nnz)
+
+
+    def testOutOfCoreMetaPathMatrix(self):
+        """
+          Tests that the on-disk meta path matrix, written in row panels, matches the in-memory meta path matrix
+        """
+
+        for metaPath in [[Author, Paper, Conference, Paper, Author], [Author, Paper, Conference], [Paper, Paper]]:
+            directory = tempfile.mkdtemp()
+            try:
+                metaPathMatrix = self.matrixUtility.getMetaPathMatrix(metaPath)
+                onDiskMatrix = self.matrixUtility.getOutOfCoreMetaPathMatrix(metaPath, directory, rowsPerPanel=2)
+                reopenedMatrix = OnDiskSparseMatrix(directory)
+
+                self.assertEquals(metaPathMatrix.shape, reopenedMatrix.shape)
+                self.assertTrue(numpy.array_equal(metaPathMatrix.diagonal(), reopenedMatrix.diagonal()))
+                self.assertTrue(onDiskMatrix.getStorageBytes() > 0)
+                for i in xrange(0, metaPathMatrix.shape[0]):
+                    self.assertEquals(0, (metaPathMatrix.getrow(i) - reopenedMatrix.getrow(i)).nnz)
+                    for j in xrange(0, metaPathMatrix.shape[1]):
+                        self.assertEquals(metaPathMatrix[i, j], reopenedMatrix[i, j])
+            finally:
+                shutil.rmtree(directory)
+
+
+    def testTypedRelationMatrices(self):
+        """
+          Tests that relation matrices only count edges of the given type, in the given direction, and are rebuilt after
+          the graph changes
+        """
+
+        graph, papers, authors = self.__constructCitationGraph()
+        papers, papersIndex = graph.getNodeIndex(Paper)
+        authors, authorsIndex = graph.getNodeIndex(Author)
+
+        citationMatrix = graph.getRelationMatrix(Paper, Paper, Citation)
+        self.assertEquals(2, citationMatrix.nnz)
+        self.assertEquals(1, citationMatrix[papersIndex[self.citingPaper], papersIndex[self.citedPaper]])
+        self.assertEquals(0, (graph.getRelationMatrix(Paper, Paper, ReversedEdgeType(Citation)) -
+                              citationMatrix.transpose()).nnz)
+        self.assertEquals(0, graph.getRelationMatrix(Paper, Paper, Authorship).nnz)
+        self.assertEquals(0, graph.getRelationMatrix(Paper, Paper, symmetric=True).nnz)
+        self.assertEquals(3, graph.getRelationMatrix(Author, Paper, Authorship).nnz)
+
+        graph.addEdge(self.citedPaper, self.citingPaper, Citation())
+        self.assertEquals(3, graph.getRelationMatrix(Paper, Paper, Citation).nnz)
+
+
+    def testMetaPathsWithEdgeTypes(self):
+        """
+          Tests that meta paths naming edge types (including reversed edges) give the same matrices as chain products
+        """
+
+        graph, papers, authors = self.__constructCitationGraph()
+        matrixUtility = MetaPathMatrixUtility(graph)
+        citingMatrix = graph.getRelationMatrix(Paper, Paper, Citation)
+
+        # Citing & cited variants of PPA
+        authorshipMatrix = graph.getRelationMatrix(Paper, Author, Authorship)
+        citingMetaPathMatrix = matrixUtility.getMetaPathMatrix([Paper, Citation, Paper, Authorship, Author])
+        citedMetaPathMatrix = matrixUtility.getMetaPathMatrix([Paper, ReversedEdgeType(Citation), Paper, Author])
+        self.assertEquals(0, (citingMetaPathMatrix - citingMatrix * authorshipMatrix).nnz)
+        self.assertEquals(0, (citedMetaPathMatrix - citingMatrix.transpose() * authorshipMatrix).nnz)
+
+        # Authors of citing papers & authors of the papers they cite, in both directions
+        metaPath = [Author, Authorship, Paper, Citation, Paper, ReversedEdgeType(Citation), Paper, Authorship, Author]
+        self.assertTrue(matrixUtility.isSymmetricMetaPath(metaPath))
+        self.assertFalse(matrixUtility.isSymmetricMetaPath([Author, Paper, Citation, Paper, Citation, Paper, Author]))
+        expectedMatrix = authorshipMatrix.transpose() * citingMatrix * citingMatrix.transpose() * authorshipMatrix
+        self.assertEquals(0, (matrixUtility.getMetaPathMatrix(metaPath) - expectedMatrix).nnz)
+
+
+    def testIncrementalMetaPathMatrices(self):
+        """
+          Tests that updating cached matrices after adding edges (and nodes) gives the recomputed matrices
+        """
+
+        metaPaths = [
+            [Author, Paper, Conference, Paper, Author], [Author, Paper, Conference], [Paper, Author], [Conference]
+        ]
+        for metaPath in metaPaths:
+            self.matrixUtility.getMetaPathMatrix(metaPath)
+        factorizedMatrix = self.matrixUtility.getFactorizedMetaPathMatrix(metaPaths[0])
+
+        # A new author writing a new paper in SIGMOD with Mike, and Jim publishing an existing paper again in KDD
+        newAuthor, newPaper = Author(100, 'Joe'), Paper(101, 'New')
+        mike, jim = self.authorMap['Mike'], self.authorMap['Jim']
+        sigmod, kdd = self.conferenceMap['SIGMOD'], self.conferenceMap['KDD']
+        jimPaper = [node for node in self.graph.getSuccessors(jim) if isinstance(node, Paper)][0]
+        edges = [
+            (newAuthor, newPaper), (newPaper, newAuthor), (mike, newPaper), (newPaper, mike),
+            (newPaper, sigmod), (sigmod, newPaper), (jimPaper, kdd), (kdd, jimPaper)
+        ]
+        for source, destination in edges:
+            self.graph.addEdge(source, destination)
+
+        metaPathDeltas = self.matrixUtility.notifyEdgesAdded(edges)
+        self.assertEquals(set([tuple(metaPath) for metaPath in metaPaths[:3]]), set(metaPathDeltas.keys()))
+
+        expectedMatrixUtility = MetaPathMatrixUtility(self.graph)
+        for metaPath in metaPaths:
+            expectedMatrix = expectedMatrixUtility.getMetaPathMatrix(metaPath)
+            metaPathMatrix = self.matrixUtility.getMetaPathMatrix(metaPath)
+            self.assertEquals(expectedMatrix.shape, metaPathMatrix.shape)
+            self.assertEquals(0, (expectedMatrix - metaPathMatrix).nnz)
+
+        halfMetaPath = tuple(self.matrixUtility.getHalfMetaPath(metaPaths[0]))
+        factorizedMatrix.update(self.matrixUtility.getMetaPathMatrix(halfMetaPath), metaPathDeltas[halfMetaPath])
+        expectedMatrix = expectedMatrixUtility.getMetaPathMatrix(metaPaths[0])
+        self.assertTrue(numpy.array_equal(expectedMatrix.diagonal(), factorizedMatrix.diagonal()))
+
+
+    def testIncrementalNodeIndicesFollowGraphOrder(self):
+        """
+          Tests that new nodes are appended to node indices in the order they were added to the graph, rather than the
+          order of the new edges, so that relation matrices later taken from the graph line up with cached matrices
+        """
+
+        metaPath = [Author, Paper, Conference]
+        self.matrixUtility.getMetaPathMatrix(metaPath)
+
+        mike, sigmod, vldb = self.authorMap['Mike'], self.conferenceMap['SIGMOD'], self.conferenceMap['VLDB']
+        firstPaper, secondPaper = Paper(101, 'First'), Paper(102, 'Second')
+        self.graph.addNode(secondPaper)
+        self.graph.addNode(firstPaper)
+        edges = [
+            (mike, firstPaper), (firstPaper, mike), (firstPaper, sigmod), (sigmod, firstPaper),
+            (mike, secondPaper), (secondPaper, mike), (secondPaper, vldb), (vldb, secondPaper)
+        ]
+        for source, destination in edges:
+            self.graph.addEdge(source, destination)
+        self.matrixUtility.notifyEdgesAdded(edges)
+
+        self.assertEquals(self.graph.getNodeIndex(Paper)[0], self.matrixUtility.getNodeIndex(Paper)[0])
+        expectedMatrix = MetaPathMatrixUtility(self.graph).getMetaPathMatrix(metaPath)
+        self.assertEquals(0, (expectedMatrix - self.matrixUtility.getMetaPathMatrix(metaPath)).nnz)
+
+        # Relation matrices built by the graph after the update are indexed like the cached matrices
+        paperConferenceMatrix = self.graph.getRelationMatrix(Paper, Conference)
+        authorPaperMatrix = self.matrixUtility.getRelationMatrix(Author, Paper)
+        self.assertEquals(0, (expectedMatrix - authorPaperMatrix * paperConferenceMatrix).nnz)
+
+
+    def testCachesDroppedWhenGraphFingerprintChanges(self):
+        """
+          Tests that graph fingerprints are kept up to date as the graph grows, do not depend on the order of insertion,
+          and that cached matrices are rebuilt when the graph changes without notifying the utility
+        """
+
+        graph, papers, authors = self.__constructCitationGraph()
+        otherGraph, otherPapers, otherAuthors = self.__constructCitationGraph()
+        self.assertEquals(graph.fingerprint(), otherGraph.fingerprint())
+
+        metaPath = [Author, Paper, Citation, Paper, Author]
+        matrixUtility = MetaPathMatrixUtility(graph)
+        self.assertEquals(2, matrixUtility.getMetaPathMatrix(metaPath).sum())
+
+        # Add a citation (& a new paper) without notifying the utility, in a different order for each graph
+        newPaper = Paper(6, 'New')
+        graph.addEdge(newPaper, papers[2], Citation())
+        graph.addBothEdges(authors[0], newPaper, Authorship())
+        otherGraph.addNode(newPaper)
+        otherGraph.addBothEdges(otherAuthors[0], newPaper, Authorship())
+        otherGraph.addEdge(newPaper, otherPapers[2], Citation())
+
+        fingerprint = graph.fingerprint()
+        self.assertEquals(fingerprint, otherGraph.fingerprint())
+        self.assertEquals(fingerprint, NetworkXGraph(graph.graph).fingerprint())
+        self.assertEquals(3, matrixUtility.getMetaPathMatrix(metaPath).sum())
+
+        # Removing the citation is seen through the recomputed fingerprint
+        graph.removeEdge(newPaper, papers[2])
+        self.assertNotEquals(fingerprint, graph.fingerprint())
+        self.assertEquals(2, matrixUtility.getMetaPathMatrix(metaPath).sum())
+
+
+    def __constructCitationGraph(self):
+        """
+          Builds a small graph of three papers, where two papers cite the third, each with an author
+        """
+
+        graph = NetworkXGraph()
+        self.citingPaper, self.otherCitingPaper, self.citedPaper = Paper(0, 'Citing'), Paper(1, 'Other'), Paper(2, 'A')
+        papers = [self.citingPaper, self.otherCitingPaper, self.citedPaper]
+        authors = [Author(3, 'Mike'), Author(4, 'Jim'), Author(5, 'Mary')]
+        graph.addNodes(papers + authors)
+        for paper, author in zip(papers, authors):
+            graph.addBothEdges(author, paper, Authorship())
+        graph.addEdge(self.citingPaper, self.citedPaper, Citation())
+        graph.addEdge(self.otherCitingPaper, self.citedPaper, Citation())
+
+        return graph, papers, authors
+
+
+    def testEdgeCutMatrices(self):
+        """
+          Tests that the edge cut matrices hold the number of distinct edges at each step of the path instances
+        """
+
+        metaPath = [Author, Paper, Conference, Paper, Author]
+        edgeCutMatrices = self.matrixUtility.getEdgeCutMatrices(metaPath)
+        authors, authorsIndex = self.matrixUtility.getNodeIndex(Author)
+
+        self.assertEquals(len(metaPath) - 1, len(edgeCutMatrices))
+        for author in authors:
+            for otherAuthor in authors:
+                edgeCutAggregator = self.metaPathUtility.aggregateMetaPaths(
+                    self.graph, author, otherAuthor, metaPath, EdgeCutAggregator(len(metaPath))
+                )
+                i, j = authorsIndex[author], authorsIndex[otherAuthor]
+                self.assertEquals(edgeCutAggregator.getEdgeCutCounts(), [edgeCutMatrix[i, j] for edgeCutMatrix in edgeCutMatrices])
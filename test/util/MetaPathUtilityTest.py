@@ -1,3 +1,5 @@
+import itertools
+import random
 import unittest
 from src.graph.GraphFactory import GraphFactory
 from src.model.edge.dblp.Authorship import Authorship
@@ -6,6 +8,8 @@ from src.model.edge.dblp.Publication import Publication
 from src.model.node.dblp.Author import Author
 from src.model.node.dblp.Paper import Paper
 from src.model.node.dblp.Conference import Conference
+from src.util.EdgeCutAggregator import EdgeCutAggregator
+from src.util.MetaPathNeighborIndex import MetaPathNeighborIndex
 
 __author__ = 'jontedesco'
 
@@ -306,3 +310,124 @@ class MetaPathUtilityTest(unittest.TestCase):
             self.templateGraph, self.author, self.author, [Author, Paper, Paper, Author], True
         )
         self.assertItemsOrReverseItemsEqual(expectedPaths, actualPaths)
+
+
+    def testCountMetaPaths(self):
+        """
+          Tests that counting meta paths gives the number of meta paths found, for loops & non-loops, and that counting
+          paths from a node gives the same counts for each meta path neighbor
+        """
+
+        nodes = [self.author, self.coauthor, self.conference1, self.conference2, self.paper1, self.paper2, self.paper3]
+        metaPaths = [
+            [Author, Paper, Conference], [Author, Paper, Author], [Author, Paper, Paper, Author],
+            [Author, Paper, Conference, Paper, Author], [Paper, Paper, Paper]
+        ]
+
+        for metaPath, symmetric in itertools.product(metaPaths, [False, True]):
+            for startingNode in [node for node in nodes if node.__class__ == metaPath[0]]:
+                pathCounts = self.metaPathUtility.countMetaPathsFrom(self.templateGraph, startingNode, metaPath, symmetric)
+                for endingNode in [node for node in nodes if node.__class__ == metaPath[-1]]:
+                    expectedCount = len(self.metaPathUtility.findMetaPaths(
+                        self.templateGraph, startingNode, endingNode, metaPath, symmetric
+                    ))
+                    self.assertEquals(expectedCount, self.metaPathUtility.countMetaPaths(
+                        self.templateGraph, startingNode, endingNode, metaPath, symmetric
+                    ))
+                    self.assertEquals(expectedCount, pathCounts.get(endingNode, 0))
+
+
+    def testIterMetaPaths(self):
+        """
+          Tests that streaming meta paths yields the same paths as finding them, for loops & non-loops, and that edge cut
+          counts can be aggregated while streaming
+        """
+
+        nodes = [self.author, self.coauthor, self.conference1, self.conference2, self.paper1, self.paper2, self.paper3]
+        metaPaths = [[Author, Paper, Conference], [Author, Paper, Paper, Author], [Author, Paper, Conference, Paper, Author]]
+
+        for metaPath, symmetric in itertools.product(metaPaths, [False, True]):
+            for startingNode in [node for node in nodes if node.__class__ == metaPath[0]]:
+                for endingNode in [node for node in nodes if node.__class__ == metaPath[-1]]:
+                    self.assertItemsOrReverseItemsEqual(
+                        self.metaPathUtility.findMetaPaths(self.templateGraph, startingNode, endingNode, metaPath, symmetric),
+                        list(self.metaPathUtility.iterMetaPaths(
+                            self.templateGraph, startingNode, endingNode, metaPath, symmetric
+                        ))
+                    )
+
+        # Author published in conference meta path, with two papers in the same conference
+        aggregator = self.metaPathUtility.aggregateMetaPaths(
+            self.templateGraph, self.author, self.conference1, [Author, Paper, Conference], EdgeCutAggregator(3)
+        )
+        self.assertEquals([2, 2], aggregator.getEdgeCutCounts())
+
+
+    def testEstimateMetaPathCounts(self):
+        """
+          Tests that random walk estimates of path counts reach the meta path neighbors, and are close to exact counts
+        """
+
+        for metaPath in [[Author, Paper, Conference], [Author, Paper, Paper, Author], [Conference, Paper, Author]]:
+            for startingNode in self.templateGraph.getNodesOfType(metaPath[0]):
+                pathCounts = self.metaPathUtility.countMetaPathsFrom(self.templateGraph, startingNode, metaPath)
+                pathCounts.pop(startingNode, None)
+                estimates = self.metaPathUtility.estimateMetaPathCountsFrom(
+                    self.templateGraph, startingNode, metaPath, relativeError=0.01, randomState=random.Random(0)
+                )
+                estimates.pop(startingNode, None)
+
+                self.assertEquals(set(pathCounts.keys()), set(estimates.keys()))
+                for node, (pathCount, halfWidth) in estimates.iteritems():
+                    self.assertTrue(abs(pathCount - pathCounts[node]) <= max(2 * halfWidth, 0.05 * pathCounts[node]))
+
+
+    def testGetProjectionMatrix(self):
+        """
+          Tests that the projection matrix has the same weights as the edges of the projected graph
+        """
+
+        for metaPath, symmetric in itertools.product([[Author, Paper, Author], [Author, Paper, Conference]], [False, True]):
+            if metaPath[0] == metaPath[-1]:
+                projectedGraph = self.metaPathUtility.createHomogeneousProjection(self.templateGraph, metaPath, symmetric)
+            else:
+                projectedGraph = self.metaPathUtility.createHeterogeneousProjection(self.templateGraph, metaPath, symmetric)
+            projectionMatrix, nodesIndex = self.metaPathUtility.getProjectionMatrix(self.templateGraph, metaPath, symmetric)
+
+            for x, y in itertools.product(self.templateGraph.getNodesOfType(metaPath[0]),
+                                          self.templateGraph.getNodesOfType(metaPath[-1])):
+                self.assertEquals(projectedGraph.getNumberOfEdges(x, y), projectionMatrix[nodesIndex[x], nodesIndex[y]])
+
+
+    def testMetaPathNeighborIndex(self):
+        """
+          Tests that the meta path neighbor index holds the same neighbors & path counts as counting from each node
+        """
+
+        for metaPath in [[Author, Paper, Author], [Author, Paper, Paper, Author], [Paper, Conference]]:
+            neighborIndex = MetaPathNeighborIndex(self.templateGraph, metaPath, metaPathUtility=self.metaPathUtility)
+            for node in self.templateGraph.getNodesOfType(metaPath[0]):
+                pathCounts = self.metaPathUtility.countMetaPathsFrom(self.templateGraph, node, metaPath)
+                self.assertEquals(pathCounts, neighborIndex.getPathCounts(node))
+                self.assertEquals(set(pathCounts.keys()), set(neighborIndex.getNeighbors(node)))
+
+
+    def testMetaPathNeighborIndexRebuiltWhenGraphChanges(self):
+        """
+          Tests that shared neighbor indices are reused for the same graph contents, and rebuilt after the graph changes
+        """
+
+        metaPath = [Author, Paper, Author]
+        neighborIndex = MetaPathNeighborIndex.getInstance(self.templateGraph, metaPath)
+        self.assertIs(neighborIndex, MetaPathNeighborIndex.getInstance(self.templateGraph, metaPath))
+        self.assertEquals(set([self.author, self.coauthor]), set(neighborIndex.getNeighbors(self.coauthor)))
+
+        newAuthor = Author(2, 'newAuthor')
+        self.templateGraph.addBothEdges(self.paper3, newAuthor, Authorship())
+        neighborIndex = MetaPathNeighborIndex.getInstance(self.templateGraph, metaPath)
+        self.assertEquals(set([self.author, self.coauthor, newAuthor]), set(neighborIndex.getNeighbors(self.coauthor)))
+
+        self.templateGraph.removeEdge(self.paper3, newAuthor)
+        self.templateGraph.removeEdge(newAuthor, self.paper3)
+        neighborIndex = MetaPathNeighborIndex.getInstance(self.templateGraph, metaPath)
+        self.assertEquals(set([self.author, self.coauthor]), set(neighborIndex.getNeighbors(self.coauthor)))
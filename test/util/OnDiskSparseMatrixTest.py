@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy
+from scipy.sparse import csr_matrix
+from src.util.OnDiskSparseMatrix import OnDiskSparseMatrix
+
+__author__ = 'jontedesco'
+
+
+class OnDiskSparseMatrixTest(unittest.TestCase):
+    """
+      Tests the on-disk sparse matrix, stored as row panels
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.matrix = csr_matrix(numpy.array([[1.5, 0, 2], [0, 0.25, 3], [4, 0, 0], [0, 5, 0.5]]))
+
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+    def getPanels(self, matrix, rowsPerPanel):
+        """
+          Split a matrix into consecutive row panels
+        """
+
+        return [matrix[start:start + rowsPerPanel] for start in xrange(0, matrix.shape[0], rowsPerPanel)]
+
+
+    def testDiagonalKeepsEntryType(self):
+        """
+          Tests that the diagonal is stored in the type of the matrix entries, for integer & real matrices
+        """
+
+        for matrix in [self.matrix, csr_matrix(numpy.array([[3, 1], [1, 2], [0, 7]]))]:
+            onDiskMatrix = OnDiskSparseMatrix.write(self.getPanels(matrix, 2), matrix.shape, self.directory)
+            self.assertEquals(matrix.dtype, onDiskMatrix.diagonal().dtype)
+            self.assertTrue(numpy.array_equal(matrix.diagonal(), onDiskMatrix.diagonal()))
+            for i in xrange(0, min(matrix.shape)):
+                self.assertEquals(matrix[i, i], onDiskMatrix[i, i])
+
+
+    def testRewriteReplacesPreviousMatrix(self):
+        """
+          Tests that writing a matrix into a directory already holding one removes the panels of the previous matrix,
+          and that only the files of the matrix are counted towards its storage
+        """
+
+        with open(os.path.join(self.directory, 'notes.txt'), 'w') as otherFile:
+            otherFile.write('x' * 1000)
+
+        OnDiskSparseMatrix.write(self.getPanels(self.matrix, 1), self.matrix.shape, self.directory)
+        onDiskMatrix = OnDiskSparseMatrix.write(self.getPanels(self.matrix, 3), self.matrix.shape, self.directory)
+
+        panelFiles = sorted([fileName for fileName in os.listdir(self.directory) if fileName.startswith('panel-')])
+        self.assertEquals(
+            ['panel-%d-%s.npy' % (i, name) for i in xrange(0, 2) for name in ['data', 'indices', 'indptr']], panelFiles
+        )
+        self.assertEquals(
+            sum([os.path.getsize(os.path.join(self.directory, fileName)) for fileName in os.listdir(self.directory)]),
+            onDiskMatrix.getStorageBytes() + 1000
+        )
+
+        reopenedMatrix = OnDiskSparseMatrix(self.directory)
+        for i in xrange(0, self.matrix.shape[0]):
+            self.assertEquals(0, (self.matrix.getrow(i) - reopenedMatrix.getrow(i)).nnz)